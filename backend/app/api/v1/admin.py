@@ -0,0 +1,103 @@
+"""
+Admin API Endpoints - Cross-tenant views for platform operators.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+
+from app.database.session import get_read_db
+from app.database.models import SubscriptionStatus
+from app.services.admin_service import AdminService
+from app.utils.pagination import decode_cursor
+from app.utils.auth import get_current_admin, TenantSnapshot
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/tenants")
+async def list_tenants(
+    limit: int = Query(default=50, ge=1, le=AdminService.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    subscription_status: Optional[SubscriptionStatus] = None,
+    is_suspended: Optional[bool] = None,
+    trial_ends_after: Optional[datetime] = None,
+    trial_ends_before: Optional[datetime] = None,
+    current_admin: TenantSnapshot = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
+):
+    """
+    List all tenants with usage, trial status and inbox health.
+    
+    Keyset-paginated on (created_at, id), newest first: pass the returned
+    `next_cursor` as `cursor` to fetch the next page. Each page costs one
+    query regardless of how deep into the list it is.
+    
+    Response:
+    ```json
+    {
+        "tenants": [
+            {
+                "id": "uuid...",
+                "company_name": "Acme Corp",
+                "subscription_status": "trial",
+                "trial": {"ends_at": "...", "days_remaining": 3, ...},
+                "usage": {"inboxes": {"used": 45, "limit": 50}, ...},
+                "health": {"avg_health_score": 82.5, ...}
+            }
+        ],
+        "next_cursor": "WyIyMDI0LTAxLTAxVDAwOjAwOjAwIiwgIi4uLiJd"
+    }
+    ```
+    """
+    after = decode_cursor(cursor)
+    
+    try:
+        return await run_in_threadpool(
+            AdminService.list_tenants,
+            db,
+            limit=limit,
+            after=after,
+            subscription_status=subscription_status,
+            is_suspended=is_suspended,
+            trial_ends_after=trial_ends_after,
+            trial_ends_before=trial_ends_before,
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/trials")
+async def list_trial_tenants(
+    limit: int = Query(default=50, ge=1, le=AdminService.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    trial_ends_after: Optional[datetime] = None,
+    trial_ends_before: Optional[datetime] = None,
+    current_admin: TenantSnapshot = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
+):
+    """List tenants currently on a trial (trial users view)."""
+    after = decode_cursor(cursor)
+    
+    try:
+        return await run_in_threadpool(
+            AdminService.list_tenants,
+            db,
+            limit=limit,
+            after=after,
+            subscription_status=SubscriptionStatus.TRIAL,
+            trial_ends_after=trial_ends_after,
+            trial_ends_before=trial_ends_before,
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
@@ -2,24 +2,31 @@
 Analytics & Monitoring API Endpoints.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+from typing import Optional
 
 from app.database.session import get_db
 from app.database.models import Tenant, Inbox, TransactionHistory, TransactionType
-from app.utils.auth import get_current_tenant
+from app.utils.auth import get_current_tenant_snapshot, TenantSnapshot
+from app.utils.cache import ResponseCache, CacheTag
+from app.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
 @router.get("/usage")
 async def get_usage_analytics(
-    current_tenant: Tenant = Depends(get_current_tenant),
+    request: Request,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
     """Get comprehensive usage analytics."""
-    try:
+    def build():
+        tenant = db.get(Tenant, current_tenant.id)
         inboxes = db.query(Inbox).filter(Inbox.tenant_id == current_tenant.id).all()
         
         # Calculate totals
@@ -39,9 +46,18 @@ async def get_usage_analytics(
             "suspended_inboxes": suspended_inboxes,
             "total_emails_sent_month": total_emails_sent,
             "average_health_score": round(avg_health, 2),
-            "domains_count": current_tenant.domains_count,
+            "domains_count": tenant.domains_count,
         }
     
+    try:
+        return await run_in_threadpool(
+            ResponseCache.get_or_build,
+            request,
+            current_tenant.id,
+            tags=[CacheTag.INBOXES, CacheTag.DOMAINS],
+            builder=build,
+        )
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -51,24 +67,62 @@ async def get_usage_analytics(
 
 @router.get("/billing-summary")
 async def get_billing_summary(
-    current_tenant: Tenant = Depends(get_current_tenant),
+    request: Request,
+    limit: int = Query(default=10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
-    """Get billing summary and transaction history."""
-    try:
-        # Get last 10 transactions
-        transactions = db.query(TransactionHistory).filter(
+    """
+    Get billing summary and transaction history.
+    
+    `total_spent_month` sums all succeeded transactions in the current
+    billing period. Recent transactions are keyset-paginated: pass the
+    returned `next_cursor` as `cursor` to fetch the next page.
+    """
+    after = decode_cursor(cursor)
+    
+    def build():
+        tenant = db.get(Tenant, current_tenant.id)
+        period_start = _current_period_start(tenant)
+        
+        # Aggregate over the billing period (range scan on tenant_id, created_at)
+        total_cents = db.query(
+            func.coalesce(func.sum(TransactionHistory.amount), 0)
+        ).filter(
+            TransactionHistory.tenant_id == current_tenant.id,
+            TransactionHistory.created_at >= period_start,
+            TransactionHistory.status == "succeeded",
+        ).scalar()
+        
+        # Recent transactions, newest first
+        query = db.query(TransactionHistory).filter(
             TransactionHistory.tenant_id == current_tenant.id
-        ).order_by(TransactionHistory.created_at.desc()).limit(10).all()
+        )
+        if after:
+            query = query.filter(
+                # Plain bound on the partition key lets the planner prune partitions
+                TransactionHistory.created_at <= after[0],
+                tuple_(TransactionHistory.created_at, TransactionHistory.id) < after
+            )
+        transactions = query.order_by(
+            TransactionHistory.created_at.desc(),
+            TransactionHistory.id.desc()
+        ).limit(limit + 1).all()
         
-        # Calculate totals
-        total_spent = sum(t.amount for t in transactions if t.status == "succeeded") / 100  # Convert to USD
+        has_more = len(transactions) > limit
+        transactions = transactions[:limit]
+        next_cursor = (
+            encode_cursor(transactions[-1].created_at, transactions[-1].id)
+            if has_more else None
+        )
         
         return {
-            "current_tier": current_tenant.subscription_tier,
-            "status": current_tenant.subscription_status,
-            "next_billing_date": current_tenant.next_billing_date,
-            "total_spent_month": round(total_spent, 2),
+            "current_tier": tenant.subscription_tier,
+            "status": tenant.subscription_status,
+            "next_billing_date": tenant.next_billing_date,
+            "billing_period_start": period_start,
+            "total_spent_month": round(total_cents / 100, 2),  # Convert to USD
             "recent_transactions": [
                 {
                     "id": str(t.id),
@@ -79,9 +133,21 @@ async def get_billing_summary(
                     "date": t.created_at,
                 }
                 for t in transactions
-            ]
+            ],
+            "next_cursor": next_cursor,
         }
     
+    try:
+        return await run_in_threadpool(
+            ResponseCache.get_or_build,
+            request,
+            current_tenant.id,
+            tags=[CacheTag.BILLING, CacheTag.TENANT],
+            builder=build,
+        )
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -91,11 +157,12 @@ async def get_billing_summary(
 
 @router.get("/deliverability")
 async def get_deliverability_metrics(
-    current_tenant: Tenant = Depends(get_current_tenant),
+    request: Request,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
     """Get email deliverability metrics."""
-    try:
+    def build():
         inboxes = db.query(Inbox).filter(Inbox.tenant_id == current_tenant.id).all()
         
         # Calculate averages
@@ -114,8 +181,25 @@ async def get_deliverability_metrics(
             "warmup_distribution": warmup_stages,
         }
     
+    try:
+        return await run_in_threadpool(
+            ResponseCache.get_or_build,
+            request,
+            current_tenant.id,
+            tags=[CacheTag.INBOXES],
+            builder=build,
+        )
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+
+def _current_period_start(tenant: Tenant) -> datetime:
+    """Start of the tenant's current billing period (calendar month if unknown)."""
+    now = datetime.utcnow()
+    if tenant.current_period_start and tenant.current_period_start <= now:
+        return tenant.current_period_start
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
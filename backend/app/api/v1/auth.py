@@ -3,16 +3,22 @@ Authentication API Endpoints.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 import jwt
 from datetime import datetime, timedelta
 
-from app.database.session import get_db
+from app.database.session import get_db, get_async_db
 from app.database.models import Tenant, User, SubscriptionTier, SubscriptionStatus
 from app.services.subscription_service import SubscriptionService
 from app.config import settings
+from app.services.api_key_service import APIKeyService
+from app.services.audit_service import AuditLogWriter
+from app.utils.auth import get_current_tenant_snapshot, TenantSnapshot
 from app.utils.security import hash_password, verify_password
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -32,6 +38,13 @@ class LoginRequest(BaseModel):
     password: str
 
 
+class APIKeyCreateRequest(BaseModel):
+    """API key creation request."""
+    name: str
+    scopes: List[str] = ["read"]
+    expires_at: Optional[datetime] = None
+
+
 class TokenResponse(BaseModel):
     """JWT token response."""
     access_token: str
@@ -44,7 +57,7 @@ class TokenResponse(BaseModel):
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     request: RegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new tenant.
@@ -79,9 +92,9 @@ async def register(
     """
     try:
         # Check if tenant already exists
-        existing = db.query(Tenant).filter(
-            Tenant.company_email == request.company_email
-        ).first()
+        existing = await db.scalar(
+            select(Tenant.id).where(Tenant.company_email == request.company_email)
+        )
         
         if existing:
             raise HTTPException(
@@ -97,10 +110,15 @@ async def register(
         )
         
         db.add(tenant)
-        db.flush()
+        await db.flush()
         
-        # Create trial
-        SubscriptionService.create_trial(tenant, db)
+        # Create trial (sync service method, run on the async session's connection);
+        # a tenant created just now has nothing cached to invalidate
+        await db.run_sync(
+            lambda session: SubscriptionService.create_trial(tenant, session, invalidate_caches=False)
+        )
+        
+        AuditLogWriter.record(tenant.id, "tenant.registered", "tenant", tenant.id)
         
         # Create JWT tokens
         access_token = _create_token(
@@ -124,7 +142,7 @@ async def register(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -134,7 +152,7 @@ async def register(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login with email and password.
@@ -143,9 +161,9 @@ async def login(
     """
     try:
         # Find tenant (for now, simplified - in production use separate User table)
-        tenant = db.query(Tenant).filter(
-            Tenant.company_email == request.email
-        ).first()
+        tenant = await db.scalar(
+            select(Tenant).where(Tenant.company_email == request.email)
+        )
         
         if not tenant:
             raise HTTPException(
@@ -163,8 +181,15 @@ async def login(
                 detail="Account suspended"
             )
         
-        # Check if trial expired (trigger payment reminder)
-        SubscriptionService.check_trial_expired(tenant, db)
+        # Check if trial expired (trigger payment reminder); the cache calls
+        # block, so they run off the event loop
+        expired = await db.run_sync(
+            lambda session: SubscriptionService.check_trial_expired(
+                tenant, session, invalidate_caches=False
+            )
+        )
+        if expired:
+            await run_in_threadpool(SubscriptionService.invalidate_tenant_caches, tenant.id)
         
         # Create tokens
         access_token = _create_token(
@@ -197,7 +222,7 @@ async def login(
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
     refresh_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Refresh access token using refresh token."""
     try:
@@ -215,7 +240,7 @@ async def refresh_token(
             )
         
         # Verify tenant still exists
-        tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+        tenant = await db.get(Tenant, tenant_id)
         if not tenant:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -252,6 +277,104 @@ async def refresh_token(
         )
 
 
+@router.post("/api-keys", status_code=status.HTTP_201_CREATED)
+async def create_api_key(
+    request: APIKeyCreateRequest,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
+    db: Session = Depends(get_db)
+):
+    """
+    Create an API key for programmatic access.
+    
+    Send it as the `X-API-Key` header. Scopes: `read` (GET requests),
+    `write` (mutating requests), `admin` (both). The raw key is only
+    returned once.
+    """
+    invalid = set(request.scopes) - {"read", "write", "admin"}
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid scopes: {', '.join(sorted(invalid))}"
+        )
+    
+    try:
+        api_key, raw_key = await run_in_threadpool(
+            APIKeyService.create_key,
+            tenant_id=str(current_tenant.id),
+            name=request.name,
+            scopes=request.scopes,
+            expires_at=request.expires_at,
+            db=db
+        )
+        AuditLogWriter.record(
+            current_tenant.id, "api_key.created", "api_key", api_key.id,
+            {"name": api_key.name, "scopes": api_key.scopes}
+        )
+        
+        return {
+            "id": str(api_key.id),
+            "name": api_key.name,
+            "key": raw_key,
+            "scopes": api_key.scopes,
+            "expires_at": api_key.expires_at,
+        }
+    
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/api-keys")
+async def list_api_keys(
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
+    db: Session = Depends(get_db)
+):
+    """List API keys (without the secret)."""
+    keys = await run_in_threadpool(APIKeyService.list_keys, str(current_tenant.id), db)
+    
+    return [
+        {
+            "id": str(k.id),
+            "name": k.name,
+            "scopes": k.scopes,
+            "is_active": k.is_active,
+            "expires_at": k.expires_at,
+            "last_used_at": k.last_used_at,
+            "usage_count": k.usage_count,
+        }
+        for k in keys
+    ]
+
+
+@router.delete("/api-keys/{key_id}")
+async def revoke_api_key(
+    key_id: str,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
+    db: Session = Depends(get_db)
+):
+    """Revoke an API key."""
+    try:
+        revoked = await run_in_threadpool(
+            APIKeyService.revoke_key, str(current_tenant.id), key_id, db
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="API key could not be revoked, please retry"
+        )
+    if not revoked:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API key not found"
+        )
+    AuditLogWriter.record(current_tenant.id, "api_key.revoked", "api_key", key_id)
+    
+    return {"status": "revoked"}
+
+
 def _create_token(
     tenant_id: str,
     expires_delta: timedelta,
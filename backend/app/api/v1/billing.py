@@ -2,7 +2,8 @@
 Billing API Endpoints - Subscriptions, Checkouts, and Payment Management.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
@@ -11,7 +12,10 @@ from app.database.session import get_db
 from app.database.models import Tenant, SubscriptionStatus, SubscriptionTier, BillingCycle
 from app.services.subscription_service import SubscriptionService
 from app.services.billing_service import BillingService
-from app.utils.auth import get_current_tenant
+from app.integrations.stripe_gateway import StripeGateway, StripeGatewayTimeout
+from app.services.audit_service import AuditLogWriter
+from app.utils.auth import get_current_tenant, get_current_tenant_snapshot, TenantSnapshot
+from app.utils.cache import ResponseCache, CacheTag
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
@@ -20,6 +24,7 @@ class CheckoutSessionRequest(BaseModel):
     """Request to create checkout session."""
     tier: str  # starter, growth, enterprise
     billing_cycle: str = "monthly"  # monthly or yearly
+    promotion_code: Optional[str] = None
 
 
 class CheckoutSessionResponse(BaseModel):
@@ -80,20 +85,31 @@ async def create_checkout_session(
     try:
         # Create Stripe customer if needed
         if not current_tenant.stripe_customer_id:
-            stripe_customer_id = BillingService.create_customer(current_tenant)
+            stripe_customer_id = await StripeGateway.run(
+                BillingService.create_customer,
+                current_tenant
+            )
             current_tenant.stripe_customer_id = stripe_customer_id
             db.add(current_tenant)
-            db.commit()
+            await run_in_threadpool(db.commit)
         
         # Create checkout session
-        result = BillingService.create_checkout_session(
+        result = await StripeGateway.run(
+            BillingService.create_checkout_session,
             tenant=current_tenant,
             tier=request.tier,
-            billing_cycle=request.billing_cycle
+            billing_cycle=request.billing_cycle,
+            promotion_code=request.promotion_code
         )
         
         return CheckoutSessionResponse(**result)
     
+    except StripeGatewayTimeout as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e)
+        )
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -105,6 +121,7 @@ async def create_checkout_session(
 async def create_domain_purchase_intent(
     domain_name: str,
     domain_price: float,  # in USD
+    purchase_id: str,
     current_tenant: Tenant = Depends(get_current_tenant),
     db: Session = Depends(get_db)
 ):
@@ -121,6 +138,8 @@ async def create_domain_purchase_intent(
     Args:
         domain_name: Domain to purchase (e.g., "acme-corp.com")
         domain_price: Price in USD (e.g., 12.00)
+        purchase_id: Client-generated id of this purchase (e.g. a UUID);
+            resend it when retrying, use a new one for a new purchase
     
     Returns:
         client_secret for Stripe.js confirmation
@@ -129,15 +148,33 @@ async def create_domain_purchase_intent(
         # Convert USD to cents
         amount_cents = int(domain_price * 100)
         
-        result = BillingService.charge_for_domain(
+        # Only the Stripe call runs on the Stripe pool: after a timeout it may
+        # still be running when this request's session is closed
+        result = await StripeGateway.run(
+            BillingService.charge_for_domain,
             tenant=current_tenant,
             domain_name=domain_name,
             amount_cents=amount_cents,
-            db=db
+            purchase_id=purchase_id
+        )
+        
+        await run_in_threadpool(
+            BillingService.record_domain_charge,
+            current_tenant.id,
+            domain_name,
+            amount_cents,
+            result["payment_intent_id"],
+            db
         )
         
         return result
     
+    except StripeGatewayTimeout as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e)
+        )
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -147,7 +184,8 @@ async def create_domain_purchase_intent(
 
 @router.get("/usage")
 async def get_usage_stats(
-    current_tenant: Tenant = Depends(get_current_tenant),
+    request: Request,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ) -> UsageStatsResponse:
     """
@@ -176,8 +214,18 @@ async def get_usage_stats(
     }
     ```
     """
-    usage = SubscriptionService.get_usage_stats(current_tenant, db)
-    return UsageStatsResponse(**usage)
+    def build():
+        tenant = db.get(Tenant, current_tenant.id)
+        usage = SubscriptionService.get_usage_stats(tenant, db)
+        return UsageStatsResponse(**usage)
+    
+    return await run_in_threadpool(
+        ResponseCache.get_or_build,
+        request,
+        current_tenant.id,
+        tags=[CacheTag.DOMAINS, CacheTag.INBOXES, CacheTag.TENANT],
+        builder=build,
+    )
 
 
 @router.get("/subscription")
@@ -218,7 +266,8 @@ async def upgrade_subscription(
             raise ValueError("Invalid tier")
         
         # Upgrade
-        updated = SubscriptionService.upgrade_subscription(
+        updated = await run_in_threadpool(
+            SubscriptionService.upgrade_subscription,
             tenant=current_tenant,
             new_tier=new_tier_enum,
             billing_cycle=BillingCycle.MONTHLY,
@@ -226,6 +275,11 @@ async def upgrade_subscription(
             db=db
         )
         
+        AuditLogWriter.record(
+            current_tenant.id, "subscription.upgraded", "tenant", current_tenant.id,
+            {"tier": new_tier_enum.value}
+        )
+        
         return {"status": "upgraded", "tier": updated.subscription_tier}
     
     except Exception as e:
@@ -248,12 +302,18 @@ async def cancel_subscription(
         at_period_end: If true, cancel at next billing date; if false, immediate
     """
     try:
-        SubscriptionService.cancel_subscription(
+        await run_in_threadpool(
+            SubscriptionService.cancel_subscription,
             tenant=current_tenant,
             cancel_at_period_end=at_period_end,
             db=db
         )
         
+        AuditLogWriter.record(
+            current_tenant.id, "subscription.cancelled", "tenant", current_tenant.id,
+            {"at_period_end": at_period_end}
+        )
+        
         return {"status": "cancelled"}
     
     except Exception as e:
@@ -2,8 +2,9 @@
 Domain Management API Endpoints.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.background import BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List
@@ -12,7 +13,10 @@ from app.database.session import get_db
 from app.database.models import Tenant
 from app.services.domain_service import DomainService
 from app.services.provisioning_service import ProvisioningService
-from app.utils.auth import get_current_tenant
+from app.services.purge_service import PurgeService
+from app.services.audit_service import AuditLogWriter
+from app.utils.auth import get_current_tenant, get_current_tenant_snapshot, TenantSnapshot
+from app.utils.cache import ResponseCache, CacheTag
 
 router = APIRouter(prefix="/domains", tags=["Domains"])
 
@@ -65,7 +69,10 @@ async def search_domain(
     ```
     """
     try:
-        result = DomainService.search_domain_availability(request.domain_name)
+        result = await run_in_threadpool(
+            DomainService.search_domain_availability,
+            request.domain_name
+        )
         return DomainSearchResponse(**result)
     
     except Exception as e:
@@ -116,7 +123,11 @@ async def purchase_domain(
     """
     try:
         # Check plan limits
-        can_create, error = SubscriptionService.can_create_domain(current_tenant, db)
+        can_create, error = await run_in_threadpool(
+            SubscriptionService.can_create_domain,
+            current_tenant,
+            db
+        )
         if not can_create:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -124,12 +135,18 @@ async def purchase_domain(
             )
         
         # Purchase domain
-        domain = DomainService.purchase_domain(
+        domain = await run_in_threadpool(
+            DomainService.purchase_domain,
             tenant=current_tenant,
             domain_name=request.domain_name,
             db=db
         )
         
+        AuditLogWriter.record(
+            current_tenant.id, "domain.purchased", "domain", domain.id,
+            {"domain_name": domain.domain_name}
+        )
+        
         # Queue DNS configuration as background task
         background_tasks.add_task(
             DomainService.configure_dns,
@@ -153,12 +170,14 @@ async def purchase_domain(
 
 @router.get("/")
 async def list_domains(
-    current_tenant: Tenant = Depends(get_current_tenant),
+    request: Request,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
     """List all domains for tenant."""
-    try:
+    def build():
         domains = DomainService.list_domains_for_tenant(str(current_tenant.id), db)
+        inbox_counts = DomainService.count_inboxes_by_domain(str(current_tenant.id), db)
         
         return [
             {
@@ -166,13 +185,22 @@ async def list_domains(
                 "domain_name": d.domain_name,
                 "status": d.status,
                 "dns_verified": d.dns_verified_at is not None,
-                "inboxes_count": len(d.inboxes),
+                "inboxes_count": inbox_counts.get(d.id, 0),
                 "purchase_date": d.purchase_date,
                 "expiry_date": d.expiry_date,
             }
             for d in domains
         ]
     
+    try:
+        return await run_in_threadpool(
+            ResponseCache.get_or_build,
+            request,
+            current_tenant.id,
+            tags=[CacheTag.DOMAINS, CacheTag.INBOXES],
+            builder=build,
+        )
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -183,19 +211,19 @@ async def list_domains(
 @router.get("/{domain_id}")
 async def get_domain(
     domain_id: str,
-    current_tenant: Tenant = Depends(get_current_tenant),
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
     """Get domain details."""
     try:
-        domain = DomainService.get_domain_by_id(domain_id, db)
+        domain = await run_in_threadpool(DomainService.get_domain_by_id, domain_id, db)
         if not domain or domain.tenant_id != current_tenant.id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Domain not found"
             )
         
-        health = DomainService.get_domain_health(domain)
+        health = await run_in_threadpool(DomainService.get_domain_health, domain, db)
         return health
     
     except HTTPException:
@@ -211,24 +239,32 @@ async def get_domain(
 async def suspend_domain(
     domain_id: str,
     reason: str,
-    current_tenant: Tenant = Depends(get_current_tenant),
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
     """Suspend a domain (anti-abuse)."""
     try:
-        domain = DomainService.get_domain_by_id(domain_id, db)
+        domain = await run_in_threadpool(DomainService.get_domain_by_id, domain_id, db)
         if not domain or domain.tenant_id != current_tenant.id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Domain not found"
             )
         
-        DomainService.suspend_domain(domain, reason, db)
+        await run_in_threadpool(DomainService.suspend_domain, domain, reason, db)
+        AuditLogWriter.record(
+            current_tenant.id, "domain.suspended", "domain", domain_id, {"reason": reason}
+        )
         
         return {"status": "suspended"}
     
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -236,29 +272,38 @@ async def suspend_domain(
         )
 
 
-@router.delete("/{domain_id}")
+@router.delete("/{domain_id}", status_code=status.HTTP_202_ACCEPTED)
 async def delete_domain(
     domain_id: str,
-    current_tenant: Tenant = Depends(get_current_tenant),
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
-    """Delete a domain."""
+    """
+    Delete a domain and all its inboxes.
+    
+    Mail stops immediately; rows, KumoMTA records and the Cloudflare zone
+    are removed in the background. Poll `/domains/{domain_id}/deletion`
+    for progress.
+    """
     try:
-        domain = DomainService.get_domain_by_id(domain_id, db)
+        domain = await run_in_threadpool(DomainService.get_domain_by_id, domain_id, db)
         if not domain or domain.tenant_id != current_tenant.id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Domain not found"
             )
         
-        success = DomainService.delete_domain(domain_id, db)
-        if not success:
+        inboxes = await run_in_threadpool(DomainService.delete_domain, domain_id, db)
+        if inboxes is None:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to delete domain"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Domain not found"
             )
+        AuditLogWriter.record(
+            current_tenant.id, "domain.deleted", "domain", domain_id, {"inboxes": inboxes}
+        )
         
-        return {"status": "deleted"}
+        return {"status": "deleting", "inboxes_queued": inboxes}
     
     except HTTPException:
         raise
@@ -271,3 +316,18 @@ async def delete_domain(
 
 # Import SubscriptionService for limit checking
 from app.services.subscription_service import SubscriptionService
+
+
+@router.get("/{domain_id}/deletion")
+async def get_deletion_progress(
+    domain_id: str,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot)
+):
+    """Progress of a domain deletion (`purging` until every row is gone, then `purged`)."""
+    progress = await run_in_threadpool(PurgeService.get_progress, current_tenant.id, domain_id)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No deletion in progress for this domain"
+        )
+    return progress
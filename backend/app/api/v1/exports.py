@@ -0,0 +1,86 @@
+"""
+Bulk Export API Endpoints - Columnar (Arrow IPC / Parquet) data exports.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Optional
+
+from app.services.export_service import ExportService, ExportFormat
+from app.utils.auth import get_current_tenant_snapshot, TenantSnapshot
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+@router.get("/{dataset}/columns")
+async def list_export_columns(
+    dataset: str,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot)
+):
+    """List the columns available for a dataset export."""
+    if dataset not in ExportService.DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown dataset: {dataset}"
+        )
+    
+    return {
+        "dataset": dataset,
+        "columns": ExportService.available_columns(dataset),
+    }
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: ExportFormat = ExportFormat.PARQUET,
+    columns: Optional[str] = Query(default=None, description="Comma-separated column names"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot)
+):
+    """
+    Stream a tenant dataset as Arrow IPC stream or Parquet.
+    
+    Datasets: `inboxes`, `transactions`, `audit-logs`.
+    
+    Rows are read from a server-side cursor and written in column batches,
+    so exports of millions of rows run with bounded memory. Filters apply
+    to `created_at` (`start_date` inclusive, `end_date` exclusive).
+    
+    Example:
+    ```
+    GET /exports/transactions?format=parquet&columns=id,amount,status,created_at&start_date=2024-01-01
+    ```
+    """
+    if dataset not in ExportService.DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown dataset: {dataset}"
+        )
+    
+    try:
+        selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+        selected = ExportService.resolve_columns(dataset, selected)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    stream = ExportService.stream_export(
+        tenant_id=str(current_tenant.id),
+        dataset=dataset,
+        export_format=format,
+        columns=selected,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    
+    filename = f"{dataset}_{datetime.utcnow():%Y%m%d%H%M%S}.{ExportService.FILE_EXTENSIONS[format]}"
+    return StreamingResponse(
+        stream,
+        media_type=ExportService.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -3,19 +3,24 @@ Infrastructure Provisioning API - The "Magic Button"
 Generate and deploy SMTP inboxes in seconds.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, File, UploadFile
 from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from uuid import UUID
 import io
 
 from app.database.session import get_db
-from app.database.models import Tenant, Inbox
+from app.database.models import Tenant, Inbox, InboxStatus
 from app.services.provisioning_service import ProvisioningService
+from app.services.audit_service import AuditLogWriter
 from app.services.subscription_service import SubscriptionService
 from app.services.domain_service import DomainService
-from app.utils.auth import get_current_tenant
+from app.utils.auth import get_current_tenant, get_current_tenant_snapshot, TenantSnapshot
+from app.utils.cache import ResponseCache, CacheTag
+from app.utils.pagination import decode_cursor
 
 router = APIRouter(prefix="/infrastructure", tags=["Infrastructure"])
 
@@ -37,6 +42,25 @@ class InboxCredentials(BaseModel):
     smtp_tls: bool
 
 
+class BulkInboxFilters(BaseModel):
+    """Select inboxes for a bulk operation (same filters as the listing)."""
+    domain_id: Optional[UUID] = None
+    status: Optional[InboxStatus] = None
+    min_health: Optional[float] = Field(None, ge=0, le=100)
+    max_health: Optional[float] = Field(None, ge=0, le=100)
+    warmup_stage: Optional[int] = Field(None, ge=0, le=10)
+    is_blacklisted: Optional[bool] = None
+
+
+class BulkInboxRequest(BaseModel):
+    """Bulk inbox operation on explicit ids or a filter."""
+    action: Literal["suspend", "resume", "delete", "update_limits"]
+    inbox_ids: Optional[List[UUID]] = Field(None, max_length=ProvisioningService.MAX_BULK_INBOXES)
+    filters: Optional[BulkInboxFilters] = None
+    reason: Optional[str] = None  # suspend
+    daily_limit: Optional[int] = Field(None, ge=0, le=ProvisioningService.MAX_DAILY_LIMIT)  # update_limits
+
+
 @router.post("/provision", status_code=status.HTTP_201_CREATED)
 async def provision_inboxes(
     request: ProvisionInboxesRequest,
@@ -78,13 +102,18 @@ async def provision_inboxes(
         422: Invalid request
     """
     try:
-        result = ProvisioningService.provision_inboxes(
+        result = await run_in_threadpool(
+            ProvisioningService.provision_inboxes,
             tenant_id=str(current_tenant.id),
             domain_id=request.domain_id,
             inbox_count=request.inbox_count,
             naming_convention=request.naming_convention,
             db=db
         )
+        AuditLogWriter.record(
+            current_tenant.id, "inbox.provisioned", "domain", request.domain_id,
+            {"inbox_count": request.inbox_count}
+        )
         
         return result
     
@@ -115,8 +144,8 @@ async def download_inboxes_csv(
     ```
     """
     try:
-        inboxes = ProvisioningService.list_inboxes_for_tenant(
-            str(current_tenant.id), db
+        inboxes = await run_in_threadpool(
+            ProvisioningService.list_inboxes_for_tenant, str(current_tenant.id), db
         )
         
         # Build CSV
@@ -159,32 +188,106 @@ async def download_inboxes_csv(
 
 @router.get("/inboxes")
 async def list_inboxes(
-    domain_id: Optional[str] = None,
-    current_tenant: Tenant = Depends(get_current_tenant),
+    request: Request,
+    domain_id: Optional[UUID] = None,
+    inbox_status: Optional[InboxStatus] = Query(None, alias="status"),
+    min_health: Optional[float] = Query(None, ge=0, le=100),
+    max_health: Optional[float] = Query(None, ge=0, le=100),
+    warmup_stage: Optional[int] = Query(None, ge=0, le=10),
+    is_blacklisted: Optional[bool] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
-    """List all inboxes for tenant (optionally filtered by domain)."""
+    """
+    List the tenant's inboxes, newest first, one page at a time.
+    
+    Filters: `domain_id`, `status`, `min_health`/`max_health`,
+    `warmup_stage`, `is_blacklisted`. Pass `next_cursor` from the previous
+    response as `cursor` to get the next page (null on the last page).
+    """
+    after = decode_cursor(cursor)
+    
+    def build():
+        return ProvisioningService.list_inboxes_page(
+            str(current_tenant.id),
+            db,
+            limit=limit,
+            after=after,
+            domain_id=domain_id,
+            status=inbox_status,
+            min_health=min_health,
+            max_health=max_health,
+            warmup_stage=warmup_stage,
+            is_blacklisted=is_blacklisted,
+        )
+    
     try:
-        if domain_id:
-            inboxes = ProvisioningService.list_inboxes_for_domain(domain_id, db)
-        else:
-            inboxes = ProvisioningService.list_inboxes_for_tenant(
-                str(current_tenant.id), db
-            )
-        
-        return [
+        return await run_in_threadpool(
+            ResponseCache.get_or_build,
+            request,
+            current_tenant.id,
+            tags=[CacheTag.INBOXES],
+            builder=build,
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/inboxes/bulk")
+async def bulk_inbox_operation(
+    request: BulkInboxRequest,
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
+    db: Session = Depends(get_db)
+):
+    """
+    Suspend, resume, delete or update the daily limit of many inboxes.
+    
+    Target up to 5000 inboxes with either `inbox_ids` or `filters`:
+    ```json
+    {"action": "suspend", "filters": {"max_health": 20}, "reason": "Low health"}
+    {"action": "update_limits", "inbox_ids": ["uuid...", "..."], "daily_limit": 80}
+    ```
+    
+    Changes are applied in chunks with set-based statements and mirrored
+    to KumoMTA in batches. `daily_limit` is capped per inbox by its warmup
+    stage (40 at stage 0, up to 200 when fully warmed). Resuming only reactivates inboxes suspended
+    through this endpoint: inboxes suspended by the platform or on
+    suspended domains stay off.
+    """
+    try:
+        result = await run_in_threadpool(
+            ProvisioningService.bulk_inbox_operation,
+            str(current_tenant.id),
+            request.action,
+            db,
+            inbox_ids=request.inbox_ids,
+            filters=request.filters.model_dump(exclude_none=True) if request.filters else None,
+            reason=request.reason,
+            daily_limit=request.daily_limit,
+        )
+        AuditLogWriter.record(
+            current_tenant.id, f"inbox.bulk_{request.action}", "inbox", None,
             {
-                "id": str(inbox.id),
-                "email": inbox.full_email,
-                "status": inbox.status,
-                "health_score": inbox.health_score,
-                "warmup_stage": inbox.warmup_stage,
-                "emails_sent_today": inbox.emails_sent_today,
-                "emails_sent_this_month": inbox.emails_sent_this_month,
+                **result,
+                "inbox_ids": [str(inbox_id) for inbox_id in request.inbox_ids or []],
+                "filters": request.filters.model_dump(mode="json", exclude_none=True) if request.filters else None,
+                "reason": request.reason,
+                "daily_limit": request.daily_limit,
             }
-            for inbox in inboxes
-        ]
+        )
+        return result
     
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -195,12 +298,12 @@ async def list_inboxes(
 @router.get("/inboxes/{inbox_id}/credentials")
 async def get_inbox_credentials(
     inbox_id: str,
-    current_tenant: Tenant = Depends(get_current_tenant),
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ) -> InboxCredentials:
     """Get SMTP credentials for a specific inbox."""
     try:
-        creds = ProvisioningService.get_inbox_credentials(inbox_id, db)
+        creds = await run_in_threadpool(ProvisioningService.get_inbox_credentials, inbox_id, db)
         return InboxCredentials(**creds)
     
     except ValueError as e:
@@ -219,7 +322,7 @@ async def get_inbox_credentials(
 async def suspend_inbox(
     inbox_id: str,
     reason: str,
-    current_tenant: Tenant = Depends(get_current_tenant),
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
     """
@@ -228,7 +331,10 @@ async def suspend_inbox(
     Once suspended, KumoMTA will reject SMTP attempts.
     """
     try:
-        ProvisioningService.suspend_inbox(inbox_id, reason, db)
+        await run_in_threadpool(ProvisioningService.suspend_inbox, inbox_id, reason, db)
+        AuditLogWriter.record(
+            current_tenant.id, "inbox.suspended", "inbox", inbox_id, {"reason": reason}
+        )
         return {"status": "suspended"}
     
     except Exception as e:
@@ -241,19 +347,24 @@ async def suspend_inbox(
 @router.delete("/inboxes/{inbox_id}")
 async def delete_inbox(
     inbox_id: str,
-    current_tenant: Tenant = Depends(get_current_tenant),
+    current_tenant: TenantSnapshot = Depends(get_current_tenant_snapshot),
     db: Session = Depends(get_db)
 ):
     """Delete an inbox."""
     try:
-        success = ProvisioningService.delete_inbox(inbox_id, db)
+        success = await run_in_threadpool(
+            ProvisioningService.delete_inbox, inbox_id, str(current_tenant.id), db
+        )
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Inbox not found"
             )
+        AuditLogWriter.record(current_tenant.id, "inbox.deleted", "inbox", inbox_id)
         return {"status": "deleted"}
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
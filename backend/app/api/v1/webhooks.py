@@ -0,0 +1,153 @@
+"""
+Webhook Endpoints - Delivery feedback from KumoMTA and Stripe events.
+"""
+
+import logging
+import secrets
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.session import get_db
+from app.services.abuse_service import AbuseSignalEngine
+from app.services.metering_service import UsageMeter
+from app.services.stripe_event_service import StripeEventQueue
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+
+# KumoMTA log record type -> abuse signal
+KUMO_SIGNALS = {
+    "Feedback": "spam_complaint",
+    "Bounce": "hard_bounce",
+}
+
+
+@router.post("/kumo")
+async def kumo_log_hook(
+    records: Union[Dict[str, Any], List[Dict[str, Any]]] = Body(...),
+    x_webhook_secret: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Receive KumoMTA log hook records (single record or batch).
+
+    Complaints (`Feedback`) and permanent failures (`Bounce`) feed the
+    abuse-signal counters of the sending tenant and domain; crossing a
+    threshold suspends them immediately. Deliveries are metered as emails
+    sent and are the volume bounce rates are measured against. Other
+    record types are ignored.
+
+    Authenticated with the shared `X-Webhook-Secret` header.
+    """
+    if not settings.KUMO_WEBHOOK_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook not configured"
+        )
+
+    if not x_webhook_secret or not secrets.compare_digest(
+        x_webhook_secret, settings.KUMO_WEBHOOK_SECRET
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook secret"
+        )
+
+    if isinstance(records, dict):
+        records = [records]
+
+    try:
+        return await run_in_threadpool(_ingest_kumo_records, records, db)
+
+    except Exception as e:
+        logger.error(f"KumoMTA webhook processing failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Webhook processing failed"
+        )
+
+
+@router.post("/stripe")
+async def stripe_webhook(
+    request: Request,
+    stripe_signature: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Receive a Stripe event.
+
+    The event is verified and stored, then acknowledged; a worker applies
+    it in order with the customer's other events. Redeliveries of an
+    event id already received are acknowledged without being stored again.
+    """
+    payload = await request.body()
+
+    try:
+        event = await run_in_threadpool(StripeEventQueue.verify, payload, stripe_signature or "")
+    except ValueError as e:
+        logger.warning(f"Rejected Stripe webhook: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid signature"
+        )
+
+    try:
+        created = await run_in_threadpool(StripeEventQueue.ingest, event, db)
+
+    except Exception as e:
+        # Stripe retries non-2xx deliveries
+        logger.error(f"Stripe webhook ingestion failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Webhook processing failed"
+        )
+
+    return {"received": True, "duplicate": not created}
+
+
+def _ingest_kumo_records(records: List[Dict[str, Any]], db: Session) -> Dict[str, Any]:
+    """Feed complaint and bounce records to the abuse engine, meter deliveries."""
+    processed = 0
+    suspensions = []
+    delivered: Dict[str, int] = {}
+    delivered_by_domain: Dict[Tuple[Any, Any], int] = {}
+
+    for record in records:
+        record_type = record.get("type")
+        signal = KUMO_SIGNALS.get(record_type)
+        sender = record.get("sender") or ""
+        if (not signal and record_type != "Delivery") or "@" not in sender:
+            continue
+
+        owner = AbuseSignalEngine.resolve_domain(sender.rsplit("@", 1)[1], db)
+        if owner is None:
+            continue
+
+        domain_id, tenant_id = owner
+        if not signal:
+            delivered[str(tenant_id)] = delivered.get(str(tenant_id), 0) + 1
+            delivered_by_domain[(tenant_id, domain_id)] = (
+                delivered_by_domain.get((tenant_id, domain_id), 0) + 1
+            )
+            continue
+
+        suspensions.extend(AbuseSignalEngine.record(
+            signal,
+            tenant_id,
+            domain_id=domain_id,
+            details={"sender": sender, "recipient": record.get("recipient")},
+            db=db,
+        ))
+        processed += 1
+
+    if delivered:
+        UsageMeter.record_many("emails_sent", delivered)
+        # Bounce rates are measured against this volume
+        AbuseSignalEngine.record_deliveries(delivered_by_domain)
+
+    return {"processed": processed, "delivered": sum(delivered.values()), "suspensions": suspensions}
@@ -32,26 +32,90 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRY_MINUTES: int = 1440  # 24 hours
     JWT_REFRESH_EXPIRY_DAYS: int = 7
+    AUTH_TOKEN_CACHE_TTL: int = Field(default=300, env="AUTH_TOKEN_CACHE_TTL")  # Verified JWT payloads
+    AUTH_TENANT_CACHE_TTL: int = Field(default=30, env="AUTH_TENANT_CACHE_TTL")  # Tenant snapshots
+    API_KEY_NEGATIVE_CACHE_TTL: int = Field(default=60, env="API_KEY_NEGATIVE_CACHE_TTL")  # Unknown keys
+    API_KEY_USAGE_FLUSH_SECONDS: float = Field(default=5.0, env="API_KEY_USAGE_FLUSH_SECONDS")
+    API_CALL_FLUSH_SECONDS: float = Field(default=10.0, env="API_CALL_FLUSH_SECONDS")
+    # Usage metering: flush of aggregated usage, Stripe overage reporting
+    USAGE_FLUSH_SECONDS: float = Field(default=10.0, env="USAGE_FLUSH_SECONDS")
+    USAGE_REPORT_SECONDS: int = Field(default=300, env="USAGE_REPORT_SECONDS")
+    USAGE_REPORT_BATCH_SIZE: int = Field(default=100, env="USAGE_REPORT_BATCH_SIZE")
+    AUDIT_QUEUE_SIZE: int = Field(default=10000, env="AUDIT_QUEUE_SIZE")
+    AUDIT_BATCH_SIZE: int = Field(default=500, env="AUDIT_BATCH_SIZE")
+    AUDIT_FLUSH_INTERVAL_MS: int = Field(default=200, env="AUDIT_FLUSH_INTERVAL_MS")
+    
+    # Day/month rollover of inbox send counters
+    USAGE_RESET_CHECK_SECONDS: int = Field(default=300, env="USAGE_RESET_CHECK_SECONDS")
+    USAGE_RESET_CHUNK_SIZE: int = Field(default=5000, env="USAGE_RESET_CHUNK_SIZE")
+    
+    # Refresh of the stored per-tenant inbox health shown in admin listings
+    ADMIN_STATS_REFRESH_SECONDS: int = Field(default=300, env="ADMIN_STATS_REFRESH_SECONDS")
+    
+    # Background purge of deleted domains and inboxes
+    PURGE_INTERVAL_SECONDS: int = Field(default=30, env="PURGE_INTERVAL_SECONDS")
+    PURGE_CHUNK_SIZE: int = Field(default=1000, env="PURGE_CHUNK_SIZE")
+    
+    # Flag statements run more often than this within one request (N+1)
+    QUERY_REPEAT_THRESHOLD: int = Field(default=10, env="QUERY_REPEAT_THRESHOLD")
     CORS_ORIGINS: list[str] = Field(
         default=["http://localhost:3000", "http://localhost:5173"],
         env="CORS_ORIGINS"
     )
+    # Platform operators: comma-separated tenant ids (see admin_tenant_ids)
+    ADMIN_TENANT_IDS: str = Field(default="", env="ADMIN_TENANT_IDS")
     
     # Database
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
     DATABASE_POOL_SIZE: int = Field(default=20, env="DATABASE_POOL_SIZE")
     DATABASE_MAX_OVERFLOW: int = Field(default=10, env="DATABASE_MAX_OVERFLOW")
+    DATABASE_POOL_TIMEOUT: int = Field(default=10, env="DATABASE_POOL_TIMEOUT")  # Wait for a pooled connection
+    DATABASE_POOL_RECYCLE: int = Field(default=1800, env="DATABASE_POOL_RECYCLE")  # Max connection age
+    DATABASE_POOL_PRE_PING: bool = Field(default=True, env="DATABASE_POOL_PRE_PING")
+    DATABASE_CONNECT_TIMEOUT: int = Field(default=5, env="DATABASE_CONNECT_TIMEOUT")
+    DATABASE_READ_REPLICA_URL: Optional[str] = Field(default=None, env="DATABASE_READ_REPLICA_URL")
     DATABASE_ECHO: bool = Field(default=False, env="DATABASE_ECHO")
     
+    # Partitioning (transaction_history, audit_logs)
+    PARTITION_MONTHS_AHEAD: int = Field(default=3, env="PARTITION_MONTHS_AHEAD")
+    PARTITION_MAINTENANCE_SECONDS: int = Field(default=21600, env="PARTITION_MAINTENANCE_SECONDS")
+    PARTITION_ARCHIVE_SCHEMA: str = Field(default="archive", env="PARTITION_ARCHIVE_SCHEMA")
+    TRANSACTION_RETENTION_MONTHS: int = Field(default=0, env="TRANSACTION_RETENTION_MONTHS")  # 0 = keep
+    AUDIT_LOG_RETENTION_MONTHS: int = Field(default=24, env="AUDIT_LOG_RETENTION_MONTHS")
+    
     # Redis
     REDIS_URL: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
     REDIS_CACHE_TTL: int = Field(default=3600, env="REDIS_CACHE_TTL")  # 1 hour
     
+    # Bulk Export
+    EXPORT_BATCH_SIZE: int = Field(default=50000, env="EXPORT_BATCH_SIZE")
+    
     # Stripe Configuration
     STRIPE_API_KEY: str = Field(..., env="STRIPE_API_KEY")
     STRIPE_WEBHOOK_SECRET: str = Field(..., env="STRIPE_WEBHOOK_SECRET")
     STRIPE_TAX_RATE_ID: Optional[str] = Field(default=None, env="STRIPE_TAX_RATE_ID")
     
+    # Stripe client: HTTP timeout per attempt, deadline per call incl. retries,
+    # dedicated worker threads, SDK network retries, rate-limit (429) retries
+    STRIPE_TIMEOUT_SECONDS: float = Field(default=10.0, env="STRIPE_TIMEOUT_SECONDS")
+    STRIPE_CALL_TIMEOUT_SECONDS: float = Field(default=30.0, env="STRIPE_CALL_TIMEOUT_SECONDS")
+    STRIPE_MAX_CONCURRENCY: int = Field(default=8, env="STRIPE_MAX_CONCURRENCY")
+    STRIPE_NETWORK_RETRIES: int = Field(default=2, env="STRIPE_NETWORK_RETRIES")
+    STRIPE_RATE_LIMIT_RETRIES: int = Field(default=3, env="STRIPE_RATE_LIMIT_RETRIES")
+    
+    # Cached Stripe objects (dropped on the matching webhook; TTL is a backstop):
+    # subscriptions, and catalog objects (prices, promotion codes)
+    STRIPE_OBJECT_CACHE_TTL: int = Field(default=3600, env="STRIPE_OBJECT_CACHE_TTL")
+    STRIPE_CATALOG_CACHE_TTL: int = Field(default=86400, env="STRIPE_CATALOG_CACHE_TTL")
+    
+    # Metered price for inboxes beyond the plan limit (usage reporting is off without it)
+    STRIPE_OVERAGE_PRICE_ID: Optional[str] = Field(default=None, env="STRIPE_OVERAGE_PRICE_ID")
+    
+    # Stripe webhook queue: worker poll interval, customers per pass, retries
+    STRIPE_EVENT_POLL_SECONDS: float = Field(default=1.0, env="STRIPE_EVENT_POLL_SECONDS")
+    STRIPE_EVENT_BATCH_SIZE: int = Field(default=50, env="STRIPE_EVENT_BATCH_SIZE")
+    STRIPE_EVENT_MAX_ATTEMPTS: int = Field(default=5, env="STRIPE_EVENT_MAX_ATTEMPTS")
+    
     # Trial Configuration
     TRIAL_DAYS: int = Field(default=7, env="TRIAL_DAYS")
     TRIAL_INBOX_LIMIT: int = Field(default=5, env="TRIAL_INBOX_LIMIT")
@@ -61,6 +125,7 @@ class Settings(BaseSettings):
     STARTER_PRICE: int = Field(default=9700, env="STARTER_PRICE")  # $97.00
     GROWTH_PRICE: int = Field(default=29700, env="GROWTH_PRICE")    # $297.00
     ENTERPRISE_PRICE: int = Field(default=99700, env="ENTERPRISE_PRICE")  # $997.00
+    INBOX_OVERAGE_PRICE: int = Field(default=100, env="INBOX_OVERAGE_PRICE")  # $1.00 per inbox beyond the limit
     
     # Plan Limits
     STARTER_DOMAINS: int = Field(default=10, env="STARTER_DOMAINS")
@@ -84,6 +149,7 @@ class Settings(BaseSettings):
     KUMO_HOST: str = Field(default="localhost", env="KUMO_HOST")
     KUMO_USERNAME: str = Field(..., env="KUMO_USERNAME")
     KUMO_PASSWORD: str = Field(..., env="KUMO_PASSWORD")
+    KUMO_WEBHOOK_SECRET: Optional[str] = Field(default=None, env="KUMO_WEBHOOK_SECRET")
     
     # Email Configuration
     MAIL_FROM: str = Field(default="noreply@inboxgrove.com", env="MAIL_FROM")
@@ -133,6 +199,23 @@ class Settings(BaseSettings):
         if isinstance(v, str):
             return [origin.strip() for origin in v.split(",")]
         return v
+    
+    @validator("DATABASE_POOL_SIZE", "DATABASE_POOL_TIMEOUT", "DATABASE_CONNECT_TIMEOUT")
+    def validate_positive(cls, v):
+        if v < 1:
+            raise ValueError("must be at least 1")
+        return v
+    
+    @validator("DATABASE_MAX_OVERFLOW", "DATABASE_POOL_RECYCLE")
+    def validate_non_negative(cls, v):
+        if v < 0:
+            raise ValueError("must not be negative")
+        return v
+    
+    @property
+    def admin_tenant_ids(self) -> set[str]:
+        """Parsed ADMIN_TENANT_IDS."""
+        return {tenant_id.strip() for tenant_id in self.ADMIN_TENANT_IDS.split(",") if tenant_id.strip()}
 
 
 @lru_cache()
@@ -6,8 +6,8 @@ Complete data schema for multi-tenant SaaS with subscriptions, domains, and infr
 from datetime import datetime, timedelta
 from enum import Enum
 from sqlalchemy import (
-    Column, String, Integer, Float, DateTime, Boolean, ForeignKey, 
-    Text, JSON, Enum as SQLEnum, Numeric, UniqueConstraint, Index
+    Column, String, Integer, Float, Date, DateTime, Boolean, ForeignKey, 
+    Text, JSON, Enum as SQLEnum, Numeric, UniqueConstraint, Index, text
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -49,6 +49,7 @@ class DomainStatus(str, Enum):
     ACTIVE = "active"
     SUSPENDED = "suspended"
     EXPIRED = "expired"
+    DELETED = "deleted"  # Purge pending (see PurgeService)
 
 
 class InboxStatus(str, Enum):
@@ -59,6 +60,14 @@ class InboxStatus(str, Enum):
     DELETED = "deleted"
 
 
+class SuspensionSource(str, Enum):
+    """Who suspended an inbox; each restore only undoes its own suspensions."""
+    TENANT = "tenant"  # The tenant itself (bulk suspend)
+    PLATFORM = "platform"  # Operators or abuse/health checks on the inbox
+    DOMAIN = "domain"  # Suspension of its domain
+    ACCOUNT = "account"  # Suspension of its tenant
+
+
 class TransactionType(str, Enum):
     """Types of financial transactions."""
     SUBSCRIPTION_CHARGE = "subscription_charge"
@@ -77,6 +86,10 @@ class Tenant(Base):
     __table_args__ = (
         Index("ix_tenants_email", "company_email"),
         Index("ix_tenants_stripe_customer_id", "stripe_customer_id"),
+        # Admin listings: keyset on (created_at, id), optionally per status
+        Index("ix_tenants_created_id", "created_at", "id"),
+        Index("ix_tenants_status_created", "subscription_status", "created_at", "id"),
+        Index("ix_tenants_trial_ends_at", "trial_ends_at"),
     )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -125,6 +138,11 @@ class Tenant(Base):
     domains_count = Column(Integer, default=0)
     inboxes_count = Column(Integer, default=0)
     api_calls_this_month = Column(Integer, default=0)
+    api_calls_period = Column(Date, nullable=True)  # UTC month api_calls_this_month counts
+    # Inbox health, refreshed periodically by AdminService.refresh_inbox_stats
+    active_inboxes_count = Column(Integer, default=0)
+    blacklisted_inboxes_count = Column(Integer, default=0)
+    avg_health_score = Column(Float, nullable=True)
     
     # Metadata
     metadata = Column(JSONB, default={})
@@ -189,6 +207,7 @@ class Domain(Base):
     __table_args__ = (
         Index("ix_domains_tenant_id", "tenant_id"),
         Index("ix_domains_status", "status"),
+        Index("ix_domains_domain_name", "domain_name"),  # Feedback -> owner lookup
         UniqueConstraint("tenant_id", "domain_name", name="uq_tenant_domain"),
     )
     
@@ -241,8 +260,17 @@ class Inbox(Base):
     """
     __tablename__ = "inboxes"
     __table_args__ = (
-        Index("ix_inboxes_tenant_id", "tenant_id"),
-        Index("ix_inboxes_domain_id", "domain_id"),
+        # Keyset listings on (created_at, id), per tenant, status or domain
+        Index("ix_inboxes_tenant_created", "tenant_id", "created_at", "id"),
+        Index("ix_inboxes_tenant_status_created", "tenant_id", "status", "created_at", "id"),
+        Index("ix_inboxes_domain_created", "domain_id", "created_at", "id"),
+        Index(
+            "ix_inboxes_tenant_blacklisted_created", "tenant_id", "created_at", "id",
+            postgresql_where=text("is_blacklisted")
+        ),
+        Index("ix_inboxes_tenant_warmup_created", "tenant_id", "warmup_stage", "created_at", "id"),
+        # Health is a range filter: rows matching it are read by health and top-N sorted
+        Index("ix_inboxes_tenant_health_created", "tenant_id", "health_score", "created_at", "id"),
         Index("ix_inboxes_status", "status"),
         UniqueConstraint("domain_id", "username", name="uq_domain_username"),
     )
@@ -256,6 +284,7 @@ class Inbox(Base):
     password = Column(String(255), nullable=False)  # hashed
     full_email = Column(String(255), nullable=False)  # username@domain
     status = Column(SQLEnum(InboxStatus), default=InboxStatus.ACTIVE)
+    suspended_by = Column(String(20), nullable=True)  # SuspensionSource value while SUSPENDED
     
     # SMTP Configuration
     smtp_host = Column(String(255), nullable=True)
@@ -289,6 +318,75 @@ class Inbox(Base):
     domain = relationship("Domain", back_populates="inboxes")
 
 
+class InboxUsageHistory(Base):
+    """
+    Per-inbox send counts of closed days and months.
+    
+    Written by SendCounterReset just before it zeroes the live counters on
+    Inbox. Kept after the inbox is deleted, hence no foreign key on it.
+    """
+    __tablename__ = "inbox_usage_history"
+    __table_args__ = (
+        UniqueConstraint("inbox_id", "period", "period_start", name="uq_inbox_usage_period"),
+        Index("ix_inbox_usage_tenant_period", "tenant_id", "period", "period_start"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    inbox_id = Column(UUID(as_uuid=True), nullable=False)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    
+    period = Column(String(10), nullable=False)  # day, month
+    period_start = Column(Date, nullable=False)
+    emails_sent = Column(Integer, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Usage(Base):
+    """
+    Metered usage of a tenant per billing period.
+    
+    Upserted by UsageMeter from in-memory aggregates; the inbox overage is
+    reported to Stripe by BillingService.report_overage_usage, which
+    records the quantity last sent in reported_overage.
+    """
+    __tablename__ = "usage"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "billing_period_start", name="uq_usage_tenant_period"),
+        # Reporter scan: periods whose overage Stripe has not seen yet
+        Index(
+            "ix_usage_unreported", "updated_at",
+            postgresql_where=text("inbox_overage <> reported_overage")
+        ),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    billing_period_start = Column(DateTime, nullable=False)
+    billing_period_end = Column(DateTime, nullable=False)
+    
+    # Usage metrics
+    inboxes_created = Column(Integer, nullable=False, default=0)
+    domains_added = Column(Integer, nullable=False, default=0)
+    emails_sent = Column(Integer, nullable=False, default=0)
+    api_calls = Column(Integer, nullable=False, default=0)
+    
+    # Overage charges (peak inboxes beyond the plan limit during the period)
+    inbox_overage = Column(Integer, nullable=False, default=0)
+    overage_charge = Column(Integer, nullable=False, default=0)  # In cents
+    
+    # Last inbox_overage reported to Stripe
+    reported_overage = Column(Integer, nullable=False, default=0)
+    reported_at = Column(DateTime, nullable=True)
+    
+    # Consecutive failed reports; the period is skipped until next_report_at
+    report_attempts = Column(Integer, nullable=False, default=0)
+    next_report_at = Column(DateTime, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class PaymentMethod(Base):
     """Stored payment methods for one-click domain purchasing."""
     __tablename__ = "payment_methods"
@@ -323,13 +421,17 @@ class TransactionHistory(Base):
     """
     Complete ledger of all financial transactions.
     Reconciliation source of truth.
+    
+    Range-partitioned by month on created_at (see PartitionManager), so
+    the partition key is part of the primary key.
     """
     __tablename__ = "transaction_history"
     __table_args__ = (
-        Index("ix_transaction_tenant_id", "tenant_id"),
+        Index("ix_transaction_tenant_created", "tenant_id", "created_at"),
         Index("ix_transaction_type", "transaction_type"),
         Index("ix_transaction_date", "created_at"),
         Index("ix_transaction_stripe_id", "stripe_transaction_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -355,7 +457,7 @@ class TransactionHistory(Base):
     related_data = Column(JSONB, default={})  # Extra context
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -400,9 +502,11 @@ class AuditLog(Base):
     """Compliance audit log for all important actions."""
     __tablename__ = "audit_logs"
     __table_args__ = (
-        Index("ix_audit_logs_tenant_id", "tenant_id"),
+        Index("ix_audit_logs_tenant_created", "tenant_id", "created_at"),
         Index("ix_audit_logs_action", "action"),
         Index("ix_audit_logs_date", "created_at"),
+        # Monthly range partitions on created_at (see PartitionManager)
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -421,13 +525,38 @@ class AuditLog(Base):
     user_agent = Column(Text, nullable=True)
     
     # Timestamp
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
     
     # Relationships
     tenant = relationship("Tenant", back_populates="audit_logs")
 
 
-# Create all tables on startup
-def init_db(engine):
-    """Initialize database with all models."""
-    Base.metadata.create_all(bind=engine)
+class StripeEvent(Base):
+    """
+    Raw Stripe webhook events, stored on receipt and applied by a worker.
+    
+    The Stripe event id is the primary key, so a redelivered event is
+    rejected by one index lookup.
+    """
+    __tablename__ = "stripe_events"
+    __table_args__ = (
+        # Worker scan: pending events in delivery order per customer
+        Index(
+            "ix_stripe_events_pending", "customer_id", "stripe_created", "received_at",
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
+    
+    id = Column(String(255), primary_key=True)  # evt_...
+    type = Column(String(100), nullable=False)
+    customer_id = Column(String(255), nullable=True)  # cus_..., None for account-level events
+    stripe_created = Column(DateTime, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    
+    # pending, processed, ignored, failed
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
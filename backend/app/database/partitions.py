@@ -0,0 +1,147 @@
+"""
+Monthly range partitions for append-only tables.
+
+transaction_history and audit_logs are partitioned by month on created_at.
+Maintenance keeps PARTITION_MONTHS_AHEAD future partitions in place, so
+inserts never hit a missing range, and detaches partitions older than a
+table's retention into the archive schema. Retention becomes a metadata
+operation instead of a bulk DELETE, and date-filtered queries only touch
+the partitions their range covers.
+"""
+
+import logging
+import re
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant identifying the maintenance advisory lock
+_LOCK_ID = 7_340_040
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class PartitionManager:
+    """Creates, detaches and archives monthly partitions."""
+
+    NAME_PATTERN = re.compile(r"_p(\d{4})(\d{2})$")
+
+    @staticmethod
+    def tables() -> Dict[str, int]:
+        """Partitioned tables and their retention in months (0 keeps everything)."""
+        return {
+            "transaction_history": settings.TRANSACTION_RETENTION_MONTHS,
+            "audit_logs": settings.AUDIT_LOG_RETENTION_MONTHS,
+        }
+
+    @staticmethod
+    def partition_name(table: str, month: date) -> str:
+        return f"{table}_p{month.year:04d}{month.month:02d}"
+
+    @staticmethod
+    def run_maintenance(engine: Engine) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Create upcoming partitions and archive expired ones for every table.
+
+        Safe to call from every worker: an advisory lock lets one run at a
+        time and the others skip.
+
+        Returns:
+            Per table, the partitions created and archived
+        """
+        report: Dict[str, Dict[str, List[str]]] = {}
+
+        # DETACH ... CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": _LOCK_ID}).scalar():
+                logger.info("Partition maintenance already running elsewhere, skipping")
+                return report
+
+            try:
+                for table, retention_months in PartitionManager.tables().items():
+                    report[table] = {
+                        "created": PartitionManager._create_upcoming(conn, table),
+                        "archived": PartitionManager._archive_expired(conn, table, retention_months),
+                    }
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
+
+        return report
+
+    @staticmethod
+    def _attached(conn, table: str) -> List[str]:
+        return list(conn.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :table
+        """), {"table": table}).scalars())
+
+    @staticmethod
+    def create_range(
+        conn, table: str, first_month: date, last_month: Optional[date] = None
+    ) -> List[str]:
+        """
+        Create any missing monthly partitions from first_month to last_month.
+
+        last_month defaults to PARTITION_MONTHS_AHEAD months from now.
+        """
+        if last_month is None:
+            last_month = _add_months(date.today().replace(day=1), settings.PARTITION_MONTHS_AHEAD)
+        existing = set(PartitionManager._attached(conn, table))
+        start = first_month.replace(day=1)
+        created = []
+
+        while start <= last_month:
+            name = PartitionManager.partition_name(table, start)
+            month_start, start = start, _add_months(start, 1)
+            if name in existing:
+                continue
+
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{start.isoformat()}')"
+            ))
+            created.append(name)
+            logger.info(f"Created partition {name}")
+
+        return created
+
+    @staticmethod
+    def _create_upcoming(conn, table: str) -> List[str]:
+        return PartitionManager.create_range(conn, table, date.today().replace(day=1))
+
+    @staticmethod
+    def _archive_expired(conn, table: str, retention_months: int) -> List[str]:
+        if retention_months <= 0:
+            return []
+
+        cutoff = _add_months(date.today().replace(day=1), -retention_months)
+        schema = settings.PARTITION_ARCHIVE_SCHEMA
+        archived = []
+
+        for name in sorted(PartitionManager._attached(conn, table)):
+            match = PartitionManager.NAME_PATTERN.search(name)
+            if not match:
+                continue
+            # Whole month must be past the cutoff
+            if _add_months(date(int(match.group(1)), int(match.group(2)), 1), 1) > cutoff:
+                continue
+
+            conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}" CONCURRENTLY'))
+            conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+            conn.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"'))
+            archived.append(name)
+            logger.info(f"Detached partition {name} into schema {schema}")
+
+        return archived
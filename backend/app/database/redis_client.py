@@ -0,0 +1,41 @@
+"""
+Redis connection management.
+Shared client for caching, counters and KumoMTA mailbox keys.
+"""
+
+from functools import lru_cache
+
+import redis
+
+from app.config import settings
+
+
+@lru_cache()
+def get_redis() -> redis.Redis:
+    """Get cached Redis client (connection pool is shared per process)."""
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=1,
+        socket_timeout=1,
+        health_check_interval=30,
+    )
+
+
+@lru_cache()
+def get_pubsub_redis() -> redis.Redis:
+    """
+    Get a client for long-lived subscriptions.
+
+    Separate from get_redis(): a quiet channel must not trip the shared
+    client's 1s read timeout. Dead connections are detected by the
+    periodic health-check PING instead.
+    """
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=1,
+        socket_timeout=None,
+        socket_keepalive=True,
+        health_check_interval=30,
+    )
@@ -1,21 +1,68 @@
 """
 Database session management for SQLAlchemy.
+
+Two engines share the primary database: a synchronous psycopg2 engine used
+by services, background flushers and threadpool work, and an asyncpg
+engine for routes that query the database directly from the event loop.
+When DATABASE_READ_REPLICA_URL is set, uncached read-only listings (the
+admin views) use a separate engine on the replica (get_read_db); otherwise
+they fall back to the primary. Responses stored in ResponseCache are built
+from the primary: a lagging replica would otherwise cache pre-write data
+under the tag version bumped by that very write.
 """
 
+from typing import Any, AsyncIterator, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool
 
 from app.config import settings
 
+
+def _pool_options() -> Dict[str, Any]:
+    """
+    Pool settings shared by all engines.
+
+    Development uses NullPool (no pooling), which accepts none of the
+    sizing options. Pooled engines pre-ping connections so a failover is
+    detected on checkout instead of failing requests, recycle them before
+    server-side timeouts, bound the wait for a free connection, and reuse
+    the most recent connection first so idle ones can age out.
+    """
+    if settings.ENVIRONMENT == "development":
+        return {"poolclass": NullPool}
+
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+        "pool_use_lifo": True,
+    }
+
+
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        connect_args={"connect_timeout": settings.DATABASE_CONNECT_TIMEOUT},
+        echo=settings.DATABASE_ECHO,
+        future=True,
+        **_pool_options(),
+    )
+
+
 # Create engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=NullPool if settings.ENVIRONMENT == "development" else None,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    echo=settings.DATABASE_ECHO,
-    future=True,
+engine = _create_engine(settings.DATABASE_URL)
+
+# Replica engine for read-only routes (the primary when no replica is configured)
+read_engine = (
+    _create_engine(settings.DATABASE_READ_REPLICA_URL)
+    if settings.DATABASE_READ_REPLICA_URL
+    else engine
 )
 
 # Create session factory
@@ -26,6 +73,27 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine,
+    expire_on_commit=False,
+)
+
+# Async engine on asyncpg (same database, driver swapped)
+async_engine = create_async_engine(
+    make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    connect_args={"timeout": settings.DATABASE_CONNECT_TIMEOUT},
+    echo=settings.DATABASE_ECHO,
+    **_pool_options(),
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def get_db() -> Session:
     """Dependency for FastAPI routes to get database session."""
@@ -34,3 +102,23 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+def get_read_db() -> Session:
+    """
+    Dependency for read-only routes: a session on the read replica.
+
+    Replica data can lag the primary slightly; use get_db for anything
+    that writes, must read its own writes, or builds a cached response.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for async FastAPI routes to get an AsyncSession."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -3,13 +3,15 @@ Cloudflare API Integration for DNS management.
 """
 
 import logging
-import requests
 from typing import Dict, Any
 
 from app.config import settings
+from app.utils.lazy import LazyModule
 
 logger = logging.getLogger(__name__)
 
+requests = LazyModule("requests")
+
 
 class CloudflareClient:
     """Cloudflare API client for DNS management."""
@@ -126,6 +128,24 @@ class CloudflareClient:
             logger.error(f"Cloudflare create_txt_record failed: {str(e)}")
             raise
     
+    def delete_zone(self, zone_id: str) -> bool:
+        """Delete a zone and all its DNS records (already deleted counts as success)."""
+        try:
+            url = f"{self.BASE_URL}/zones/{zone_id}"
+            
+            response = requests.delete(url, headers=self.headers, timeout=10)
+            if response.status_code == 404:
+                return True
+            response.raise_for_status()
+            
+            logger.info(f"Deleted Cloudflare zone {zone_id}")
+            
+            return True
+        
+        except Exception as e:
+            logger.error(f"Cloudflare delete_zone failed: {str(e)}")
+            raise
+    
     def get_dns_records(self, zone_id: str, record_type: str = None) -> list:
         """Get DNS records for a zone."""
         try:
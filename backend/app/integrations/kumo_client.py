@@ -2,10 +2,12 @@
 KumoMTA Integration - Hot-reload SMTP relay configuration.
 """
 
+import json
 import logging
-from typing import List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
 from app.config import settings
+from app.database.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +15,10 @@ logger = logging.getLogger(__name__)
 class KumoMTAClient:
     """KumoMTA HTTP API client for relay configuration."""
     
+    # Mailbox records read by the KumoMTA Redis datasource (kumo_redis_datasource.lua)
+    MAILBOX_KEY = "kumo:mailbox:{domain}:{username}"
+    REDIS_BATCH_SIZE = 1000
+    
     def __init__(self):
         """Initialize KumoMTA client."""
         self.host = settings.KUMO_HOST
@@ -83,3 +89,57 @@ class KumoMTAClient:
         except Exception as e:
             logger.error(f"KumoMTA get_relay_status failed: {str(e)}")
             raise
+    
+    def publish_mailboxes(self, mailboxes: Iterable[Dict[str, Any]]) -> int:
+        """
+        Write mailbox records to the datasource so KumoMTA accepts them.
+        
+        Args:
+            mailboxes: Dicts with domain, username, id, status and daily_limit
+        
+        Returns:
+            Number of mailboxes written
+        """
+        written = 0
+        pipe = get_redis().pipeline(transaction=False)
+        for mailbox in mailboxes:
+            key = self.MAILBOX_KEY.format(domain=mailbox["domain"], username=mailbox["username"])
+            pipe.set(key, json.dumps({
+                "id": str(mailbox["id"]),
+                "status": mailbox["status"],
+                "daily_limit": mailbox["daily_limit"],
+            }))
+            written += 1
+            if written % self.REDIS_BATCH_SIZE == 0:
+                pipe.execute()
+        pipe.execute()
+        
+        logger.info(f"Published {written} mailboxes to KumoMTA datasource")
+        return written
+    
+    def remove_mailboxes(self, addresses: Iterable[Tuple[str, str]]) -> int:
+        """
+        Remove mailbox records so KumoMTA rejects them immediately.
+        
+        Keys are unlinked REDIS_BATCH_SIZE at a time, all batches in one
+        pipelined round trip.
+        
+        Args:
+            addresses: (domain, username) pairs
+        
+        Returns:
+            Number of keys removed
+        """
+        pipe = get_redis().pipeline(transaction=False)
+        batch = []
+        for domain, username in addresses:
+            batch.append(self.MAILBOX_KEY.format(domain=domain, username=username))
+            if len(batch) >= self.REDIS_BATCH_SIZE:
+                pipe.unlink(*batch)
+                batch = []
+        if batch:
+            pipe.unlink(*batch)
+        
+        removed = sum(pipe.execute())
+        logger.info(f"Removed {removed} mailboxes from KumoMTA datasource")
+        return removed
@@ -0,0 +1,75 @@
+"""
+Stripe Integration - Redis cache of Stripe objects.
+
+Subscriptions, prices and promotion codes change rarely and only
+through Stripe, which reports every change as a webhook event. They are
+cached as JSON and dropped by the Stripe event worker when the matching
+event arrives, so steady-state billing reads need no Stripe round trip;
+the TTL only bounds how long a missed event can leave an entry stale.
+
+Each kind has a version counter in its keys: invalidating a whole kind
+(e.g. after price.updated) is one INCR, and entries built against an older
+version are never read again.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Optional
+
+from app.database.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class StripeObjectCache:
+    """Read-through cache for Stripe API objects."""
+
+    KEY = "stripe:obj:{kind}:{version}:{key}"
+    VERSION_KEY = "stripe:obj:ver:{kind}"
+
+    SUBSCRIPTION = "subscription"
+    PRICE = "price"
+    PROMOTION_CODE = "promotion_code"
+
+    @staticmethod
+    def _key(kind: str, key: str) -> str:
+        version = get_redis().get(StripeObjectCache.VERSION_KEY.format(kind=kind)) or "0"
+        return StripeObjectCache.KEY.format(kind=kind, version=version, key=key)
+
+    @staticmethod
+    def get_or_load(kind: str, key: str, loader: Callable[[], Any], ttl: int) -> Any:
+        """
+        Return the cached value or load, store and return a fresh one.
+
+        `loader` must return a JSON-serializable value; None is cached as
+        well (e.g. an unknown promotion code). Redis errors fall back to
+        calling the loader.
+        """
+        cache_key = None
+        try:
+            cache_key = StripeObjectCache._key(kind, key)
+            cached = get_redis().get(cache_key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Stripe cache read failed ({kind}): {str(e)}")
+
+        value = loader()
+
+        if cache_key:
+            try:
+                get_redis().set(cache_key, json.dumps(value, separators=(",", ":")), ex=ttl)
+            except Exception as e:
+                logger.warning(f"Stripe cache write failed ({kind}): {str(e)}")
+        return value
+
+    @staticmethod
+    def invalidate(kind: str, key: Optional[str] = None) -> None:
+        """Drop one cached object, or every object of `kind` when no key is given."""
+        try:
+            if key is None:
+                get_redis().incr(StripeObjectCache.VERSION_KEY.format(kind=kind))
+            else:
+                get_redis().delete(StripeObjectCache._key(kind, key))
+        except Exception as e:
+            logger.error(f"Stripe cache invalidation failed ({kind} {key or '*'}): {str(e)}")
@@ -0,0 +1,143 @@
+"""
+Stripe Integration - Bounded, retried access to the blocking Stripe SDK.
+
+Every Stripe API call goes through StripeGateway.request, which passes an
+idempotency key on writes and retries rate-limited (HTTP 429) calls with
+backoff inside an overall deadline. Async endpoints hand Stripe work to
+StripeGateway.run, a dedicated pool of STRIPE_MAX_CONCURRENCY threads, so
+a slow Stripe round trip holds one of those threads instead of the event
+loop or the threadpool shared by the rest of the API.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import settings
+from app.utils.lazy import LazyModule
+
+logger = logging.getLogger(__name__)
+
+
+def _configure_stripe(module) -> None:
+    module.api_key = settings.STRIPE_API_KEY
+    # Connection errors and 409 idempotency conflicts are retried by the SDK itself
+    module.max_network_retries = settings.STRIPE_NETWORK_RETRIES
+    # Keeps one keep-alive session per pool thread; timeout applies per HTTP attempt
+    module.default_http_client = module.http_client.RequestsClient(
+        timeout=settings.STRIPE_TIMEOUT_SECONDS
+    )
+
+
+# Imported and configured on the first Stripe call
+stripe = LazyModule("stripe", setup=_configure_stripe)
+
+
+class StripeGatewayTimeout(Exception):
+    """A Stripe call did not finish within STRIPE_CALL_TIMEOUT_SECONDS."""
+
+
+class StripeGateway:
+    """Single entry point for Stripe API calls."""
+
+    RETRY_BASE_DELAY = 0.5
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def request(
+        method: Callable[..., Any],
+        *args: Any,
+        idempotency_key: Optional[str] = None,
+        **params: Any
+    ) -> Any:
+        """
+        Call a Stripe SDK method, retrying rate-limit errors.
+
+        Args:
+            method: SDK callable, e.g. `stripe.Customer.create`
+            idempotency_key: Key for write calls; every retry reuses it
+            **params: Arguments for the SDK call
+
+        Returns:
+            The SDK's response object
+
+        Raises:
+            StripeError: If the call fails or stays rate limited
+        """
+        if idempotency_key:
+            params["idempotency_key"] = idempotency_key
+
+        deadline = time.monotonic() + settings.STRIPE_CALL_TIMEOUT_SECONDS
+        attempt = 0
+        while True:
+            try:
+                return method(*args, **params)
+            except stripe.error.RateLimitError as e:
+                delay = StripeGateway.RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random())
+                attempt += 1
+                if attempt > settings.STRIPE_RATE_LIMIT_RETRIES or time.monotonic() + delay > deadline:
+                    logger.error(f"Stripe rate limit persisted after {attempt} attempts: {str(e)}")
+                    raise
+                logger.warning(f"Stripe rate limited, retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    @staticmethod
+    def idempotency_key(*parts: Any) -> str:
+        """
+        Idempotency key for a write.
+
+        Deterministic when `parts` identify the operation (a double submit
+        then returns Stripe's first result), random otherwise.
+        """
+        if not parts:
+            return str(uuid.uuid4())
+        return ":".join(str(part) for part in parts)
+
+    @classmethod
+    async def run(cls, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run blocking Stripe work on the Stripe thread pool.
+
+        Raises:
+            StripeGatewayTimeout: If it does not finish within STRIPE_CALL_TIMEOUT_SECONDS
+        """
+        loop = asyncio.get_running_loop()
+        # Keep request context (query stats, logging) in the worker thread
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(
+            cls._get_executor(), functools.partial(context.run, func, *args, **kwargs)
+        )
+        try:
+            return await asyncio.wait_for(future, settings.STRIPE_CALL_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # The thread finishes on its own once the HTTP timeout fires
+            logger.error(f"Stripe call {getattr(func, '__name__', func)} timed out")
+            raise StripeGatewayTimeout("Payment provider did not respond in time")
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=settings.STRIPE_MAX_CONCURRENCY,
+                        thread_name_prefix="stripe",
+                    )
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stop the Stripe thread pool (application shutdown)."""
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
@@ -7,27 +7,111 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from prometheus_client import make_asgi_app
 import logging
 
 from app.config import settings
-from app.database.session import engine
-from app.database.models import init_db
+from app.database.session import engine, async_engine
+from app.database.partitions import PartitionManager
+from app.database.schema import check_schema_revision
+from app.integrations.stripe_gateway import StripeGateway
+from app.services.admin_service import AdminService
+from app.services.api_key_service import APIKeyUsageTracker
+from app.services.audit_service import AuditLogWriter
+from app.services.counter_reset_service import SendCounterReset
+from app.services.purge_service import PurgeService
+from app.services.stripe_event_service import StripeEventQueue
+from app.services.metering_service import APICallMeter, UsageMeter
+from app.services.billing_service import BillingService
+from app.utils.auth import TenantCache
+from app.utils.background import PeriodicFlusher
+from app.utils import query_stats
 
 
 # Configure logging
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+partition_maintenance = PeriodicFlusher(
+    "partition-maintenance",
+    settings.PARTITION_MAINTENANCE_SECONDS,
+    lambda: PartitionManager.run_maintenance(engine),
+)
+
+counter_reset = PeriodicFlusher(
+    "send-counter-reset",
+    settings.USAGE_RESET_CHECK_SECONDS,
+    SendCounterReset.run_due,
+)
+
+purge_worker = PeriodicFlusher(
+    "purge-worker",
+    settings.PURGE_INTERVAL_SECONDS,
+    PurgeService.run,
+)
+
+stripe_events = PeriodicFlusher(
+    "stripe-event-worker",
+    settings.STRIPE_EVENT_POLL_SECONDS,
+    StripeEventQueue.process_pending,
+)
+
+usage_reporter = PeriodicFlusher(
+    "stripe-usage-reporter",
+    settings.USAGE_REPORT_SECONDS,
+    BillingService.report_overage_usage,
+)
+
+# Overage of tenants above their inbox limit without usage events
+usage_overage = PeriodicFlusher(
+    "usage-overage",
+    settings.USAGE_REPORT_SECONDS,
+    UsageMeter.record_overages,
+)
+
+admin_stats = PeriodicFlusher(
+    "admin-inbox-stats",
+    settings.ADMIN_STATS_REFRESH_SECONDS,
+    AdminService.refresh_inbox_stats,
+)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle management."""
     # Startup
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
-    init_db(engine)
+    check_schema_revision(engine)
+    # Off the startup path: partitions are kept PARTITION_MONTHS_AHEAD ahead
+    partition_maintenance.start(run_first=True)
+    counter_reset.start()
+    purge_worker.start()
+    stripe_events.start()
+    usage_reporter.start()
+    usage_overage.start()
+    admin_stats.start()
+    TenantCache.start_listener()
+    APIKeyUsageTracker.start()
+    APICallMeter.start()
+    UsageMeter.start()
+    AuditLogWriter.start()
     yield
     # Shutdown
     logger.info("Shutting down application")
+    APIKeyUsageTracker.stop()
+    APICallMeter.stop()
+    # After APICallMeter: its final flush feeds the usage aggregates
+    UsageMeter.stop()
+    AuditLogWriter.stop()
+    partition_maintenance.stop(final_flush=False)
+    counter_reset.stop(final_flush=False)
+    purge_worker.stop(final_flush=False)
+    stripe_events.stop(final_flush=False)
+    usage_reporter.stop(final_flush=False)
+    usage_overage.stop(final_flush=False)
+    admin_stats.stop(final_flush=False)
+    StripeGateway.shutdown()
+    await async_engine.dispose()
 
 
 # Create FastAPI app
@@ -48,6 +132,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus metrics
+app.mount("/metrics", make_asgi_app())
+
+
+@app.middleware("http")
+async def rate_limit_headers(request: Request, call_next):
+    """
+    Expose X-RateLimit-* headers for requests counted by the rate limiter.
+    
+    Also binds the caller's IP and user agent for audit events, and
+    reports the request's SQL query count and time (Server-Timing).
+    """
+    AuditLogWriter.bind_request(request)
+    stats = query_stats.start_request()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    query_stats.finish_request(stats, route.path if route else "unmatched", response)
+    rate_limit = getattr(request.state, "rate_limit", None)
+    if rate_limit is not None:
+        for name, value in rate_limit.headers.items():
+            response.headers.setdefault(name, value)
+    return response
+
 
 # Error handlers
 @app.exception_handler(RequestValidationError)
@@ -85,13 +192,16 @@ async def root():
 # Import and include API routers
 def include_routes():
     """Include all API routers."""
-    from app.api.v1 import billing, domains, infrastructure, analytics, auth
+    from app.api.v1 import billing, domains, infrastructure, analytics, auth, exports, admin, webhooks
     
     app.include_router(auth.router, prefix=settings.API_V1_STR, tags=["Authentication"])
     app.include_router(billing.router, prefix=settings.API_V1_STR, tags=["Billing"])
     app.include_router(domains.router, prefix=settings.API_V1_STR, tags=["Domains"])
     app.include_router(infrastructure.router, prefix=settings.API_V1_STR, tags=["Infrastructure"])
     app.include_router(analytics.router, prefix=settings.API_V1_STR, tags=["Analytics"])
+    app.include_router(exports.router, prefix=settings.API_V1_STR, tags=["Exports"])
+    app.include_router(admin.router, prefix=settings.API_V1_STR, tags=["Admin"])
+    app.include_router(webhooks.router, prefix=settings.API_V1_STR, tags=["Webhooks"])
 
 
 # Include routes when module is imported
@@ -0,0 +1,286 @@
+"""
+Abuse Service: Streaming abuse-signal counters feeding the kill switch.
+
+Every complaint, bounce or payment failure bumps an exponentially decaying
+counter for the tenant and, when known, the sending domain. The counters
+live in Redis and are updated by one Lua call each, so evaluating an event
+against SuspensionManager's thresholds is O(1) and suspension happens
+while the event is being handled, without scanning any table.
+
+Deliveries feed a decaying volume counter with the hard-bounce half-life,
+so bounces are judged as a share of recent sending rather than as an
+absolute count.
+"""
+
+import logging
+import math
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database.models import Tenant, Domain, DomainStatus
+from app.database.redis_client import get_redis
+from app.database.session import SessionLocal
+from app.services.domain_service import DomainService
+from app.services.subscription_service import SubscriptionService
+from app.utils.auth import TTLCache
+from app.utils.security import SuspensionManager
+
+logger = logging.getLogger(__name__)
+
+
+class AbuseSignalEngine:
+    """Decaying per-tenant and per-domain abuse counters with auto-suspension."""
+
+    # Time for a signal's weight to halve (seconds)
+    HALF_LIVES = {
+        "spam_complaint": 7 * 86400,
+        "hard_bounce": 86400,
+        "payment_failed": 30 * 86400,
+        "blacklisted": 30 * 86400,
+        "terms_violation": 365 * 86400,
+    }
+
+    # Rate signals -> the volume counter they are measured against
+    VOLUME_COUNTERS = {
+        "hard_bounce": "delivered",
+    }
+
+    # Suspensions are triggered once per entity per window, not per event
+    TRIP_WINDOW = 3600
+
+    # KEYS: counter hash; ARGV: now, half-life, weight, ttl
+    LUA_SCRIPT = """
+    local state = redis.call('HMGET', KEYS[1], 'v', 't')
+    local now = tonumber(ARGV[1])
+    local value = tonumber(state[1] or '0')
+    local updated = tonumber(state[2] or ARGV[1])
+    if now > updated then
+        value = value * math.pow(0.5, (now - updated) / tonumber(ARGV[2]))
+    end
+    value = value + tonumber(ARGV[3])
+    redis.call('HSET', KEYS[1], 'v', tostring(value), 't', ARGV[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return tostring(value)
+    """
+
+    _script = None
+
+    # Sending domain name -> (domain_id, tenant_id); None for unknown names
+    _domains = TTLCache(max_size=50000)
+    DOMAIN_CACHE_TTL = 300
+
+    # Fallback when Redis is unreachable: {key: (value, updated_at)}
+    _local: Dict[str, Tuple[float, float]] = {}
+    _local_lock = threading.Lock()
+    _local_max_keys = 100000
+
+    @classmethod
+    def record(
+        cls,
+        signal: str,
+        tenant_id: Any,
+        domain_id: Optional[Any] = None,
+        weight: float = 1.0,
+        details: Optional[Dict[str, Any]] = None,
+        db: Optional[Session] = None
+    ) -> List[str]:
+        """
+        Feed one abuse event and suspend whatever crossed its threshold.
+
+        Args:
+            signal: Reason code known to SuspensionManager (e.g. "spam_complaint")
+            tenant_id: Tenant the event belongs to
+            domain_id: Sending domain, if known
+            weight: Number of occurrences this event represents
+            details: Extra context stored with the abuse audit event
+            db: Session to suspend with (a short-lived one is opened otherwise)
+
+        Returns:
+            Descriptions of the suspensions triggered (usually empty)
+        """
+        if signal not in cls.HALF_LIVES:
+            raise ValueError(f"Unknown abuse signal: {signal}")
+
+        scopes = [("tenant", str(tenant_id))]
+        if domain_id is not None:
+            scopes.append(("domain", str(domain_id)))
+
+        half_life = cls.HALF_LIVES[signal]
+        values = cls._increment(
+            [f"abuse:{scope}:{entity_id}:{signal}" for scope, entity_id in scopes],
+            half_life,
+            [weight] * len(scopes),
+        )
+
+        volume_counter = cls.VOLUME_COUNTERS.get(signal)
+        volumes = [None] * len(scopes)
+        if volume_counter:
+            volumes = cls._current(
+                [f"abuse:{scope}:{entity_id}:{volume_counter}" for scope, entity_id in scopes],
+                half_life,
+            )
+
+        tripped = []
+        for (scope, entity_id), value, volume in zip(scopes, values, volumes):
+            suspend, _ = SuspensionManager.should_suspend(signal, value, volume)
+            if suspend and cls._claim_trip(scope, entity_id, signal):
+                tripped.append((scope, entity_id, value))
+
+        if not tripped:
+            return []
+
+        session = db or SessionLocal()
+        suspensions = []
+        try:
+            for index, (scope, entity_id, value) in enumerate(tripped):
+                try:
+                    suspensions.append(
+                        cls._suspend(scope, entity_id, signal, value, tenant_id, details, session)
+                    )
+                except Exception:
+                    # Unclaimed, the next event retries instead of waiting out TRIP_WINDOW
+                    for pending_scope, pending_id, _ in tripped[index:]:
+                        cls._release_trip(pending_scope, pending_id, signal)
+                    raise
+            return suspensions
+        finally:
+            if db is None:
+                session.close()
+
+    @classmethod
+    def record_deliveries(cls, counts: Dict[Tuple[Any, Any], int]) -> None:
+        """
+        Count delivered messages towards the volume that rate signals are measured against.
+
+        Args:
+            counts: Deliveries per (tenant_id, domain_id)
+        """
+        totals: Dict[str, int] = {}
+        for (tenant_id, domain_id), count in counts.items():
+            for scope, entity_id in (("tenant", tenant_id), ("domain", domain_id)):
+                key = f"abuse:{scope}:{entity_id}:delivered"
+                totals[key] = totals.get(key, 0) + count
+        if totals:
+            cls._increment(list(totals), cls.HALF_LIVES["hard_bounce"], list(totals.values()))
+
+    @classmethod
+    def release_trips(cls, scope: str, entity_id: Any) -> None:
+        """Allow an entity to be suspended again right away (e.g. after an admin lifts a suspension)."""
+        for signal in cls.HALF_LIVES:
+            cls._release_trip(scope, str(entity_id), signal)
+
+    @classmethod
+    def resolve_domain(cls, domain_name: str, db: Session) -> Optional[Tuple[uuid.UUID, uuid.UUID]]:
+        """Map a sending domain to (domain_id, tenant_id), cached."""
+        domain_name = domain_name.lower()
+        cached = cls._domains.get(domain_name)
+        if cached is not None:
+            return cached or None
+
+        # Deleted domains are waiting to be purged; signals for them are not attributed
+        row = db.query(Domain.id, Domain.tenant_id).filter(
+            Domain.domain_name == domain_name,
+            Domain.status != DomainStatus.DELETED
+        ).order_by(Domain.created_at.desc()).first()
+
+        owner = (row.id, row.tenant_id) if row else ()
+        cls._domains.set(domain_name, owner, cls.DOMAIN_CACHE_TTL)
+        return owner or None
+
+    @classmethod
+    def get_score(cls, scope: str, entity_id: Any, signal: str) -> float:
+        """Current decayed value of a counter (for dashboards and review)."""
+        return cls._current([f"abuse:{scope}:{entity_id}:{signal}"], cls.HALF_LIVES[signal])[0]
+
+    @classmethod
+    def _current(cls, keys: List[str], half_life: int) -> List[float]:
+        now = time.time()
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for key in keys:
+                pipe.hmget(key, "v", "t")
+            states = pipe.execute()
+        except Exception:
+            with cls._local_lock:
+                states = [cls._local.get(key, (0.0, now)) for key in keys]
+
+        return [
+            float(value) * math.pow(0.5, (now - float(updated)) / half_life)
+            if value is not None else 0.0
+            for value, updated in states
+        ]
+
+    @classmethod
+    def _increment(cls, keys: List[str], half_life: int, weights: List[float]) -> List[float]:
+        now = time.time()
+        try:
+            if cls._script is None:
+                cls._script = get_redis().register_script(cls.LUA_SCRIPT)
+            pipe = get_redis().pipeline(transaction=False)
+            for key, weight in zip(keys, weights):
+                cls._script(keys=[key], args=[now, half_life, weight, half_life * 10], client=pipe)
+            return [float(value) for value in pipe.execute()]
+        except Exception as e:
+            logger.warning(f"Abuse counters unavailable, counting locally: {str(e)}")
+
+        values = []
+        with cls._local_lock:
+            if len(cls._local) > cls._local_max_keys:
+                cls._local.clear()
+            for key, weight in zip(keys, weights):
+                value, updated = cls._local.get(key, (0.0, now))
+                value = value * math.pow(0.5, (now - updated) / half_life) + weight
+                cls._local[key] = (value, now)
+                values.append(value)
+        return values
+
+    @classmethod
+    def _claim_trip(cls, scope: str, entity_id: str, signal: str) -> bool:
+        """Let exactly one worker act on a tripped threshold."""
+        try:
+            return bool(get_redis().set(
+                f"abuse:tripped:{scope}:{entity_id}:{signal}", 1, nx=True, ex=cls.TRIP_WINDOW
+            ))
+        except Exception:
+            return True
+
+    @staticmethod
+    def _release_trip(scope: str, entity_id: str, signal: str) -> None:
+        try:
+            get_redis().delete(f"abuse:tripped:{scope}:{entity_id}:{signal}")
+        except Exception as e:
+            logger.warning(f"Could not release abuse trip {scope} {entity_id} {signal}: {str(e)}")
+
+    @staticmethod
+    def _suspend(
+        scope: str,
+        entity_id: str,
+        signal: str,
+        value: float,
+        tenant_id: Any,
+        details: Optional[Dict[str, Any]],
+        db: Session
+    ) -> str:
+        reason = f"Automatic: {signal} threshold reached ({value:.1f})"
+
+        if scope == "tenant":
+            tenant = db.get(Tenant, uuid.UUID(entity_id))
+            if tenant and not tenant.is_suspended:
+                SubscriptionService.suspend_tenant(tenant, reason, db)
+        else:
+            domain = db.get(Domain, uuid.UUID(entity_id))
+            if domain and domain.status not in (DomainStatus.SUSPENDED, DomainStatus.DELETED):
+                DomainService.suspend_domain(domain, reason, db)
+
+        SuspensionManager.log_abuse_event(
+            str(tenant_id),
+            signal,
+            {**(details or {}), "scope": scope, "entity_id": entity_id, "score": round(value, 2)},
+            db,
+        )
+
+        return f"{scope} {entity_id} suspended: {reason}"
@@ -0,0 +1,240 @@
+"""
+Admin Service: Cross-tenant listings for platform operators.
+Keyset-paginated tenant views with usage and health in a single query.
+
+Usage and inbox health are read from stored Tenant columns, so a page
+costs the same however many inboxes its tenants have. Health aggregates
+are recomputed in the background by refresh_inbox_stats, tenant chunk by
+tenant chunk.
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+import uuid
+
+from sqlalchemy import select, update, values, column, cast, func, text, tuple_, Float, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.models import Tenant, Inbox, InboxStatus, SubscriptionStatus
+from app.database.redis_client import get_redis
+from app.database.session import SessionLocal, engine
+from app.services.metering_service import APICallMeter
+from app.services.subscription_service import SubscriptionService
+from app.utils.pagination import encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant identifying the inbox stats advisory lock
+_LOCK_ID = 7_340_046
+
+
+class AdminService:
+    """Read-only, cross-tenant views for the admin dashboards."""
+
+    MAX_PAGE_SIZE = 200
+    STATS_CHUNK_SIZE = 500
+
+    @staticmethod
+    def list_tenants(
+        db: Session,
+        limit: int = 50,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None,
+        subscription_status: Optional[SubscriptionStatus] = None,
+        is_suspended: Optional[bool] = None,
+        trial_ends_after: Optional[datetime] = None,
+        trial_ends_before: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        List tenants newest first with usage, trial status and inbox health.
+
+        One statement per page: the page of tenants is selected by keyset on
+        (created_at, id). Usage counters and inbox health come from the
+        denormalized Tenant columns, so no inboxes are read and no
+        per-tenant queries are issued. Health is as of the last
+        refresh_inbox_stats run.
+
+        Args:
+            db: Database session
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            after: Decoded cursor (created_at, id) of the last row of the previous page
+            subscription_status: Filter by subscription status
+            is_suspended: Filter by suspension flag
+            trial_ends_after: Only tenants whose trial ends at or after this time
+            trial_ends_before: Only tenants whose trial ends before this time
+
+        Returns:
+            Dictionary with tenants and next_cursor
+        """
+        limit = max(1, min(limit, AdminService.MAX_PAGE_SIZE))
+
+        stmt = select(Tenant.__table__)
+        if subscription_status is not None:
+            stmt = stmt.where(Tenant.subscription_status == subscription_status)
+        if is_suspended is not None:
+            stmt = stmt.where(Tenant.is_suspended == is_suspended)
+        if trial_ends_after is not None:
+            stmt = stmt.where(Tenant.trial_ends_at >= trial_ends_after)
+        if trial_ends_before is not None:
+            stmt = stmt.where(Tenant.trial_ends_at < trial_ends_before)
+        if after is not None:
+            stmt = stmt.where(tuple_(Tenant.created_at, Tenant.id) < after)
+        stmt = stmt.order_by(Tenant.created_at.desc(), Tenant.id.desc()).limit(limit + 1)
+        rows = db.execute(stmt).mappings().all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = (
+            encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if has_more else None
+        )
+
+        return {
+            "tenants": [AdminService._tenant_row(row) for row in rows],
+            "next_cursor": next_cursor,
+        }
+
+    @staticmethod
+    def _tenant_row(row) -> Dict[str, Any]:
+        """Shape one tenant row for the admin dashboards."""
+        limits = SubscriptionService.get_plan_limits(row["subscription_tier"])
+        trial_days_remaining = 0
+        if row["subscription_status"] == SubscriptionStatus.TRIAL and row["trial_ends_at"]:
+            trial_days_remaining = max(0, (row["trial_ends_at"] - datetime.utcnow()).days)
+
+        return {
+            "id": str(row["id"]),
+            "company_name": row["company_name"],
+            "company_email": row["company_email"],
+            "subscription_tier": row["subscription_tier"],
+            "subscription_status": row["subscription_status"],
+            "is_suspended": row["is_suspended"],
+            "suspension_reason": row["suspension_reason"],
+            "trial": {
+                "started_at": row["trial_started_at"],
+                "ends_at": row["trial_ends_at"],
+                "days_remaining": trial_days_remaining,
+                "converted": row["trial_converted"],
+            },
+            "usage": {
+                "domains": {"used": row["domains_count"], "limit": limits["domains"]},
+                "inboxes": {"used": row["inboxes_count"], "limit": limits["inboxes"]},
+                "api_calls": {
+                    "used": APICallMeter.stored(row["api_calls_this_month"], row["api_calls_period"]),
+                    "limit": limits["api_calls"],
+                },
+            },
+            "health": {
+                "avg_health_score": round(float(row["avg_health_score"] or 0), 2),
+                "active_inboxes": row["active_inboxes_count"] or 0,
+                "blacklisted_inboxes": row["blacklisted_inboxes_count"] or 0,
+            },
+            "created_at": row["created_at"],
+        }
+
+    @staticmethod
+    def refresh_inbox_stats() -> Optional[int]:
+        """
+        Recompute the stored inbox health of every tenant (the admin stats worker's periodic call).
+
+        Tenants are walked in primary-key chunks: one grouped aggregate
+        over the chunk's inboxes and one UPDATE ... FROM (VALUES ...) per
+        chunk, each committed on its own.
+
+        Safe to call from every worker: an advisory lock lets one run at a
+        time, and a Redis claim lets only the first worker of each interval
+        run at all; the others skip.
+
+        Returns:
+            Number of tenants refreshed, or None if skipped
+        """
+        if not AdminService._claim_refresh():
+            return None
+
+        with engine.connect() as conn:
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": _LOCK_ID}).scalar():
+                logger.info("Admin inbox stats refresh already running elsewhere, skipping")
+                conn.rollback()
+                return None
+            conn.commit()
+
+            try:
+                return AdminService._refresh_chunks()
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
+                conn.commit()
+
+    @staticmethod
+    def _claim_refresh() -> bool:
+        """Claim this interval's refresh (always granted when Redis is unreachable)."""
+        try:
+            return bool(get_redis().set(
+                "admin:stats:refresh", 1, nx=True, ex=max(1, settings.ADMIN_STATS_REFRESH_SECONDS - 1)
+            ))
+        except Exception as e:
+            logger.warning(f"Admin stats refresh claim unavailable: {str(e)}")
+            return True
+
+    @staticmethod
+    def _refresh_chunks() -> int:
+        refreshed = 0
+        last_id = None
+        db = SessionLocal()
+        try:
+            while True:
+                ids = select(Tenant.id).order_by(Tenant.id).limit(AdminService.STATS_CHUNK_SIZE)
+                if last_id is not None:
+                    ids = ids.where(Tenant.id > last_id)
+                ids = list(db.scalars(ids))
+                if not ids:
+                    return refreshed
+
+                stats = {
+                    row.tenant_id: row
+                    for row in db.execute(
+                        select(
+                            Inbox.tenant_id,
+                            func.count().filter(Inbox.status == InboxStatus.ACTIVE).label("active"),
+                            func.count().filter(Inbox.is_blacklisted.is_(True)).label("blacklisted"),
+                            func.avg(Inbox.health_score).label("avg_health"),
+                        )
+                        .where(Inbox.tenant_id.in_(ids), Inbox.status != InboxStatus.DELETED)
+                        .group_by(Inbox.tenant_id)
+                    )
+                }
+
+                # Tenants without inboxes are reset too
+                rows = []
+                for tenant_id in ids:
+                    row = stats.get(tenant_id)
+                    rows.append((
+                        str(tenant_id),
+                        row.active if row else 0,
+                        row.blacklisted if row else 0,
+                        float(row.avg_health) if row and row.avg_health is not None else None,
+                    ))
+                data = values(
+                    column("id", UUID(as_uuid=False)),
+                    column("active", Integer),
+                    column("blacklisted", Integer),
+                    column("avg_health", Float),
+                    name="stats",
+                ).data(rows)
+
+                db.execute(
+                    update(Tenant)
+                    .where(Tenant.id == cast(data.c.id, UUID(as_uuid=True)))
+                    .values(
+                        active_inboxes_count=data.c.active,
+                        blacklisted_inboxes_count=data.c.blacklisted,
+                        avg_health_score=data.c.avg_health,
+                    ),
+                    execution_options={"synchronize_session": False},
+                )
+                db.commit()
+
+                refreshed += len(ids)
+                last_id = ids[-1]
+        finally:
+            db.close()
@@ -0,0 +1,319 @@
+"""
+API Key Service: Issuing, resolving and metering API keys.
+
+Keys are resolved by hash through an in-process cache backed by Redis,
+so an API request normally costs no database query. Usage counters are
+accumulated in memory and written back in one batched UPDATE every few
+seconds instead of one write per request.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update, values, column, cast, func, Integer, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.models import APIKey
+from app.database.redis_client import get_redis
+from app.database.session import SessionLocal
+from app.utils.background import PeriodicFlusher
+from app.utils.security import generate_api_key, hash_api_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class APIKeySnapshot:
+    """The API key fields needed to authorize a request."""
+    id: uuid.UUID
+    tenant_id: uuid.UUID
+    scopes: Tuple[str, ...]
+    is_active: bool
+    expires_at: Optional[datetime]
+
+    def has_scope(self, scope: str) -> bool:
+        return "admin" in self.scopes or scope in self.scopes
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "id": str(self.id),
+            "tenant_id": str(self.tenant_id),
+            "scopes": list(self.scopes),
+            "is_active": self.is_active,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "APIKeySnapshot":
+        data = json.loads(raw)
+        return cls(
+            id=uuid.UUID(data["id"]),
+            tenant_id=uuid.UUID(data["tenant_id"]),
+            scopes=tuple(data["scopes"]),
+            is_active=data["is_active"],
+            expires_at=datetime.fromisoformat(data["expires_at"]) if data["expires_at"] else None,
+        )
+
+
+class APIKeyUsageTracker:
+    """Accumulates per-key usage in memory and flushes it in batches."""
+
+    _pending: Dict[uuid.UUID, Tuple[int, datetime]] = {}
+    _lock = threading.Lock()
+    _flusher: Optional[PeriodicFlusher] = None
+
+    @classmethod
+    def record(cls, key_id: uuid.UUID) -> None:
+        """Count one use of a key (memory only)."""
+        now = datetime.utcnow()
+        with cls._lock:
+            count, _ = cls._pending.get(key_id, (0, now))
+            cls._pending[key_id] = (count + 1, now)
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Write accumulated usage with a single UPDATE ... FROM (VALUES ...).
+
+        Returns:
+            Number of keys updated
+        """
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+
+        if not pending:
+            return 0
+
+        rows = [(str(key_id), delta, last_used) for key_id, (delta, last_used) in pending.items()]
+        deltas = values(
+            column("id", UUID(as_uuid=False)),
+            column("delta", Integer),
+            column("last_used", DateTime),
+            name="deltas",
+        ).data(rows)
+
+        stmt = update(APIKey).where(
+            APIKey.id == cast(deltas.c.id, UUID(as_uuid=True))
+        ).values(
+            usage_count=func.coalesce(APIKey.usage_count, 0) + deltas.c.delta,
+            last_used_at=func.greatest(
+                func.coalesce(APIKey.last_used_at, deltas.c.last_used), deltas.c.last_used
+            ),
+        )
+
+        db = SessionLocal()
+        try:
+            db.execute(stmt, execution_options={"synchronize_session": False})
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the deltas back so the next flush retries them
+            with cls._lock:
+                for key_id, (delta, last_used) in pending.items():
+                    count, newest = cls._pending.get(key_id, (0, last_used))
+                    cls._pending[key_id] = (count + delta, max(newest, last_used))
+            raise
+        finally:
+            db.close()
+
+        logger.debug(f"Flushed API key usage for {len(rows)} keys")
+        return len(rows)
+
+    @classmethod
+    def start(cls) -> None:
+        if cls._flusher is None:
+            cls._flusher = PeriodicFlusher(
+                "api-key-usage", settings.API_KEY_USAGE_FLUSH_SECONDS, cls.flush
+            )
+        cls._flusher.start()
+
+    @classmethod
+    def stop(cls) -> None:
+        if cls._flusher:
+            cls._flusher.stop()
+
+
+class APIKeyService:
+    """Issue, list, revoke and resolve tenant API keys."""
+
+    CACHE_PREFIX = "apikey"
+
+    # Short local TTL: revocations reach other workers through Redis quickly
+    _local: Dict[str, Tuple[Optional[APIKeySnapshot], float]] = {}
+    _local_lock = threading.Lock()
+    LOCAL_TTL = 10
+    LOCAL_MAX_KEYS = 10000
+
+    @staticmethod
+    def create_key(
+        tenant_id: str,
+        name: str,
+        scopes: List[str],
+        expires_at: Optional[datetime],
+        db: Session
+    ) -> Tuple[APIKey, str]:
+        """
+        Create an API key.
+
+        Returns:
+            Tuple of (APIKey record, raw key). The raw key is only available here.
+        """
+        raw_key = generate_api_key()
+        api_key = APIKey(
+            tenant_id=tenant_id,
+            name=name,
+            key_hash=hash_api_key(raw_key),
+            scopes=scopes,
+            expires_at=expires_at,
+        )
+        db.add(api_key)
+        db.commit()
+        db.refresh(api_key)
+
+        logger.info(f"API key {api_key.id} created for tenant {tenant_id}")
+        return api_key, raw_key
+
+    @staticmethod
+    def list_keys(tenant_id: str, db: Session) -> List[APIKey]:
+        """List a tenant's API keys."""
+        return db.query(APIKey).filter(
+            APIKey.tenant_id == tenant_id
+        ).order_by(APIKey.created_at.desc()).all()
+
+    @staticmethod
+    def revoke_key(tenant_id: str, key_id: str, db: Session) -> bool:
+        """Deactivate an API key and mark it revoked in the shared cache."""
+        api_key = db.query(APIKey).filter(
+            APIKey.id == key_id,
+            APIKey.tenant_id == tenant_id
+        ).first()
+        if not api_key:
+            return False
+
+        api_key.is_active = False
+        db.add(api_key)
+        db.flush()
+
+        # Overwrite the shared entry with the revoked snapshot before the revoke
+        # counts. Lookups only ever add entries (SET NX), so one that read the
+        # still-active row before the commit cannot put it back. If Redis is
+        # unreachable the revoke fails and can be retried.
+        try:
+            APIKeyService._cache_revoked(api_key)
+        except Exception:
+            db.rollback()
+            raise
+
+        try:
+            db.commit()
+        except Exception:
+            # The key is still active: let lookups read it from the database again
+            APIKeyService.invalidate(api_key.key_hash)
+            raise
+
+        logger.info(f"API key {api_key.id} revoked for tenant {tenant_id}")
+        return True
+
+    @staticmethod
+    def resolve(raw_key: str, db: Optional[Session] = None) -> Optional[APIKeySnapshot]:
+        """
+        Resolve a raw API key to its snapshot.
+
+        Lookup order: process cache, Redis, database. Unknown keys are
+        negatively cached too (for API_KEY_NEGATIVE_CACHE_TTL), so guessing
+        keys does not hit the database for every attempt.
+
+        Returns:
+            Snapshot, or None if no such key exists
+        """
+        key_hash = hash_api_key(raw_key)
+
+        with APIKeyService._local_lock:
+            cached = APIKeyService._local.get(key_hash)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        snapshot = None
+        found = False
+        redis_key = f"{APIKeyService.CACHE_PREFIX}:{key_hash}"
+        try:
+            raw = get_redis().get(redis_key)
+            if raw is not None:
+                found = True
+                snapshot = APIKeySnapshot.from_json(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"API key cache read failed: {str(e)}")
+
+        if not found:
+            session = db or SessionLocal()
+            try:
+                row = session.query(
+                    APIKey.id, APIKey.tenant_id, APIKey.scopes, APIKey.is_active, APIKey.expires_at
+                ).filter(APIKey.key_hash == key_hash).first()
+            finally:
+                if db is None:
+                    session.close()
+
+            if row:
+                snapshot = APIKeySnapshot(
+                    id=row.id,
+                    tenant_id=row.tenant_id,
+                    scopes=tuple(row.scopes or ()),
+                    is_active=bool(row.is_active),
+                    expires_at=row.expires_at,
+                )
+
+            try:
+                # Empty string marks a known-missing key. NX: never replace an
+                # entry written meanwhile (a revocation's snapshot in particular)
+                get_redis().set(
+                    redis_key,
+                    snapshot.to_json() if snapshot else "",
+                    ex=settings.REDIS_CACHE_TTL if snapshot else settings.API_KEY_NEGATIVE_CACHE_TTL,
+                    nx=True
+                )
+            except Exception as e:
+                logger.warning(f"API key cache write failed: {str(e)}")
+
+        with APIKeyService._local_lock:
+            if len(APIKeyService._local) >= APIKeyService.LOCAL_MAX_KEYS:
+                APIKeyService._local.clear()
+            APIKeyService._local[key_hash] = (snapshot, time.monotonic() + APIKeyService.LOCAL_TTL)
+
+        return snapshot
+
+    @staticmethod
+    def _cache_revoked(api_key: APIKey) -> None:
+        """Store the revoked snapshot in the shared cache (raises on Redis errors)."""
+        with APIKeyService._local_lock:
+            APIKeyService._local.pop(api_key.key_hash, None)
+        snapshot = APIKeySnapshot(
+            id=api_key.id,
+            tenant_id=api_key.tenant_id,
+            scopes=tuple(api_key.scopes or ()),
+            is_active=False,
+            expires_at=api_key.expires_at,
+        )
+        get_redis().set(
+            f"{APIKeyService.CACHE_PREFIX}:{api_key.key_hash}",
+            snapshot.to_json(),
+            ex=settings.REDIS_CACHE_TTL,
+        )
+
+    @staticmethod
+    def invalidate(key_hash: str) -> None:
+        """Drop a key from the shared cache (workers' local copies expire within LOCAL_TTL)."""
+        with APIKeyService._local_lock:
+            APIKeyService._local.pop(key_hash, None)
+        try:
+            get_redis().delete(f"{APIKeyService.CACHE_PREFIX}:{key_hash}")
+        except Exception as e:
+            logger.error(f"API key cache invalidation failed: {str(e)}")
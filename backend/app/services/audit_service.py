@@ -0,0 +1,244 @@
+"""
+Audit Service: Batched, asynchronous AuditLog writes.
+
+Request handlers enqueue audit events on a bounded in-process queue and
+return immediately; enqueueing never blocks, so a full queue drops (and
+counts) the event instead of stalling the event loop. A writer thread
+inserts them in multi-row batches whenever AUDIT_BATCH_SIZE events are
+waiting or AUDIT_FLUSH_INTERVAL_MS has passed, and drains the queue on
+shutdown. A batch rejected for its data is bisected so the good events
+are written and each event that fails on its own goes to the dead-letter
+log; a batch that could not be written at all (database unreachable) is
+kept and retried with backoff.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.config import settings
+from app.database.models import AuditLog
+from app.database.session import SessionLocal
+from app.utils.metrics import AUDIT_EVENTS_DROPPED
+
+logger = logging.getLogger(__name__)
+# One line per event that could not be stored, for replay or inspection
+dead_letter_logger = logging.getLogger(f"{__name__}.dead_letter")
+
+# (ip_address, user_agent) of the request being handled, set by middleware
+_request_context: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar(
+    "audit_request_context", default=(None, None)
+)
+
+
+class AuditLogWriter:
+    """Bounded queue of audit events with a background batch writer."""
+
+    _queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(
+        maxsize=settings.AUDIT_QUEUE_SIZE
+    )
+    _thread: Optional[threading.Thread] = None
+    _dropped = 0
+    _lock = threading.Lock()
+
+    # Backoff between attempts to write a failed batch
+    RETRY_MIN_SECONDS = 1.0
+    RETRY_MAX_SECONDS = 30.0
+    SHUTDOWN_ATTEMPTS = 3
+
+    @staticmethod
+    def bind_request(request: Request) -> None:
+        """Remember the caller's IP and user agent for events recorded in this request."""
+        _request_context.set((
+            request.client.host if request.client else None,
+            request.headers.get("User-Agent"),
+        ))
+
+    @classmethod
+    def record(
+        cls,
+        tenant_id: Any,
+        action: str,
+        resource_type: str,
+        resource_id: Optional[Any] = None,
+        changes: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Enqueue an audit event.
+
+        Never touches the database and never blocks: when the queue is
+        full the event is dropped and counted.
+
+        Returns:
+            True if the event was queued
+        """
+        ip_address, user_agent = _request_context.get()
+        event = {
+            "id": uuid.uuid4(),
+            "tenant_id": tenant_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": str(resource_id) if resource_id is not None else None,
+            "changes": changes or {},
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": datetime.utcnow(),
+        }
+
+        try:
+            cls._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            dropped = cls._count_dropped(1, "queue_full")
+            logger.error(f"Audit queue full, dropped {action} for tenant {tenant_id} ({dropped} total)")
+            return False
+
+    @classmethod
+    def _count_dropped(cls, count: int, reason: str) -> int:
+        AUDIT_EVENTS_DROPPED.labels(reason=reason).inc(count)
+        with cls._lock:
+            cls._dropped += count
+            return cls._dropped
+
+    @classmethod
+    def start(cls) -> None:
+        """Start the writer thread (no-op if already running)."""
+        if cls._thread and cls._thread.is_alive():
+            return
+
+        cls._thread = threading.Thread(target=cls._run, name="audit-log-writer", daemon=True)
+        cls._thread.start()
+        logger.info("Started audit log writer")
+
+    @classmethod
+    def stop(cls, timeout: float = 10) -> None:
+        """Flush everything queued so far and stop the writer."""
+        if not cls._thread:
+            return
+
+        # Sentinel: the writer drains what is ahead of it, then exits
+        cls._queue.put(None)
+        cls._thread.join(timeout)
+        cls._thread = None
+
+    @classmethod
+    def _run(cls) -> None:
+        interval = settings.AUDIT_FLUSH_INTERVAL_MS / 1000
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + interval
+        retry_delay = 0.0
+
+        while True:
+            try:
+                event = cls._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                event = False
+
+            if event is None:
+                cls._flush_on_shutdown(batch)
+                return
+
+            if event:
+                batch.append(event)
+
+            # While retrying a failed batch only the backoff deadline triggers a write
+            full = len(batch) >= settings.AUDIT_BATCH_SIZE and not retry_delay
+            if full or time.monotonic() >= deadline:
+                batch = cls._flush(batch)
+                if not batch:
+                    retry_delay = 0.0
+                    deadline = time.monotonic() + interval
+                else:
+                    batch = cls._trim(batch)
+                    retry_delay = min(
+                        max(retry_delay * 2, cls.RETRY_MIN_SECONDS), cls.RETRY_MAX_SECONDS
+                    )
+                    deadline = time.monotonic() + retry_delay
+
+    @classmethod
+    def _trim(cls, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bound a batch held for retry to AUDIT_QUEUE_SIZE, dropping the oldest events."""
+        excess = len(batch) - settings.AUDIT_QUEUE_SIZE
+        if excess <= 0:
+            return batch
+        dropped = cls._count_dropped(excess, "write_failed")
+        logger.error(f"Audit writes keep failing, dropped {excess} oldest events ({dropped} total)")
+        return batch[excess:]
+
+    @classmethod
+    def _flush_on_shutdown(cls, batch: List[Dict[str, Any]]) -> None:
+        for attempt in range(cls.SHUTDOWN_ATTEMPTS):
+            batch = cls._flush(batch)
+            if not batch:
+                return
+            if attempt + 1 < cls.SHUTDOWN_ATTEMPTS:
+                time.sleep(cls.RETRY_MIN_SECONDS)
+        dropped = cls._count_dropped(len(batch), "write_failed")
+        logger.error(f"Dropped {len(batch)} audit events on shutdown ({dropped} total)")
+
+    @classmethod
+    def _flush(cls, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert a batch with one multi-row INSERT.
+
+        If the database rejects the batch for its data (constraint, bad
+        value, no partition for the row), the batch is bisected until the
+        offending events are isolated; those go to the dead-letter log and
+        the rest are written. Any other error stops the flush.
+
+        Returns:
+            Events still to be written (retry them later); empty when done
+        """
+        chunks = [batch] if batch else []
+        while chunks:
+            chunk = chunks.pop()
+            error = cls._insert(chunk)
+            if error is None:
+                continue
+
+            if not isinstance(error, (IntegrityError, DataError)):
+                remaining = chunk + [event for rest in reversed(chunks) for event in rest]
+                logger.error(f"Failed to write {len(remaining)} audit events, will retry: {str(error)}")
+                return remaining
+
+            if len(chunk) == 1:
+                cls._dead_letter(chunk[0], error)
+            else:
+                middle = len(chunk) // 2
+                # Popped from the end: the older half goes first
+                chunks.extend([chunk[middle:], chunk[:middle]])
+        return []
+
+    @staticmethod
+    def _insert(events: List[Dict[str, Any]]) -> Optional[Exception]:
+        """Insert events in one statement; returns the error instead of raising."""
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog), events)
+            db.commit()
+            logger.debug(f"Wrote {len(events)} audit events")
+            return None
+        except Exception as e:
+            db.rollback()
+            return e
+        finally:
+            db.close()
+
+    @classmethod
+    def _dead_letter(cls, event: Dict[str, Any], error: Exception) -> None:
+        dropped = cls._count_dropped(1, "rejected")
+        dead_letter_logger.error(json.dumps(event, default=str))
+        logger.error(
+            f"Audit event {event['action']} for tenant {event['tenant_id']} rejected, "
+            f"sent to dead-letter log ({dropped} dropped total): {str(error).splitlines()[0]}"
+        )
@@ -4,30 +4,38 @@ Production-grade integration with comprehensive error handling.
 """
 
 import logging
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from decimal import Decimal
-import stripe
-from stripe.error import StripeError, CardError, RateLimitError
+
+from sqlalchemy import select, update, values, column, cast, or_, DateTime, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.database.models import Tenant, TransactionType, TransactionHistory
+from app.database.models import Tenant, TransactionType, TransactionHistory, Usage
+from app.database.session import SessionLocal
+from app.services.abuse_service import AbuseSignalEngine
+from app.integrations.stripe_cache import StripeObjectCache
+from app.integrations.stripe_gateway import StripeGateway, stripe
+from app.utils.cache import ResponseCache, CacheTag
 
 logger = logging.getLogger(__name__)
 
-# Initialize Stripe
-stripe.api_key = settings.STRIPE_API_KEY
-
 
 class BillingService:
     """Stripe payment processing and subscription management."""
     
-    # Mapping of tiers to Stripe price IDs (set these in Stripe dashboard first)
+    # Fallback price IDs for tiers without a "<tier>_<billing_cycle>" lookup key in Stripe
     STRIPE_PRICE_IDS = {
         "starter": "price_1starter",
         "growth": "price_1growth",
         "enterprise": "price_1enterprise",
     }
     
+    # Cap on the delay between retries of a failing usage report
+    USAGE_REPORT_MAX_BACKOFF_SECONDS = 86400
+    
     @staticmethod
     def create_customer(tenant: Tenant) -> str:
         """
@@ -43,7 +51,9 @@ class BillingService:
             StripeError: If Stripe API call fails
         """
         try:
-            customer = stripe.Customer.create(
+            customer = StripeGateway.request(
+                stripe.Customer.create,
+                idempotency_key=StripeGateway.idempotency_key("customer-create", tenant.id),
                 email=tenant.company_email,
                 name=tenant.company_name,
                 metadata={
@@ -54,7 +64,7 @@ class BillingService:
             logger.info(f"Created Stripe customer {customer.id} for tenant {tenant.id}")
             return customer.id
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Failed to create Stripe customer: {str(e)}")
             raise
     
@@ -63,7 +73,8 @@ class BillingService:
         tenant: Tenant,
         tier: str,
         billing_cycle: str = "monthly",
-        trial_days: int = settings.TRIAL_DAYS
+        trial_days: int = settings.TRIAL_DAYS,
+        promotion_code: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Create a checkout session for subscription signup.
@@ -80,6 +91,7 @@ class BillingService:
             tier: Subscription tier (starter, growth, enterprise)
             billing_cycle: "monthly" or "yearly"
             trial_days: Number of trial days
+            promotion_code: Customer-facing promotion code to apply
         
         Returns:
             Dictionary with checkout_url and session_id
@@ -89,12 +101,19 @@ class BillingService:
         """
         try:
             # Determine price ID
-            price_id = BillingService.STRIPE_PRICE_IDS.get(tier.lower())
-            if not price_id:
-                raise ValueError(f"Invalid subscription tier: {tier}")
+            price_id = BillingService.get_price_id(tier, billing_cycle)
+            
+            discounts = []
+            if promotion_code:
+                promotion_code_id = BillingService.get_promotion_code_id(promotion_code)
+                if not promotion_code_id:
+                    raise ValueError(f"Unknown promotion code: {promotion_code}")
+                discounts.append({"promotion_code": promotion_code_id})
             
             # Create checkout session with trial
-            session = stripe.checkout.Session.create(
+            session = StripeGateway.request(
+                stripe.checkout.Session.create,
+                idempotency_key=StripeGateway.idempotency_key(),
                 customer=tenant.stripe_customer_id,
                 payment_method_types=["card"],
                 line_items=[
@@ -104,6 +123,7 @@ class BillingService:
                     }
                 ],
                 mode="subscription",
+                discounts=discounts or None,
                 success_url=f"{settings.FRONTEND_URL}/dashboard?session_id={{CHECKOUT_SESSION_ID}}",
                 cancel_url=f"{settings.FRONTEND_URL}/onboarding",
                 subscription_data={
@@ -126,7 +146,7 @@ class BillingService:
                 "trial_days": trial_days
             }
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Failed to create checkout session: {str(e)}")
             raise
     
@@ -140,7 +160,9 @@ class BillingService:
             Dictionary with client_secret for Stripe.js
         """
         try:
-            intent = stripe.SetupIntent.create(
+            intent = StripeGateway.request(
+                stripe.SetupIntent.create,
+                idempotency_key=StripeGateway.idempotency_key(),
                 customer=tenant.stripe_customer_id,
                 payment_method_types=["card"],
                 metadata={
@@ -155,7 +177,7 @@ class BillingService:
                 "setup_intent_id": intent.id
             }
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Failed to create SetupIntent: {str(e)}")
             raise
     
@@ -164,7 +186,7 @@ class BillingService:
         tenant: Tenant,
         domain_name: str,
         amount_cents: int,
-        db = None
+        purchase_id: str
     ) -> Dict[str, Any]:
         """
         Charge customer immediately for domain purchase.
@@ -175,11 +197,16 @@ class BillingService:
         - Card charged immediately
         - Domain provisioning triggered on success
         
+        Only talks to Stripe, so it can run on the Stripe pool; record the
+        charge with record_domain_charge from the caller's own thread.
+        
         Args:
-            tenant: Tenant purchasing domain
+            tenant: Tenant purchasing domain (only its loaded id and customer id are read)
             domain_name: Domain being purchased
             amount_cents: Amount to charge in cents (e.g., 1200 = $12.00)
-            db: Database session for logging
+            purchase_id: Caller's id for this purchase; retries of the same
+                request reuse it, a new purchase (even of the same domain at
+                the same price) must not
         
         Returns:
             Dictionary with payment_intent details
@@ -189,7 +216,12 @@ class BillingService:
             StripeError: Other errors
         """
         try:
-            intent = stripe.PaymentIntent.create(
+            intent = StripeGateway.request(
+                stripe.PaymentIntent.create,
+                # A retried purchase returns the first PaymentIntent
+                idempotency_key=StripeGateway.idempotency_key(
+                    "domain-purchase", tenant.id, purchase_id
+                ),
                 customer=tenant.stripe_customer_id,
                 amount=amount_cents,
                 currency="usd",
@@ -198,7 +230,8 @@ class BillingService:
                 metadata={
                     "tenant_id": str(tenant.id),
                     "domain_name": domain_name,
-                    "transaction_type": "domain_purchase"
+                    "transaction_type": "domain_purchase",
+                    "purchase_id": purchase_id,
                 }
             )
             
@@ -207,19 +240,6 @@ class BillingService:
                 f"(amount=${amount_cents/100:.2f})"
             )
             
-            # Log transaction
-            if db:
-                transaction = TransactionHistory(
-                    tenant_id=tenant.id,
-                    transaction_type=TransactionType.DOMAIN_PURCHASE,
-                    description=f"Purchased domain {domain_name}",
-                    amount=amount_cents,
-                    stripe_transaction_id=intent.id,
-                    status="pending"
-                )
-                db.add(transaction)
-                db.commit()
-            
             return {
                 "payment_intent_id": intent.id,
                 "client_secret": intent.client_secret,
@@ -227,19 +247,56 @@ class BillingService:
                 "amount": intent.amount
             }
         
-        except CardError as e:
+        except stripe.error.CardError as e:
             logger.warning(f"Card declined for tenant {tenant.id}: {str(e)}")
+            AbuseSignalEngine.record(
+                "payment_failed", tenant.id, details={"domain_name": domain_name, "error": e.code}
+            )
             raise
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Payment intent creation failed: {str(e)}")
             raise
     
+    @staticmethod
+    def record_domain_charge(
+        tenant_id: Any,
+        domain_name: str,
+        amount_cents: int,
+        payment_intent_id: str,
+        db: Session
+    ) -> None:
+        """
+        Log a domain purchase PaymentIntent in the ledger.
+        
+        Logged once: a retried purchase gets the same PaymentIntent back.
+        """
+        if db.scalar(
+            select(TransactionHistory.id)
+            .where(
+                TransactionHistory.tenant_id == tenant_id,
+                TransactionHistory.stripe_transaction_id == payment_intent_id,
+            )
+            .limit(1)
+        ):
+            return
+        
+        db.add(TransactionHistory(
+            tenant_id=tenant_id,
+            transaction_type=TransactionType.DOMAIN_PURCHASE,
+            description=f"Purchased domain {domain_name}",
+            amount=amount_cents,
+            stripe_transaction_id=payment_intent_id,
+            status="pending"
+        ))
+        db.commit()
+        ResponseCache.invalidate(tenant_id, CacheTag.BILLING)
+    
     @staticmethod
     def confirm_payment_intent(payment_intent_id: str) -> Dict[str, Any]:
         """Retrieve and confirm a PaymentIntent."""
         try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            intent = StripeGateway.request(stripe.PaymentIntent.retrieve, payment_intent_id)
             
             return {
                 "status": intent.status,
@@ -247,13 +304,14 @@ class BillingService:
                 "client_secret": intent.client_secret
             }
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Failed to retrieve PaymentIntent: {str(e)}")
             raise
     
     @staticmethod
     def refund_charge(
         charge_id: str,
+        refund_request_id: str,
         amount_cents: Optional[int] = None,
         reason: Optional[str] = None
     ) -> Dict[str, Any]:
@@ -262,6 +320,8 @@ class BillingService:
         
         Args:
             charge_id: Stripe charge ID or PaymentIntent ID
+            refund_request_id: Caller's id for this refund; retries of the same
+                request reuse it, separate refunds (even of equal amounts) must not
             amount_cents: Amount to refund (None = full refund)
             reason: Reason for refund
         
@@ -269,12 +329,17 @@ class BillingService:
             Refund details
         """
         try:
-            refund = stripe.Refund.create(
+            refund = StripeGateway.request(
+                stripe.Refund.create,
+                idempotency_key=StripeGateway.idempotency_key(
+                    "refund", charge_id, refund_request_id
+                ),
                 payment_intent=charge_id,
                 amount=amount_cents,
                 reason=reason,
                 metadata={
-                    "reason": reason or "customer_request"
+                    "reason": reason or "customer_request",
+                    "refund_request_id": refund_request_id,
                 }
             )
             
@@ -286,7 +351,7 @@ class BillingService:
                 "status": refund.status
             }
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Refund failed: {str(e)}")
             raise
     
@@ -330,7 +395,7 @@ class BillingService:
             logger.error(f"Webhook signature verification failed: {str(e)}")
             raise
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Webhook processing error: {str(e)}")
             raise
     
@@ -338,11 +403,15 @@ class BillingService:
     def retry_charge(payment_intent_id: str) -> Dict[str, Any]:
         """Retry a failed payment (for trial-to-paid conversion)."""
         try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            intent = StripeGateway.request(stripe.PaymentIntent.retrieve, payment_intent_id)
             
             if intent.status == "requires_payment_method":
                 # Payment failed, try again
-                intent = stripe.PaymentIntent.confirm(payment_intent_id)
+                intent = StripeGateway.request(
+                    stripe.PaymentIntent.confirm,
+                    payment_intent_id,
+                    idempotency_key=StripeGateway.idempotency_key()
+                )
             
             logger.info(f"Retried PaymentIntent {payment_intent_id}, status: {intent.status}")
             
@@ -351,15 +420,15 @@ class BillingService:
                 "amount": intent.amount
             }
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Retry charge failed: {str(e)}")
             raise
     
     @staticmethod
     def get_subscription(subscription_id: str) -> Dict[str, Any]:
-        """Get subscription details from Stripe."""
-        try:
-            sub = stripe.Subscription.retrieve(subscription_id)
+        """Get subscription details (cached until a customer.subscription.* event)."""
+        def load() -> Dict[str, Any]:
+            sub = StripeGateway.request(stripe.Subscription.retrieve, subscription_id)
             return {
                 "id": sub.id,
                 "customer": sub.customer,
@@ -368,27 +437,210 @@ class BillingService:
                 "current_period_end": sub.current_period_end,
                 "trial_start": sub.trial_start,
                 "trial_end": sub.trial_end,
+                # Price ID -> subscription item ID (metered usage is reported per item)
+                "items": {item.price.id: item.id for item in sub["items"].data},
             }
-        except StripeError as e:
+        
+        try:
+            return StripeObjectCache.get_or_load(
+                StripeObjectCache.SUBSCRIPTION, subscription_id, load,
+                ttl=settings.STRIPE_OBJECT_CACHE_TTL
+            )
+        except stripe.error.StripeError as e:
             logger.error(f"Failed to retrieve subscription: {str(e)}")
             raise
     
+    @staticmethod
+    def get_price_id(tier: str, billing_cycle: str = "monthly") -> str:
+        """
+        Stripe price ID of a tier (cached until a price.* event).
+        
+        Resolved through the price's lookup key, e.g. "growth_monthly".
+        
+        Raises:
+            ValueError: If the tier is unknown
+        """
+        tier = tier.lower()
+        if tier not in BillingService.STRIPE_PRICE_IDS:
+            raise ValueError(f"Invalid subscription tier: {tier}")
+        lookup_key = f"{tier}_{billing_cycle.lower()}"
+        
+        def load() -> str:
+            prices = StripeGateway.request(
+                stripe.Price.list, lookup_keys=[lookup_key], active=True, limit=1
+            )
+            if prices.data:
+                return prices.data[0].id
+            return BillingService.STRIPE_PRICE_IDS[tier]
+        
+        return StripeObjectCache.get_or_load(
+            StripeObjectCache.PRICE, lookup_key, load, ttl=settings.STRIPE_CATALOG_CACHE_TTL
+        )
+    
+    @staticmethod
+    def get_promotion_code_id(code: str) -> Optional[str]:
+        """ID of an active promotion code, or None (cached until a promotion_code.* event)."""
+        def load() -> Optional[str]:
+            promotion_codes = StripeGateway.request(
+                stripe.PromotionCode.list, code=code, active=True, limit=1
+            )
+            return promotion_codes.data[0].id if promotion_codes.data else None
+        
+        try:
+            return StripeObjectCache.get_or_load(
+                StripeObjectCache.PROMOTION_CODE, code, load, ttl=settings.STRIPE_CATALOG_CACHE_TTL
+            )
+        except stripe.error.StripeError as e:
+            logger.error(f"Failed to get promotion code: {str(e)}")
+            raise
+    
     @staticmethod
     def cancel_subscription(subscription_id: str, at_period_end: bool = False) -> Dict[str, Any]:
         """Cancel a subscription."""
         try:
             if at_period_end:
-                sub = stripe.Subscription.modify(
+                sub = StripeGateway.request(
+                    stripe.Subscription.modify,
                     subscription_id,
                     cancel_at_period_end=True
                 )
             else:
-                sub = stripe.Subscription.delete(subscription_id)
+                sub = StripeGateway.request(stripe.Subscription.delete, subscription_id)
             
+            StripeObjectCache.invalidate(StripeObjectCache.SUBSCRIPTION, subscription_id)
             logger.info(f"Cancelled subscription {subscription_id}")
             
             return {"status": sub.status}
         
-        except StripeError as e:
+        except stripe.error.StripeError as e:
             logger.error(f"Failed to cancel subscription: {str(e)}")
             raise
+    
+    @staticmethod
+    def _report_backoff(attempts: int) -> timedelta:
+        """Delay before retrying a usage report that failed `attempts` times in a row."""
+        seconds = settings.USAGE_REPORT_SECONDS * 2 ** min(attempts - 1, 16)
+        return timedelta(seconds=min(seconds, BillingService.USAGE_REPORT_MAX_BACKOFF_SECONDS))
+    
+    @staticmethod
+    def report_overage_usage() -> int:
+        """
+        Push changed inbox overages to Stripe (the usage reporter's periodic call).
+        
+        One usage record per billing period whose overage changed since the
+        last report, with action "set": the record carries the period total,
+        so a repeated report never double-bills, and the idempotency key
+        makes a retried call a no-op. A period that fails (no overage item,
+        Stripe error) is retried with exponential backoff, so failing rows
+        cannot occupy the whole batch and starve everyone else.
+        
+        Returns:
+            Number of periods reported
+        """
+        price_id = settings.STRIPE_OVERAGE_PRICE_ID
+        if not price_id:
+            return 0
+        
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(
+                    Usage.id,
+                    Usage.tenant_id,
+                    Usage.inbox_overage,
+                    Usage.billing_period_end,
+                    Usage.report_attempts,
+                    Tenant.stripe_subscription_id,
+                )
+                .join(Tenant, Tenant.id == Usage.tenant_id)
+                .where(
+                    Usage.inbox_overage != Usage.reported_overage,
+                    or_(Usage.next_report_at.is_(None), Usage.next_report_at <= now),
+                    Tenant.stripe_subscription_id.isnot(None),
+                )
+                .order_by(Usage.updated_at)
+                .limit(settings.USAGE_REPORT_BATCH_SIZE)
+            ).all()
+            db.rollback()
+            
+            reported = []
+            failed = []
+            for row in rows:
+                try:
+                    subscription = BillingService.get_subscription(row.stripe_subscription_id)
+                    item_id = subscription.get("items", {}).get(price_id)
+                    if item_id is None:
+                        # Left unreported so the overage is billed once the item exists
+                        logger.error(
+                            f"Subscription {row.stripe_subscription_id} of tenant {row.tenant_id} "
+                            f"has no overage item, inbox overage {row.inbox_overage} not billed"
+                        )
+                        failed.append(row)
+                        continue
+                    
+                    timestamp = min(now, row.billing_period_end - timedelta(seconds=1))
+                    StripeGateway.request(
+                        stripe.SubscriptionItem.create_usage_record,
+                        item_id,
+                        idempotency_key=StripeGateway.idempotency_key(
+                            "usage", row.id, row.inbox_overage
+                        ),
+                        quantity=row.inbox_overage,
+                        timestamp=int((timestamp - datetime(1970, 1, 1)).total_seconds()),
+                        action="set",
+                    )
+                    reported.append((str(row.id), row.inbox_overage))
+                
+                except Exception as e:
+                    # One bad row must not hold back the rest of the batch
+                    logger.error(f"Usage report failed for tenant {row.tenant_id}: {str(e)}")
+                    failed.append(row)
+            
+            if reported:
+                reports = values(
+                    column("id", UUID(as_uuid=False)),
+                    column("quantity", Integer),
+                    name="reports",
+                ).data(reported)
+                db.execute(
+                    update(Usage)
+                    .where(Usage.id == cast(reports.c.id, UUID(as_uuid=True)))
+                    .values(
+                        reported_overage=reports.c.quantity,
+                        reported_at=now,
+                        report_attempts=0,
+                        next_report_at=None,
+                    ),
+                    execution_options={"synchronize_session": False},
+                )
+            
+            if failed:
+                retries = values(
+                    column("id", UUID(as_uuid=False)),
+                    column("attempts", Integer),
+                    column("retry_at", DateTime),
+                    name="retries",
+                ).data([
+                    (
+                        str(row.id),
+                        row.report_attempts + 1,
+                        now + BillingService._report_backoff(row.report_attempts + 1),
+                    )
+                    for row in failed
+                ])
+                db.execute(
+                    update(Usage)
+                    .where(Usage.id == cast(retries.c.id, UUID(as_uuid=True)))
+                    .values(report_attempts=retries.c.attempts, next_report_at=retries.c.retry_at),
+                    execution_options={"synchronize_session": False},
+                )
+            
+            if reported or failed:
+                db.commit()
+        finally:
+            db.close()
+        
+        if reported:
+            logger.info(f"Reported inbox overage for {len(reported)} billing periods")
+        return len(reported)
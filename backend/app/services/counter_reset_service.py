@@ -0,0 +1,166 @@
+"""
+Counter Reset Service: Day and month rollover of inbox send counters.
+
+Inbox.emails_sent_today and emails_sent_this_month are zeroed on UTC day
+and month boundaries. Each chunk of inboxes (a primary-key range) is one
+statement that snapshots the closing values into inbox_usage_history and
+subtracts them from the live counters, committed on its own, so row locks
+are held for one chunk only and sends recorded meanwhile are kept.
+
+The snapshot's unique (inbox_id, period, period_start) key makes a reset
+idempotent: an interrupted run is simply run again.
+"""
+
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.database.redis_client import get_redis
+from app.database.session import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant identifying the reset advisory lock
+_LOCK_ID = 7_340_044
+
+
+class SendCounterReset:
+    """Chunked, set-based reset of per-inbox send counters."""
+
+    # Period -> Inbox counter it closes
+    COUNTERS = {
+        "day": "emails_sent_today",
+        "month": "emails_sent_this_month",
+    }
+
+    DONE_KEY = "usage_reset:done:{period}:{period_start}"
+    DONE_TTL = 40 * 86400
+
+    # Periods finished by this process (when Redis is unavailable)
+    _completed: Set[Tuple[str, date]] = set()
+
+    @classmethod
+    def run_due(cls, engine: Optional[Engine] = None) -> Dict[str, int]:
+        """
+        Close the previous day and month if that has not happened yet.
+
+        Cheap when there is nothing to do: one Redis lookup per period.
+
+        Returns:
+            Inboxes reset per period
+        """
+        today = datetime.utcnow().date()
+        due = {
+            "day": today - timedelta(days=1),
+            "month": (today.replace(day=1) - timedelta(days=1)).replace(day=1),
+        }
+
+        report = {}
+        for period, period_start in due.items():
+            if cls._is_done(period, period_start):
+                continue
+            reset = cls.reset(period, period_start, engine)
+            if reset is not None:
+                report[period] = reset
+                cls._mark_done(period, period_start)
+        return report
+
+    @classmethod
+    def reset(cls, period: str, period_start: date, engine: Optional[Engine] = None) -> Optional[int]:
+        """
+        Snapshot and zero one counter across all inboxes.
+
+        Args:
+            period: "day" or "month"
+            period_start: First day of the period being closed
+            engine: Engine to run on (the primary by default)
+
+        Returns:
+            Number of inboxes reset, or None if another worker holds the lock
+        """
+        column = cls.COUNTERS[period]
+        chunk_size = settings.USAGE_RESET_CHUNK_SIZE
+        started = time.perf_counter()
+        total = 0
+
+        with (engine or default_engine).connect() as conn:
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": _LOCK_ID}).scalar():
+                logger.info(f"Counter reset ({period}) already running elsewhere, skipping")
+                conn.rollback()
+                return None
+            conn.commit()
+
+            try:
+                lower = None
+                while True:
+                    # Upper bound of the next chunk, walking the primary key index
+                    upper = conn.execute(text(f"""
+                        SELECT id FROM inboxes
+                        {"WHERE id > :lower" if lower else ""}
+                        ORDER BY id OFFSET :offset LIMIT 1
+                    """), {"lower": lower, "offset": chunk_size - 1}).scalar()
+
+                    bounds = []
+                    if lower:
+                        bounds.append("id > :lower")
+                    if upper:
+                        bounds.append("id <= :upper")
+
+                    total += conn.execute(text(f"""
+                        WITH snapshot AS (
+                            INSERT INTO inbox_usage_history
+                                (id, inbox_id, tenant_id, period, period_start, emails_sent, created_at)
+                            SELECT gen_random_uuid(), id, tenant_id, :period, :period_start,
+                                   {column}, now() AT TIME ZONE 'utc'
+                            FROM inboxes
+                            WHERE {" AND ".join(bounds + [f"{column} > 0"])}
+                            ON CONFLICT ON CONSTRAINT uq_inbox_usage_period DO NOTHING
+                            RETURNING inbox_id, emails_sent
+                        )
+                        UPDATE inboxes SET {column} = inboxes.{column} - snapshot.emails_sent
+                        FROM snapshot
+                        WHERE inboxes.id = snapshot.inbox_id
+                    """), {
+                        "lower": lower,
+                        "upper": upper,
+                        "period": period,
+                        "period_start": period_start,
+                    }).rowcount
+                    conn.commit()
+
+                    if upper is None:
+                        break
+                    lower = upper
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
+                conn.commit()
+
+        logger.info(
+            f"Reset {column} for {total} inboxes ({period} {period_start}) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return total
+
+    @classmethod
+    def _is_done(cls, period: str, period_start: date) -> bool:
+        if (period, period_start) in cls._completed:
+            return True
+        try:
+            return bool(get_redis().exists(cls.DONE_KEY.format(period=period, period_start=period_start)))
+        except Exception:
+            return False
+
+    @classmethod
+    def _mark_done(cls, period: str, period_start: date) -> None:
+        cls._completed.add((period, period_start))
+        try:
+            get_redis().set(
+                cls.DONE_KEY.format(period=period, period_start=period_start), 1, ex=cls.DONE_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Could not record counter reset ({period} {period_start}): {str(e)}")
@@ -6,13 +6,19 @@ Supports multiple registrars via adapter pattern.
 import logging
 from typing import Optional, Dict, List, Any
 from datetime import datetime
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.database.models import (
-    Tenant, Domain, DomainStatus, TransactionHistory, TransactionType
+    Tenant, Domain, DomainStatus, Inbox, InboxStatus, SuspensionSource, TransactionHistory,
+    TransactionType
 )
+from app.services.metering_service import UsageMeter
 from app.services.registrar_service import NamecheapRegistrar
 from app.integrations.cloudflare_client import CloudflareClient
+from app.services.relay_service import RelayService
+from app.services.purge_service import PurgeService
+from app.utils.cache import ResponseCache, CacheTag
 
 logger = logging.getLogger(__name__)
 
@@ -127,10 +133,16 @@ class DomainService:
             db.refresh(domain)
             
             # Update tenant domain count
-            tenant.domains_count = db.query(Domain).filter(Domain.tenant_id == tenant.id).count()
+            tenant.domains_count = db.query(Domain).filter(
+                Domain.tenant_id == tenant.id,
+                Domain.status != DomainStatus.DELETED
+            ).count()
             db.add(tenant)
             db.commit()
             
+            ResponseCache.invalidate(tenant.id, CacheTag.DOMAINS, CacheTag.BILLING)
+            UsageMeter.record(tenant.id, "domains_added")
+            
             logger.info(f"Domain {domain_name} created in database for tenant {tenant.id}")
             
             return domain
@@ -184,6 +196,8 @@ class DomainService:
             db.commit()
             db.refresh(domain)
             
+            ResponseCache.invalidate(domain.tenant_id, CacheTag.DOMAINS)
+            
             logger.info(f"DNS configured for domain {domain.domain_name}")
             
             return dns_records
@@ -219,6 +233,8 @@ class DomainService:
             db.commit()
             db.refresh(domain)
             
+            ResponseCache.invalidate(domain.tenant_id, CacheTag.DOMAINS)
+            
             logger.info(f"Domain {domain.domain_name} authorized in KumoMTA")
             
             return True
@@ -228,36 +244,54 @@ class DomainService:
             raise
     
     @staticmethod
-    def get_domain_health(domain: Domain) -> Dict[str, Any]:
+    def get_domain_health(domain: Domain, db: Session) -> Dict[str, Any]:
         """Get domain health status (deliverability, warmup progress, etc.)."""
-        from app.database.models import Inbox
+        # One aggregate instead of loading every inbox row
+        inboxes = db.query(
+            func.count(Inbox.id).label("total"),
+            func.count(Inbox.id).filter(Inbox.status == InboxStatus.ACTIVE).label("active"),
+            func.avg(Inbox.health_score).label("avg_health"),
+        ).filter(Inbox.domain_id == domain.id, Inbox.status != InboxStatus.DELETED).one()
         
         return {
             "domain_name": domain.domain_name,
             "status": domain.status,
             "dns_verified": domain.dns_verified_at is not None,
             "kumo_authorized": domain.kumo_authorized,
-            "inboxes_count": len(domain.inboxes),
-            "active_inboxes": sum(1 for inbox in domain.inboxes if inbox.status == "active"),
-            "avg_health_score": sum(inbox.health_score for inbox in domain.inboxes) / len(domain.inboxes) if domain.inboxes else 0,
+            "inboxes_count": inboxes.total,
+            "active_inboxes": inboxes.active,
+            "avg_health_score": float(inboxes.avg_health or 0),
             "expiry_date": domain.expiry_date
         }
     
     @staticmethod
     def suspend_domain(domain: Domain, reason: str, db: Session) -> Domain:
-        """Suspend a domain (e.g., for abuse)."""
+        """
+        Suspend a domain (e.g., for abuse).
+        
+        Raises:
+            ValueError: If the domain is deleted (suspending would take it
+                out of the purge queue)
+        """
+        # Locked so a concurrent soft delete cannot be overwritten
+        db.refresh(domain, with_for_update=True)
+        if domain.status == DomainStatus.DELETED:
+            db.rollback()
+            raise ValueError("Cannot suspend a deleted domain")
+        
         domain.status = DomainStatus.SUSPENDED
         domain.metadata = domain.metadata or {}
         domain.metadata["suspension_reason"] = reason
         domain.metadata["suspended_at"] = datetime.utcnow().isoformat()
         
         db.add(domain)
-        db.commit()
+        # Commits the domain status together with its inboxes
+        RelayService.suspend_inboxes(db, "domain", SuspensionSource.DOMAIN, Inbox.domain_id == domain.id)
         db.refresh(domain)
         
-        logger.warning(f"Domain {domain.domain_name} suspended: {reason}")
+        ResponseCache.invalidate(domain.tenant_id, CacheTag.DOMAINS, CacheTag.INBOXES)
         
-        # TODO: Remove from KumoMTA authorized list
+        logger.warning(f"Domain {domain.domain_name} suspended: {reason}")
         
         return domain
     
@@ -269,38 +303,66 @@ class DomainService:
         domain.metadata.pop("suspension_reason", None)
         
         db.add(domain)
-        db.commit()
+        # While the tenant is suspended its inboxes wait for the tenant instead
+        RelayService.transfer_suspensions(
+            db, SuspensionSource.DOMAIN, SuspensionSource.ACCOUNT,
+            Inbox.domain_id == domain.id,
+            Inbox.tenant_id.in_(select(Tenant.id).where(Tenant.is_suspended.is_(True))),
+        )
+        RelayService.restore_inboxes(db, SuspensionSource.DOMAIN, Inbox.domain_id == domain.id)
         db.refresh(domain)
         
-        logger.info(f"Domain {domain.domain_name} reactivated")
+        ResponseCache.invalidate(domain.tenant_id, CacheTag.DOMAINS, CacheTag.INBOXES)
+        
+        # Imported here: the abuse engine itself depends on this service
+        from app.services.abuse_service import AbuseSignalEngine
+        AbuseSignalEngine.release_trips("domain", domain.id)
         
-        # TODO: Re-add to KumoMTA authorized list
+        logger.info(f"Domain {domain.domain_name} reactivated")
         
         return domain
     
     @staticmethod
     def list_domains_for_tenant(tenant_id: str, db: Session) -> List[Domain]:
         """List all domains for a tenant."""
-        return db.query(Domain).filter(Domain.tenant_id == tenant_id).all()
+        return db.query(Domain).filter(
+            Domain.tenant_id == tenant_id,
+            Domain.status != DomainStatus.DELETED
+        ).all()
+    
+    @staticmethod
+    def count_inboxes_by_domain(tenant_id: str, db: Session) -> Dict[Any, int]:
+        """Inbox count per domain of a tenant, in one grouped query."""
+        return dict(
+            db.query(Inbox.domain_id, func.count(Inbox.id))
+            .filter(Inbox.tenant_id == tenant_id, Inbox.status != InboxStatus.DELETED)
+            .group_by(Inbox.domain_id)
+            .all()
+        )
     
     @staticmethod
     def get_domain_by_id(domain_id: str, db: Session) -> Optional[Domain]:
-        """Get domain by ID."""
-        return db.query(Domain).filter(Domain.id == domain_id).first()
+        """Get domain by ID (deleted domains are not returned)."""
+        return db.query(Domain).filter(
+            Domain.id == domain_id,
+            Domain.status != DomainStatus.DELETED
+        ).first()
     
     @staticmethod
-    def delete_domain(domain_id: str, db: Session) -> bool:
-        """Delete a domain (soft delete recommended in production)."""
-        domain = db.query(Domain).filter(Domain.id == domain_id).first()
+    def delete_domain(domain_id: str, db: Session) -> Optional[int]:
+        """
+        Delete a domain and its inboxes.
+        
+        Soft-deletes in one statement and leaves row removal, KumoMTA and
+        Cloudflare cleanup to the purge worker.
+        
+        Returns:
+            Number of inboxes queued for purging, or None if not found
+        """
+        domain = DomainService.get_domain_by_id(domain_id, db)
         if not domain:
-            return False
+            return None
         
         # TODO: Cancel with registrar
-        # TODO: Remove from Cloudflare
-        # TODO: Remove from KumoMTA
-        
-        db.delete(domain)
-        db.commit()
         
-        logger.info(f"Domain {domain.domain_name} deleted")
-        return True
+        return PurgeService.soft_delete_domain(domain, db)
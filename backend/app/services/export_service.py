@@ -0,0 +1,241 @@
+"""
+Export Service: Columnar bulk export of tenant data.
+Streams Arrow IPC or Parquet in column batches read from a server-side cursor.
+"""
+
+import json
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import Iterator, List, Optional
+
+from sqlalchemy import select, Boolean, DateTime, Float, Integer, Numeric
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+
+from app.config import settings
+from app.database.models import Inbox, TransactionHistory, AuditLog
+from app.database.session import ReadSessionLocal
+from app.utils.lazy import LazyModule
+
+logger = logging.getLogger(__name__)
+
+pa = LazyModule("pyarrow")
+pq = LazyModule("pyarrow.parquet")
+
+
+class ExportFormat(str, Enum):
+    """Supported export formats."""
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
+class _ChunkSink:
+    """Write-only file object that hands out what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ExportService:
+    """Stream Inbox, TransactionHistory and AuditLog rows as columnar batches."""
+
+    DATASETS = {
+        "inboxes": Inbox,
+        "transactions": TransactionHistory,
+        "audit-logs": AuditLog,
+    }
+
+    # Never exported, even when explicitly requested
+    EXCLUDED_COLUMNS = {"password"}
+
+    MEDIA_TYPES = {
+        ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+        ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    }
+
+    FILE_EXTENSIONS = {
+        ExportFormat.ARROW: "arrows",
+        ExportFormat.PARQUET: "parquet",
+    }
+
+    @staticmethod
+    def available_columns(dataset: str) -> List[str]:
+        """List exportable columns of a dataset, in table order."""
+        model = ExportService.DATASETS[dataset]
+        return [
+            c.name for c in model.__table__.columns
+            if c.name not in ExportService.EXCLUDED_COLUMNS
+        ]
+
+    @staticmethod
+    def resolve_columns(dataset: str, columns: Optional[List[str]]) -> List[str]:
+        """
+        Validate a column selection.
+
+        Raises:
+            ValueError: If the dataset or a column is unknown
+        """
+        if dataset not in ExportService.DATASETS:
+            raise ValueError(f"Unknown dataset: {dataset}")
+
+        available = ExportService.available_columns(dataset)
+        if not columns:
+            return available
+
+        unknown = [c for c in columns if c not in available]
+        if unknown:
+            raise ValueError(f"Unknown columns for {dataset}: {', '.join(unknown)}")
+
+        return columns
+
+    @staticmethod
+    def _arrow_field(column) -> "pa.Field":
+        """Map a SQLAlchemy column to an Arrow field."""
+        col_type = column.type
+        if isinstance(col_type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(col_type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(col_type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(col_type, (Float, Numeric)):
+            arrow_type = pa.float64()
+        elif isinstance(col_type, ARRAY):
+            arrow_type = pa.list_(pa.string())
+        else:
+            # UUID, enums, strings and JSON are exported as strings
+            arrow_type = pa.string()
+        return pa.field(column.name, arrow_type)
+
+    @staticmethod
+    def _converter(column):
+        """Per-value converter from DB value to an Arrow-compatible Python value."""
+        col_type = column.type
+        if isinstance(col_type, UUID):
+            return lambda v: str(v) if v is not None else None
+        if isinstance(col_type, JSONB):
+            return lambda v: json.dumps(v, default=str) if v is not None else None
+        if isinstance(col_type, Numeric) and not isinstance(col_type, Float):
+            return lambda v: float(v) if v is not None else None
+        if isinstance(col_type, ARRAY):
+            return None
+        if isinstance(col_type, (DateTime, Boolean, Integer, Float)):
+            return None
+        return lambda v: (v.value if isinstance(v, Enum) else str(v)) if v is not None else None
+
+    @staticmethod
+    def stream_export(
+        tenant_id: str,
+        dataset: str,
+        export_format: ExportFormat,
+        columns: List[str],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """
+        Stream a tenant's dataset as Arrow IPC stream or Parquet bytes.
+
+        Rows are read through a server-side cursor `batch_size` at a time
+        and converted column-wise into one record batch (Arrow) or row group
+        (Parquet) each, so memory stays bounded by a single batch.
+
+        Args:
+            tenant_id: Tenant whose rows are exported
+            dataset: One of DATASETS
+            export_format: arrow or parquet
+            columns: Validated column list (see resolve_columns)
+            start_date: Inclusive lower bound on created_at
+            end_date: Exclusive upper bound on created_at
+            batch_size: Rows per batch (default: EXPORT_BATCH_SIZE)
+
+        Yields:
+            Encoded chunks of the export file
+        """
+        model = ExportService.DATASETS[dataset]
+        batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        table_columns = [model.__table__.columns[name] for name in columns]
+
+        schema = pa.schema([ExportService._arrow_field(c) for c in table_columns])
+        converters = [ExportService._converter(c) for c in table_columns]
+
+        stmt = select(*table_columns).where(model.tenant_id == tenant_id)
+        if start_date:
+            stmt = stmt.where(model.created_at >= start_date)
+        if end_date:
+            stmt = stmt.where(model.created_at < end_date)
+        stmt = stmt.order_by(model.created_at, model.id)
+
+        sink = _ChunkSink()
+        if export_format == ExportFormat.PARQUET:
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+
+        db = ReadSessionLocal()
+        rows_exported = 0
+        try:
+            result = db.execute(stmt.execution_options(yield_per=batch_size))
+            for rows in result.partitions():
+                arrays = []
+                for index, (field, convert) in enumerate(zip(schema, converters)):
+                    values = [row[index] for row in rows]
+                    if convert:
+                        values = [convert(v) for v in values]
+                    arrays.append(pa.array(values, type=field.type))
+
+                batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+                if export_format == ExportFormat.PARQUET:
+                    writer.write_table(pa.Table.from_batches([batch]))
+                else:
+                    writer.write_batch(batch)
+                rows_exported += len(rows)
+
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+
+            writer.close()
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+            logger.info(
+                f"Exported {rows_exported} {dataset} rows for tenant {tenant_id} "
+                f"as {export_format.value}"
+            )
+
+        except Exception as e:
+            logger.error(f"Export of {dataset} failed for tenant {tenant_id}: {str(e)}")
+            raise
+
+        finally:
+            db.close()
@@ -0,0 +1,382 @@
+"""
+Metering Service: Per-tenant API call counting and billing-period usage.
+
+Each authenticated request increments a monthly Redis counter (one INCR,
+which also yields the value the monthly cap is checked against) and a
+per-process delta in memory. A background flusher writes the deltas to
+Tenant.api_calls_this_month with a single UPDATE ... FROM (VALUES ...),
+so metering adds no database write to the request path. The column is
+stamped with the month it counts (api_calls_period); the first flush of a
+new month starts it over.
+
+UsageMeter aggregates usage events (inboxes created, domains added, emails
+sent, API calls) the same way and upserts them into one Usage row per
+tenant and billing period, recomputing the inbox overage as it goes.
+Tenants above their inbox limit without any activity are picked up by a
+periodic record_overages() pass.
+"""
+
+import logging
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, values, column, case, cast, func, Integer
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.models import Tenant, Usage, SubscriptionTier
+from app.database.redis_client import get_redis
+from app.database.session import SessionLocal
+from app.utils.background import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+
+class APICallMeter:
+    """Counts API calls per tenant and flushes them in batches."""
+
+    KEY_PREFIX = "meter:api_calls"
+    # Keep a month's counter a little past the month for late reads
+    KEY_TTL = 35 * 24 * 3600
+
+    _pending: Dict[str, int] = {}
+    # Fallback counts per (tenant, month) when Redis is unreachable
+    _local_counts: Dict[Tuple[str, str], int] = {}
+    _lock = threading.Lock()
+    _flusher: Optional[PeriodicFlusher] = None
+
+    @staticmethod
+    def _period(now: Optional[datetime] = None) -> str:
+        return (now or datetime.utcnow()).strftime("%Y%m")
+
+    @classmethod
+    def _key(cls, tenant_id: str, period: str) -> str:
+        return f"{cls.KEY_PREFIX}:{tenant_id}:{period}"
+
+    @classmethod
+    def record(cls, tenant_id: uuid.UUID) -> int:
+        """
+        Count one API call.
+
+        Returns:
+            Calls made by the tenant this month, including this one
+        """
+        tenant_id = str(tenant_id)
+        period = cls._period()
+
+        with cls._lock:
+            cls._pending[tenant_id] = cls._pending.get(tenant_id, 0) + 1
+
+        try:
+            key = cls._key(tenant_id, period)
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, cls.KEY_TTL)
+            count, _ = pipe.execute()
+            return int(count)
+        except Exception as e:
+            logger.warning(f"API call counter unavailable, counting locally: {str(e)}")
+
+        with cls._lock:
+            if len(cls._local_counts) > 100000:
+                cls._local_counts = {
+                    k: v for k, v in cls._local_counts.items() if k[1] == period
+                }
+            count = cls._local_counts.get((tenant_id, period), 0) + 1
+            cls._local_counts[(tenant_id, period)] = count
+        return count
+
+    @staticmethod
+    def month_start(now: Optional[datetime] = None) -> date:
+        return (now or datetime.utcnow()).date().replace(day=1)
+
+    @classmethod
+    def stored(cls, api_calls: Optional[int], period: Optional[date]) -> int:
+        """This month's calls from the Tenant columns (0 if they hold an older month)."""
+        return (api_calls or 0) if period == cls.month_start() else 0
+
+    @classmethod
+    def current(cls, tenant_id: uuid.UUID, default: int = 0) -> int:
+        """Calls made by the tenant this month, or `default` if unknown."""
+        try:
+            count = get_redis().get(cls._key(str(tenant_id), cls._period()))
+            if count is not None:
+                return max(int(count), default)
+        except Exception as e:
+            logger.warning(f"API call counter read failed: {str(e)}")
+        return default
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Add accumulated deltas to Tenant.api_calls_this_month in one statement.
+
+        Returns:
+            Number of tenants updated
+        """
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+
+        if not pending:
+            return 0
+
+        deltas = values(
+            column("id", UUID(as_uuid=False)),
+            column("delta", Integer),
+            name="deltas",
+        ).data(list(pending.items()))
+
+        month = cls.month_start()
+        stmt = update(Tenant).where(
+            Tenant.id == cast(deltas.c.id, UUID(as_uuid=True))
+        ).values(
+            api_calls_this_month=case(
+                (Tenant.api_calls_period == month, func.coalesce(Tenant.api_calls_this_month, 0)),
+                else_=0,
+            ) + deltas.c.delta,
+            api_calls_period=month,
+        )
+
+        db = SessionLocal()
+        try:
+            db.execute(stmt, execution_options={"synchronize_session": False})
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the deltas back so the next flush retries them
+            with cls._lock:
+                for tenant_id, delta in pending.items():
+                    cls._pending[tenant_id] = cls._pending.get(tenant_id, 0) + delta
+            raise
+        finally:
+            db.close()
+
+        UsageMeter.record_many("api_calls", pending)
+
+        logger.debug(f"Flushed API call counts for {len(pending)} tenants")
+        return len(pending)
+
+    @classmethod
+    def start(cls) -> None:
+        if cls._flusher is None:
+            cls._flusher = PeriodicFlusher(
+                "api-call-meter", settings.API_CALL_FLUSH_SECONDS, cls.flush
+            )
+        cls._flusher.start()
+
+    @classmethod
+    def stop(cls) -> None:
+        if cls._flusher:
+            cls._flusher.stop()
+
+
+class UsageMeter:
+    """Aggregates usage events per tenant and upserts them per billing period."""
+
+    METRICS = ("inboxes_created", "domains_added", "emails_sent", "api_calls")
+    UPSERT_BATCH_SIZE = 1000
+
+    _TENANT_COLUMNS = (
+        Tenant.id,
+        Tenant.subscription_tier,
+        Tenant.inboxes_count,
+        Tenant.current_period_start,
+        Tenant.current_period_end,
+    )
+
+    # tenant_id -> metric -> count since the last flush
+    _pending: Dict[str, Dict[str, int]] = {}
+    _lock = threading.Lock()
+    _flusher: Optional[PeriodicFlusher] = None
+
+    @classmethod
+    def record(cls, tenant_id: Any, metric: str, count: int = 1) -> None:
+        """Count `count` occurrences of a usage metric (memory only)."""
+        cls.record_many(metric, {str(tenant_id): count})
+
+    @classmethod
+    def record_many(cls, metric: str, counts: Dict[str, int]) -> None:
+        """Count one metric for several tenants at once."""
+        if metric not in cls.METRICS:
+            raise ValueError(f"Unknown usage metric: {metric}")
+
+        with cls._lock:
+            for tenant_id, count in counts.items():
+                tenant_counts = cls._pending.setdefault(str(tenant_id), {})
+                tenant_counts[metric] = tenant_counts.get(metric, 0) + count
+
+    @staticmethod
+    def _billing_period(tenant: Any, now: datetime) -> Tuple[datetime, datetime]:
+        """The tenant's current Stripe period, or the calendar month without one."""
+        if (
+            tenant.current_period_start and tenant.current_period_end
+            and tenant.current_period_start <= now < tenant.current_period_end
+        ):
+            return tenant.current_period_start, tenant.current_period_end
+
+        start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return start, (start + timedelta(days=32)).replace(day=1)
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Add accumulated usage to the tenants' current Usage rows.
+
+        Counters are added, the inbox overage keeps its peak for the period.
+
+        Returns:
+            Number of tenants updated
+        """
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+
+        if not pending:
+            return 0
+
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            tenants = db.execute(
+                select(*cls._TENANT_COLUMNS)
+                .where(Tenant.id.in_([uuid.UUID(tenant_id) for tenant_id in pending]))
+            ).all()
+            updated = cls._upsert(db, tenants, pending, now)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the counts back so the next flush retries them
+            with cls._lock:
+                for tenant_id, counts in pending.items():
+                    tenant_counts = cls._pending.setdefault(tenant_id, {})
+                    for metric, count in counts.items():
+                        tenant_counts[metric] = tenant_counts.get(metric, 0) + count
+            raise
+        finally:
+            db.close()
+
+        logger.debug(f"Flushed usage for {updated} tenants")
+        return updated
+
+    @classmethod
+    def record_overages(cls) -> int:
+        """
+        Record the inbox overage of every tenant above its plan's inbox limit.
+
+        flush() only sees tenants with usage events in the window; a tenant
+        sitting above its limit without activity (e.g. after a downgrade)
+        would otherwise never get a Usage row for the period and never be
+        billed. Only periods whose stored overage is lower are written.
+
+        Returns:
+            Number of tenants updated
+        """
+        from app.services.subscription_service import SubscriptionService
+
+        inbox_limit = case(
+            {
+                tier: SubscriptionService.get_plan_limits(tier)["inboxes"]
+                for tier in SubscriptionTier
+            },
+            value=Tenant.subscription_tier,
+            else_=SubscriptionService.get_plan_limits(SubscriptionTier.TRIAL)["inboxes"],
+        )
+
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            tenants = db.execute(
+                select(*cls._TENANT_COLUMNS).where(Tenant.inboxes_count > inbox_limit)
+            ).all()
+            if not tenants:
+                return 0
+
+            stored = {
+                (row.tenant_id, row.billing_period_start): row.inbox_overage
+                for row in db.execute(
+                    select(Usage.tenant_id, Usage.billing_period_start, Usage.inbox_overage)
+                    .where(
+                        Usage.tenant_id.in_([tenant.id for tenant in tenants]),
+                        Usage.billing_period_end > now,
+                    )
+                )
+            }
+            behind = []
+            for tenant in tenants:
+                period_start, _ = cls._billing_period(tenant, now)
+                if cls._overage(tenant) > stored.get((tenant.id, period_start), 0):
+                    behind.append(tenant)
+
+            updated = cls._upsert(db, behind, {}, now)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if updated:
+            logger.info(f"Recorded inbox overage for {updated} idle tenants")
+        return updated
+
+    @staticmethod
+    def _overage(tenant: Any) -> int:
+        from app.services.subscription_service import SubscriptionService
+
+        inbox_limit = SubscriptionService.get_plan_limits(tenant.subscription_tier)["inboxes"]
+        return max(0, (tenant.inboxes_count or 0) - inbox_limit)
+
+    @classmethod
+    def _upsert(
+        cls, db: Session, tenants: List[Any], pending: Dict[str, Dict[str, int]], now: datetime
+    ) -> int:
+        """Add `pending` counts and the current overage to each tenant's Usage row (no commit)."""
+        rows = []
+        for tenant in tenants:
+            counts = pending.get(str(tenant.id), {})
+            period_start, period_end = cls._billing_period(tenant, now)
+            overage = cls._overage(tenant)
+            rows.append({
+                "id": uuid.uuid4(),
+                "tenant_id": tenant.id,
+                "billing_period_start": period_start,
+                "billing_period_end": period_end,
+                **{metric: counts.get(metric, 0) for metric in cls.METRICS},
+                "inbox_overage": overage,
+                "overage_charge": overage * settings.INBOX_OVERAGE_PRICE,
+                "reported_overage": 0,
+                "created_at": now,
+                "updated_at": now,
+            })
+
+        for offset in range(0, len(rows), cls.UPSERT_BATCH_SIZE):
+            stmt = insert(Usage).values(rows[offset:offset + cls.UPSERT_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_usage_tenant_period",
+                set_={
+                    **{
+                        metric: getattr(Usage, metric) + getattr(stmt.excluded, metric)
+                        for metric in cls.METRICS
+                    },
+                    "inbox_overage": func.greatest(Usage.inbox_overage, stmt.excluded.inbox_overage),
+                    "overage_charge": func.greatest(Usage.overage_charge, stmt.excluded.overage_charge),
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            db.execute(stmt)
+        return len(rows)
+
+    @classmethod
+    def start(cls) -> None:
+        if cls._flusher is None:
+            cls._flusher = PeriodicFlusher(
+                "usage-meter", settings.USAGE_FLUSH_SECONDS, cls.flush
+            )
+        cls._flusher.start()
+
+    @classmethod
+    def stop(cls) -> None:
+        if cls._flusher:
+            cls._flusher.stop()
@@ -6,16 +6,23 @@ Generates SMTP inboxes (users) and deploys them to KumoMTA.
 import logging
 import secrets
 import string
-from typing import List, Dict, Any
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
 
 from app.database.models import (
-    Tenant, Domain, Inbox, InboxStatus
+    Tenant, Domain, DomainStatus, Inbox, InboxStatus, SuspensionSource
 )
 from app.services.subscription_service import SubscriptionService
+from app.services.metering_service import UsageMeter
 from app.integrations.kumo_client import KumoMTAClient
+from app.services.relay_service import RelayService
+from app.services.purge_service import PurgeService
 from app.utils.security import hash_password
+from app.utils.cache import ResponseCache, CacheTag
+from app.utils.pagination import encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +30,19 @@ logger = logging.getLogger(__name__)
 class ProvisioningService:
     """Provision SMTP inboxes with smart naming and KumoMTA integration."""
     
+    MAX_PAGE_SIZE = 500
+    
+    # Bulk operations: most inboxes per request, and per UPDATE/DELETE
+    MAX_BULK_INBOXES = 5000
+    BULK_CHUNK_SIZE = 1000
+    BULK_ACTIONS = ("suspend", "resume", "delete", "update_limits")
+    
+    # Daily sending limits: new inboxes start at WARMUP_DAILY_LIMIT, and the most a
+    # tenant may set grows by DAILY_LIMIT_STEP per warmup stage (up to 10)
+    WARMUP_DAILY_LIMIT = 40
+    DAILY_LIMIT_STEP = 16
+    MAX_DAILY_LIMIT = WARMUP_DAILY_LIMIT + 10 * DAILY_LIMIT_STEP
+    
     @staticmethod
     def provision_inboxes(
         tenant_id: str,
@@ -110,7 +130,7 @@ class ProvisioningService:
                     status=InboxStatus.PENDING,
                     smtp_host="smtp.inboxgrove.com",  # InboxGrove SMTP host
                     smtp_port=587,
-                    daily_limit=40,
+                    daily_limit=ProvisioningService.WARMUP_DAILY_LIMIT,
                     monthly_limit=1000,
                     warmup_stage=0,
                     health_score=50.0,  # Start at 50, warmup will improve
@@ -147,13 +167,29 @@ class ProvisioningService:
             
             db.commit()
             
+            # Make the mailboxes authenticatable through the KumoMTA datasource
+            kumo.publish_mailboxes(
+                {
+                    "domain": domain.domain_name,
+                    "username": inbox.username,
+                    "id": inbox.id,
+                    "status": inbox.status.value,
+                    "daily_limit": inbox.daily_limit,
+                }
+                for inbox in generated_inboxes
+            )
+            
             # Update tenant counts
             tenant.inboxes_count = db.query(Inbox).filter(
-                Inbox.tenant_id == tenant.id
+                Inbox.tenant_id == tenant.id,
+                Inbox.status != InboxStatus.DELETED
             ).count()
             db.add(tenant)
             db.commit()
             
+            ResponseCache.invalidate(tenant.id, CacheTag.INBOXES)
+            UsageMeter.record(tenant.id, "inboxes_created", len(generated_inboxes))
+            
             logger.info(
                 f"Provisioned {inbox_count} inboxes for tenant {tenant.id} "
                 f"on domain {domain.domain_name}"
@@ -240,6 +276,7 @@ class ProvisioningService:
             raise ValueError(f"Inbox {inbox_id} not found")
         
         inbox.status = InboxStatus.SUSPENDED
+        inbox.suspended_by = SuspensionSource.PLATFORM.value
         inbox.blacklist_reason = reason
         inbox.blacklist_date = datetime.utcnow()
         inbox.is_blacklisted = True
@@ -248,25 +285,25 @@ class ProvisioningService:
         db.commit()
         db.refresh(inbox)
         
-        logger.warning(f"Inbox {inbox.full_email} suspended: {reason}")
+        ResponseCache.invalidate(inbox.tenant_id, CacheTag.INBOXES)
+        RelayService.remove_inbox(inbox.full_email)
         
-        # TODO: Remove from KumoMTA relay list
+        logger.warning(f"Inbox {inbox.full_email} suspended: {reason}")
         
         return inbox
     
     @staticmethod
-    def delete_inbox(inbox_id: str, db: Session) -> bool:
-        """Delete an inbox."""
-        inbox = db.query(Inbox).filter(Inbox.id == inbox_id).first()
+    def delete_inbox(inbox_id: str, tenant_id: str, db: Session) -> bool:
+        """Delete one of a tenant's inboxes (the row is purged in the background)."""
+        inbox = db.query(Inbox).filter(
+            Inbox.id == inbox_id,
+            Inbox.tenant_id == tenant_id,
+            Inbox.status != InboxStatus.DELETED
+        ).first()
         if not inbox:
             return False
         
-        # TODO: Remove from KumoMTA
-        
-        db.delete(inbox)
-        db.commit()
-        
-        logger.info(f"Inbox {inbox.full_email} deleted")
+        PurgeService.soft_delete_inbox(inbox, db)
         return True
     
     @staticmethod
@@ -279,6 +316,130 @@ class ProvisioningService:
         """List all inboxes for a tenant."""
         return db.query(Inbox).filter(Inbox.tenant_id == tenant_id).all()
     
+    @staticmethod
+    def _inbox_criteria(
+        tenant_id: str,
+        domain_id: Optional[str] = None,
+        status: Optional[InboxStatus] = None,
+        min_health: Optional[float] = None,
+        max_health: Optional[float] = None,
+        warmup_stage: Optional[int] = None,
+        is_blacklisted: Optional[bool] = None,
+    ) -> List[Any]:
+        """Inbox filters shared by listings and bulk operations (tenant always enforced)."""
+        criteria = [Inbox.tenant_id == tenant_id, Inbox.status != InboxStatus.DELETED]
+        
+        if domain_id is not None:
+            criteria.append(Inbox.domain_id == domain_id)
+        if status is not None:
+            criteria.append(Inbox.status == status)
+        if min_health is not None:
+            criteria.append(Inbox.health_score >= min_health)
+        if max_health is not None:
+            criteria.append(Inbox.health_score <= max_health)
+        if warmup_stage is not None:
+            criteria.append(Inbox.warmup_stage == warmup_stage)
+        if is_blacklisted is True:
+            criteria.append(Inbox.is_blacklisted.is_(True))
+        elif is_blacklisted is False:
+            criteria.append(Inbox.is_blacklisted.isnot(True))
+        
+        return criteria
+    
+    @staticmethod
+    def list_inboxes_page(
+        tenant_id: str,
+        db: Session,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None,
+        domain_id: Optional[str] = None,
+        status: Optional[InboxStatus] = None,
+        min_health: Optional[float] = None,
+        max_health: Optional[float] = None,
+        warmup_stage: Optional[int] = None,
+        is_blacklisted: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        List a page of a tenant's inboxes, newest first.
+        
+        Keyset pagination on (created_at, id) walks one of the composite
+        (tenant_id|domain_id, [status|warmup_stage,] created_at, id) indexes,
+        so every page costs the same regardless of depth. A health range
+        is served by (tenant_id, health_score, created_at, id): the matching
+        rows are read in health order and the page is top-N sorted, which is
+        cheap while the range is selective (an unselective range is better
+        served walking created_at, which the planner picks). Only the listed
+        columns are selected, as plain rows rather than ORM entities.
+        
+        Args:
+            tenant_id: Owning tenant (always enforced)
+            db: Database session
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            after: Decoded cursor (created_at, id) of the last row of the previous page
+            domain_id: Only inboxes on this domain
+            status: Filter by inbox status
+            min_health: Minimum health score (inclusive)
+            max_health: Maximum health score (inclusive)
+            warmup_stage: Filter by warmup stage
+            is_blacklisted: Filter by blacklist flag
+        
+        Returns:
+            Dictionary with inboxes and next_cursor
+        """
+        limit = max(1, min(limit, ProvisioningService.MAX_PAGE_SIZE))
+        
+        stmt = select(
+            Inbox.id,
+            Inbox.domain_id,
+            Inbox.full_email,
+            Inbox.status,
+            Inbox.health_score,
+            Inbox.warmup_stage,
+            Inbox.is_blacklisted,
+            Inbox.emails_sent_today,
+            Inbox.emails_sent_this_month,
+            Inbox.daily_limit,
+            Inbox.created_at,
+        ).where(*ProvisioningService._inbox_criteria(
+            tenant_id,
+            domain_id=domain_id,
+            status=status,
+            min_health=min_health,
+            max_health=max_health,
+            warmup_stage=warmup_stage,
+            is_blacklisted=is_blacklisted,
+        ))
+        
+        if after is not None:
+            stmt = stmt.where(tuple_(Inbox.created_at, Inbox.id) < after)
+        
+        stmt = stmt.order_by(Inbox.created_at.desc(), Inbox.id.desc()).limit(limit + 1)
+        rows = db.execute(stmt).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+        
+        return {
+            "inboxes": [
+                {
+                    "id": str(row.id),
+                    "domain_id": str(row.domain_id),
+                    "email": row.full_email,
+                    "status": row.status,
+                    "health_score": row.health_score,
+                    "warmup_stage": row.warmup_stage,
+                    "is_blacklisted": bool(row.is_blacklisted),
+                    "emails_sent_today": row.emails_sent_today,
+                    "emails_sent_this_month": row.emails_sent_this_month,
+                    "daily_limit": row.daily_limit,
+                    "created_at": row.created_at,
+                }
+                for row in rows
+            ],
+            "next_cursor": next_cursor,
+        }
+    
     @staticmethod
     def update_inbox_health(
         inbox_id: str,
@@ -310,4 +471,101 @@ class ProvisioningService:
         db.commit()
         db.refresh(inbox)
         
+        ResponseCache.invalidate(inbox.tenant_id, CacheTag.INBOXES)
+        
         return inbox
+    
+    @staticmethod
+    def bulk_inbox_operation(
+        tenant_id: str,
+        action: str,
+        db: Session,
+        inbox_ids: Optional[List[uuid.UUID]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        reason: Optional[str] = None,
+        daily_limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Suspend, resume, delete or re-limit many inboxes at once.
+        
+        Targets are either explicit ids or the listing filters (domain_id,
+        status, min_health, max_health, warmup_stage, is_blacklisted), always
+        restricted to the tenant. Each chunk of BULK_CHUNK_SIZE inboxes is
+        one UPDATE/DELETE ... RETURNING plus one pipelined KumoMTA fan-out.
+        
+        Args:
+            tenant_id: Owning tenant (always enforced)
+            action: One of BULK_ACTIONS
+            db: Database session
+            inbox_ids: Inboxes to act on
+            filters: Select inboxes by filter instead of ids
+            reason: Suspension reason ("suspend"), logged
+            daily_limit: New daily sending limit ("update_limits"), capped per
+                inbox by its warmup stage
+        
+        Returns:
+            Dictionary with matched and affected counts
+        
+        Raises:
+            ValueError: Invalid action, targets or arguments
+        """
+        if action not in ProvisioningService.BULK_ACTIONS:
+            raise ValueError(f"Unknown bulk action: {action}")
+        if (inbox_ids is None) == (filters is None):
+            raise ValueError("Provide either inbox_ids or filters")
+        if action == "update_limits" and (daily_limit is None or daily_limit < 0):
+            raise ValueError("daily_limit is required for update_limits")
+        if action == "update_limits" and daily_limit > ProvisioningService.MAX_DAILY_LIMIT:
+            raise ValueError(f"daily_limit cannot exceed {ProvisioningService.MAX_DAILY_LIMIT}")
+        
+        # Resolve targets to ids up front so every chunk is a primary-key lookup
+        criteria = ProvisioningService._inbox_criteria(tenant_id, **(filters or {}))
+        if inbox_ids is not None:
+            criteria.append(Inbox.id.in_(inbox_ids))
+        ids = list(db.scalars(
+            select(Inbox.id).where(*criteria).limit(ProvisioningService.MAX_BULK_INBOXES + 1)
+        ))
+        if len(ids) > ProvisioningService.MAX_BULK_INBOXES:
+            raise ValueError(
+                f"Bulk operations are limited to {ProvisioningService.MAX_BULK_INBOXES} inboxes"
+            )
+        
+        affected = 0
+        size = ProvisioningService.BULK_CHUNK_SIZE
+        for start in range(0, len(ids), size):
+            chunk = [Inbox.tenant_id == tenant_id, Inbox.id.in_(ids[start:start + size])]
+            
+            if action == "suspend":
+                affected += RelayService.suspend_inboxes(db, "bulk", SuspensionSource.TENANT, *chunk)
+            elif action == "resume":
+                # Only the tenant's own suspensions; platform-blacklisted inboxes and
+                # inboxes on suspended domains stay off
+                affected += RelayService.restore_inboxes(
+                    db,
+                    SuspensionSource.TENANT,
+                    *chunk,
+                    Inbox.domain_id.notin_(
+                        select(Domain.id).where(Domain.status == DomainStatus.SUSPENDED)
+                    ),
+                )
+            elif action == "delete":
+                # Rows are removed later by the purge worker
+                affected += PurgeService.soft_delete_inboxes(db, *chunk)
+            else:
+                # Inboxes still warming up get at most their stage's limit
+                affected += RelayService.publish_inboxes(db, *chunk, values={
+                    "daily_limit": func.least(
+                        daily_limit,
+                        ProvisioningService.WARMUP_DAILY_LIMIT
+                        + func.coalesce(Inbox.warmup_stage, 0) * ProvisioningService.DAILY_LIMIT_STEP,
+                    ),
+                })
+        
+        ResponseCache.invalidate(tenant_id, CacheTag.INBOXES)
+        
+        logger.info(
+            f"Bulk {action} on {affected}/{len(ids)} inboxes for tenant {tenant_id}"
+            + (f": {reason}" if reason else "")
+        )
+        
+        return {"action": action, "matched": len(ids), "affected": affected}
@@ -0,0 +1,281 @@
+"""
+Purge Service: Soft delete now, remove rows in the background.
+
+Deleting a domain or inbox only flips its status to DELETED (one UPDATE
+for all of a domain's inboxes) and cuts the mailboxes off from KumoMTA,
+so the request returns immediately. The purge worker then deletes the
+rows in primary-key-ordered chunks, one short transaction each, clears
+the KumoMTA datasource in batches, removes the Cloudflare zone and
+finally the domain row, recording progress per domain in Redis.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.models import Domain, DomainStatus, Inbox, InboxStatus, Tenant, TransactionHistory
+from app.database.redis_client import get_redis
+from app.database.session import SessionLocal
+from app.integrations.cloudflare_client import CloudflareClient
+from app.integrations.kumo_client import KumoMTAClient
+from app.utils.cache import ResponseCache, CacheTag
+
+logger = logging.getLogger(__name__)
+
+
+def _address(full_email: str):
+    username, domain = full_email.rsplit("@", 1)
+    return domain, username
+
+
+class PurgeService:
+    """Soft deletes and the chunked background purge behind them."""
+
+    PROGRESS_KEY = "purge:progress:{tenant_id}:{domain_id}"
+    PROGRESS_TTL = 86400
+
+    @staticmethod
+    def soft_delete_domain(domain: Domain, db: Session) -> int:
+        """
+        Mark a domain and all its inboxes deleted and stop their mail.
+
+        Returns:
+            Number of inboxes queued for purging
+        """
+        rows = db.execute(
+            update(Inbox)
+            .where(Inbox.domain_id == domain.id, Inbox.status != InboxStatus.DELETED)
+            .values(status=InboxStatus.DELETED)
+            .returning(Inbox.full_email),
+            execution_options={"synchronize_session": False},
+        ).all()
+        domain.status = DomainStatus.DELETED
+        db.add(domain)
+        db.flush()
+        PurgeService._refresh_counts(db, {domain.tenant_id})
+        db.commit()
+
+        KumoMTAClient().remove_mailboxes(_address(row.full_email) for row in rows)
+        ResponseCache.invalidate(domain.tenant_id, CacheTag.DOMAINS, CacheTag.INBOXES)
+
+        PurgeService._set_progress(domain.tenant_id, domain.id, {
+            "state": "purging",
+            "inboxes_total": len(rows),
+            "inboxes_purged": 0,
+        })
+
+        logger.info(f"Domain {domain.domain_name} deleted, {len(rows)} inboxes queued for purge")
+        return len(rows)
+
+    @staticmethod
+    def soft_delete_inbox(inbox: Inbox, db: Session) -> None:
+        """Mark an inbox deleted and stop its mail."""
+        inbox.status = InboxStatus.DELETED
+        db.add(inbox)
+        db.flush()
+        PurgeService._refresh_counts(db, {inbox.tenant_id})
+        db.commit()
+
+        KumoMTAClient().remove_mailboxes([_address(inbox.full_email)])
+        ResponseCache.invalidate(inbox.tenant_id, CacheTag.INBOXES)
+
+        logger.info(f"Inbox {inbox.full_email} deleted, queued for purge")
+
+    @staticmethod
+    def soft_delete_inboxes(db: Session, *criteria: Any) -> int:
+        """
+        Mark all inboxes matching `criteria` deleted and stop their mail.
+
+        Returns:
+            Number of inboxes queued for purging
+        """
+        rows = db.execute(
+            update(Inbox)
+            .where(*criteria, Inbox.status != InboxStatus.DELETED)
+            .values(status=InboxStatus.DELETED)
+            .returning(Inbox.full_email, Inbox.tenant_id),
+            execution_options={"synchronize_session": False},
+        ).all()
+        if not rows:
+            db.rollback()
+            return 0
+        tenant_ids = {row.tenant_id for row in rows}
+        PurgeService._refresh_counts(db, tenant_ids)
+        db.commit()
+
+        KumoMTAClient().remove_mailboxes(_address(row.full_email) for row in rows)
+        for tenant_id in tenant_ids:
+            ResponseCache.invalidate(tenant_id, CacheTag.INBOXES)
+
+        logger.info(f"{len(rows)} inboxes deleted, queued for purge")
+        return len(rows)
+
+    @staticmethod
+    def get_progress(tenant_id: Any, domain_id: Any) -> Optional[Dict[str, Any]]:
+        """Purge progress of a deleted domain (None once expired or unknown)."""
+        try:
+            progress = get_redis().hgetall(
+                PurgeService.PROGRESS_KEY.format(tenant_id=tenant_id, domain_id=domain_id)
+            )
+        except Exception as e:
+            logger.warning(f"Purge progress unavailable: {str(e)}")
+            return None
+
+        if not progress:
+            return None
+        return {
+            "state": progress.get("state", "purging"),
+            "inboxes_total": int(progress.get("inboxes_total", 0)),
+            "inboxes_purged": int(progress.get("inboxes_purged", 0)),
+        }
+
+    @staticmethod
+    def run() -> Dict[str, int]:
+        """
+        Purge everything soft-deleted so far (the worker's periodic call).
+
+        Returns:
+            Number of inboxes and domains removed
+        """
+        db = SessionLocal()
+        try:
+            inboxes = PurgeService._purge_inboxes(db)
+            domains = PurgeService._purge_domains(db)
+        finally:
+            db.close()
+
+        if inboxes or domains:
+            logger.info(f"Purged {inboxes} inboxes and {domains} domains")
+        return {"inboxes": inboxes, "domains": domains}
+
+    @staticmethod
+    def _purge_inboxes(db: Session) -> int:
+        purged = 0
+        while True:
+            # Lowest ids first; SKIP LOCKED lets several workers share the backlog
+            chunk = (
+                select(Inbox.id)
+                .where(Inbox.status == InboxStatus.DELETED)
+                .order_by(Inbox.id)
+                .limit(settings.PURGE_CHUNK_SIZE)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            rows = db.execute(
+                delete(Inbox)
+                .where(Inbox.id.in_(chunk))
+                .returning(Inbox.full_email, Inbox.tenant_id, Inbox.domain_id),
+                execution_options={"synchronize_session": False},
+            ).all()
+            db.commit()
+
+            if not rows:
+                return purged
+            purged += len(rows)
+
+            # Idempotent: soft delete already removed them, this catches stragglers
+            KumoMTAClient().remove_mailboxes(_address(row.full_email) for row in rows)
+
+            per_domain: Dict[Any, Any] = {}
+            for row in rows:
+                per_domain.setdefault((row.tenant_id, row.domain_id), 0)
+                per_domain[(row.tenant_id, row.domain_id)] += 1
+            for (tenant_id, domain_id), count in per_domain.items():
+                PurgeService._advance_progress(tenant_id, domain_id, count)
+
+    @staticmethod
+    def _purge_domains(db: Session) -> int:
+        purged = 0
+        # Domains that failed this run are retried next run, not in a loop,
+        # and never hold back the ones after them
+        failed = set()
+        while True:
+            domain = db.execute(
+                select(Domain)
+                .where(
+                    Domain.status == DomainStatus.DELETED,
+                    Domain.id.notin_(failed),
+                    ~select(Inbox.id).where(Inbox.domain_id == Domain.id).exists(),
+                )
+                .order_by(Domain.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar_one_or_none()
+            if domain is None:
+                db.rollback()
+                return purged
+
+            try:
+                if domain.cloudflare_zone_id:
+                    CloudflareClient().delete_zone(domain.cloudflare_zone_id)
+
+                # The ledger outlives the domain; keep its name for reconciliation
+                db.execute(
+                    update(TransactionHistory)
+                    .where(
+                        TransactionHistory.tenant_id == domain.tenant_id,
+                        TransactionHistory.domain_id == domain.id,
+                    )
+                    .values(
+                        domain_id=None,
+                        related_data=func.coalesce(
+                            TransactionHistory.related_data, text("'{}'::jsonb")
+                        ).op("||")(
+                            func.jsonb_build_object("domain_name", domain.domain_name)
+                        ),
+                    ),
+                    execution_options={"synchronize_session": False},
+                )
+                db.execute(delete(Domain).where(Domain.id == domain.id))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                failed.add(domain.id)
+                logger.error(f"Purge of domain {domain.domain_name} failed, will retry: {str(e)}")
+                continue
+
+            PurgeService._set_progress(domain.tenant_id, domain.id, {"state": "purged"})
+            purged += 1
+
+    @staticmethod
+    def _refresh_counts(db: Session, tenant_ids) -> None:
+        """Recompute the tenants' stored counts without deleted rows (caller commits)."""
+        db.execute(
+            update(Tenant)
+            .where(Tenant.id.in_(tenant_ids))
+            .values(
+                inboxes_count=select(func.count(Inbox.id)).where(
+                    Inbox.tenant_id == Tenant.id,
+                    Inbox.status != InboxStatus.DELETED,
+                ).scalar_subquery(),
+                domains_count=select(func.count(Domain.id)).where(
+                    Domain.tenant_id == Tenant.id,
+                    Domain.status != DomainStatus.DELETED,
+                ).scalar_subquery(),
+            ),
+            execution_options={"synchronize_session": False},
+        )
+
+    @staticmethod
+    def _set_progress(tenant_id: Any, domain_id: Any, fields: Dict[str, Any]) -> None:
+        key = PurgeService.PROGRESS_KEY.format(tenant_id=tenant_id, domain_id=domain_id)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, PurgeService.PROGRESS_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not record purge progress for domain {domain_id}: {str(e)}")
+
+    @staticmethod
+    def _advance_progress(tenant_id: Any, domain_id: Any, count: int) -> None:
+        key = PurgeService.PROGRESS_KEY.format(tenant_id=tenant_id, domain_id=domain_id)
+        try:
+            # Only domain deletes track progress; single inbox deletes have no key
+            if get_redis().exists(key):
+                get_redis().hincrby(key, "inboxes_purged", count)
+        except Exception as e:
+            logger.warning(f"Could not record purge progress for domain {domain_id}: {str(e)}")
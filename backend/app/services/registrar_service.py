@@ -4,14 +4,16 @@ Handles domain registration, DNS updates, and management.
 """
 
 import logging
-import requests
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 
 from app.config import settings
+from app.utils.lazy import LazyModule
 
 logger = logging.getLogger(__name__)
 
+requests = LazyModule("requests")
+
 
 class NamecheapRegistrar:
     """Namecheap registrar adapter."""
@@ -0,0 +1,197 @@
+"""
+Relay Service: Bulk kill-switch fan-out to KumoMTA.
+
+Suspending a tenant or domain flips every affected inbox with one UPDATE
+... RETURNING, then removes the returned mailboxes from the KumoMTA Redis
+datasource in pipelined batches, so sending stops as soon as the call
+returns instead of after a per-inbox loop. The UPDATE is only committed
+once the mailboxes are gone, so a failed cut-off leaves nothing marked
+suspended and the suspension can simply be retried.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.database.models import Inbox, InboxStatus, SuspensionSource
+from app.integrations.kumo_client import KumoMTAClient
+from app.utils.metrics import SUSPENSION_FANOUT_SECONDS, MAILBOXES_CUT_OFF
+
+logger = logging.getLogger(__name__)
+
+
+def _address(full_email: str):
+    username, domain = full_email.rsplit("@", 1)
+    return domain, username
+
+
+class RelayService:
+    """Set-based inbox suspension and restoration, mirrored to KumoMTA."""
+
+    @staticmethod
+    def suspend_inboxes(
+        db: Session,
+        scope: str,
+        suspended_by: SuspensionSource,
+        *criteria: Any,
+        values: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Suspend all sendable inboxes matching `criteria` and cut them off.
+
+        Commits the session, so changes the caller made before (e.g. the
+        tenant's suspension flags) land in the same transaction. The commit
+        happens after the KumoMTA cut-off; if that fails the session is
+        rolled back, so nothing is recorded as suspended while the
+        mailboxes can still send.
+
+        Args:
+            db: Database session
+            scope: Metric label ("tenant", "domain", ...)
+            suspended_by: Source recorded on the inboxes; only its restore undoes it
+            criteria: SQLAlchemy filters on Inbox
+            values: Extra columns to set (e.g. blacklist flags)
+
+        Returns:
+            Number of inboxes suspended
+        """
+        started = time.perf_counter()
+
+        rows = db.execute(
+            update(Inbox)
+            .where(*criteria, Inbox.status.in_([InboxStatus.ACTIVE, InboxStatus.PENDING]))
+            .values(
+                status=InboxStatus.SUSPENDED, suspended_by=suspended_by.value, **(values or {})
+            )
+            .returning(Inbox.full_email),
+            execution_options={"synchronize_session": False},
+        ).all()
+
+        try:
+            removed = KumoMTAClient().remove_mailboxes(_address(row.full_email) for row in rows)
+        except Exception as e:
+            db.rollback()
+            logger.error(
+                f"KumoMTA fan-out failed for {len(rows)} {scope} mailboxes; "
+                f"suspension rolled back: {str(e)}"
+            )
+            raise
+
+        # Removed keys are only republished by a restore, so a failed commit
+        # leaves the mailboxes cut off (fail-closed) until the suspension is retried
+        db.commit()
+
+        elapsed = time.perf_counter() - started
+        SUSPENSION_FANOUT_SECONDS.labels(scope=scope).observe(elapsed)
+        MAILBOXES_CUT_OFF.labels(scope=scope).inc(removed)
+
+        logger.warning(
+            f"Suspension fan-out ({scope}): {len(rows)} inboxes suspended, "
+            f"{removed} mailbox keys removed in {elapsed * 1000:.0f}ms"
+        )
+        return len(rows)
+
+    @staticmethod
+    def restore_inboxes(db: Session, suspended_by: SuspensionSource, *criteria: Any) -> int:
+        """
+        Reactivate inboxes suspended by `suspended_by` and republish them.
+
+        Inboxes suspended by anyone else, and blacklisted inboxes, stay
+        suspended.
+
+        Returns:
+            Number of inboxes restored
+        """
+        rows = db.execute(
+            update(Inbox)
+            .where(
+                *criteria,
+                Inbox.status == InboxStatus.SUSPENDED,
+                Inbox.suspended_by == suspended_by.value,
+                Inbox.is_blacklisted.isnot(True),
+            )
+            .values(status=InboxStatus.ACTIVE, suspended_by=None)
+            .returning(Inbox.id, Inbox.full_email, Inbox.daily_limit),
+            execution_options={"synchronize_session": False},
+        ).all()
+        db.commit()
+
+        KumoMTAClient().publish_mailboxes(
+            {
+                "domain": _address(row.full_email)[0],
+                "username": _address(row.full_email)[1],
+                "id": row.id,
+                "status": InboxStatus.ACTIVE.value,
+                "daily_limit": row.daily_limit,
+            }
+            for row in rows
+        )
+
+        logger.info(f"Restored {len(rows)} inboxes")
+        return len(rows)
+
+    @staticmethod
+    def transfer_suspensions(
+        db: Session, suspended_by: SuspensionSource, to: SuspensionSource, *criteria: Any
+    ) -> int:
+        """
+        Hand suspensions by `suspended_by` over to `to` without reactivating.
+
+        Used when one suspension is lifted while another that also covers
+        the inboxes is still in force. Does not commit: call it right before
+        restore_inboxes.
+
+        Returns:
+            Number of inboxes handed over
+        """
+        return db.execute(
+            update(Inbox)
+            .where(
+                *criteria,
+                Inbox.status == InboxStatus.SUSPENDED,
+                Inbox.suspended_by == suspended_by.value,
+            )
+            .values(suspended_by=to.value),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+
+    @staticmethod
+    def publish_inboxes(db: Session, *criteria: Any, values: Dict[str, Any]) -> int:
+        """
+        Update inboxes matching `criteria` and republish the active ones.
+
+        Used for changes KumoMTA enforces from the mailbox record, such as
+        daily_limit.
+
+        Returns:
+            Number of inboxes updated
+        """
+        rows = db.execute(
+            update(Inbox)
+            .where(*criteria)
+            .values(**values)
+            .returning(Inbox.id, Inbox.full_email, Inbox.status, Inbox.daily_limit),
+            execution_options={"synchronize_session": False},
+        ).all()
+        db.commit()
+
+        KumoMTAClient().publish_mailboxes(
+            {
+                "domain": _address(row.full_email)[0],
+                "username": _address(row.full_email)[1],
+                "id": row.id,
+                "status": row.status.value,
+                "daily_limit": row.daily_limit,
+            }
+            for row in rows
+            if row.status == InboxStatus.ACTIVE
+        )
+        return len(rows)
+
+    @staticmethod
+    def remove_inbox(full_email: str) -> None:
+        """Cut a single inbox off from KumoMTA."""
+        KumoMTAClient().remove_mailboxes([_address(full_email)])
@@ -0,0 +1,356 @@
+"""
+Stripe Event Service: Durable webhook ingestion and in-order processing.
+
+The webhook endpoint only verifies the signature and inserts the raw event
+into stripe_events, keyed by the Stripe event id; a redelivery hits the
+primary key and is acknowledged without further work. A worker thread
+applies pending events through StripeWebhookHandler, one customer at a
+time in Stripe's creation order, under a per-customer advisory lock so
+several workers never reorder a customer's events.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.models import (
+    StripeEvent, SubscriptionStatus, Tenant, TransactionHistory, TransactionType
+)
+from app.database.session import SessionLocal
+from app.integrations.stripe_cache import StripeObjectCache
+from app.integrations.stripe_gateway import stripe
+from app.services.abuse_service import AbuseSignalEngine
+from app.utils.auth import TenantCache
+from app.utils.cache import ResponseCache, CacheTag
+
+logger = logging.getLogger(__name__)
+
+# Namespace of the per-customer advisory locks
+_LOCK_NAMESPACE = 7_340_047
+
+# Work to run once the customer's transaction has committed
+Deferred = List[Callable[[], Any]]
+
+
+def _timestamp(value: Optional[int]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(value) if value else None
+
+
+class StripeWebhookHandler:
+    """
+    Apply Stripe events to tenants and the transaction ledger.
+
+    Handlers run inside the worker's transaction and must not commit;
+    side effects that commit or leave the process go into `deferred`.
+    """
+
+    # Stripe subscription status -> tenant subscription status
+    SUBSCRIPTION_STATUSES = {
+        "trialing": SubscriptionStatus.TRIAL,
+        "active": SubscriptionStatus.ACTIVE,
+        "past_due": SubscriptionStatus.PAST_DUE,
+        "unpaid": SubscriptionStatus.PAST_DUE,
+        "paused": SubscriptionStatus.PAUSED,
+        "canceled": SubscriptionStatus.CANCELLED,
+        "incomplete_expired": SubscriptionStatus.CANCELLED,
+    }
+
+    @staticmethod
+    def dispatch(event: Dict[str, Any], db: Session, deferred: Deferred) -> bool:
+        """
+        Apply one event.
+
+        Returns:
+            False if the event type is not handled
+        """
+        handler = StripeWebhookHandler.HANDLERS.get(event["type"])
+        if handler is None:
+            return False
+        handler(event, db, deferred)
+        return True
+
+    @staticmethod
+    def _tenant(customer_id: Optional[str], db: Session, deferred: Deferred) -> Optional[Tenant]:
+        if not customer_id:
+            return None
+        tenant = db.query(Tenant).filter(Tenant.stripe_customer_id == customer_id).first()
+        if tenant is None:
+            logger.warning(f"Stripe event for unknown customer {customer_id}")
+            return None
+
+        tenant_id = tenant.id
+        deferred.append(lambda: ResponseCache.invalidate(tenant_id, CacheTag.TENANT, CacheTag.BILLING))
+        deferred.append(lambda: TenantCache.invalidate(tenant_id))
+        return tenant
+
+    @staticmethod
+    def _drop_subscription(subscription_id: str, deferred: Deferred) -> None:
+        deferred.append(lambda: StripeObjectCache.invalidate(
+            StripeObjectCache.SUBSCRIPTION, subscription_id
+        ))
+
+    @staticmethod
+    def _set_transaction_status(stripe_id: Optional[str], status: str, db: Session) -> None:
+        if stripe_id:
+            db.query(TransactionHistory).filter(
+                TransactionHistory.stripe_transaction_id == stripe_id
+            ).update({"status": status, "updated_at": datetime.utcnow()}, synchronize_session=False)
+
+    @staticmethod
+    def handle_payment_intent_succeeded(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle payment_intent.succeeded webhook"""
+        payment_intent = event["data"]["object"]
+        StripeWebhookHandler._set_transaction_status(payment_intent["id"], "succeeded", db)
+
+    @staticmethod
+    def handle_charge_failed(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle charge.failed webhook"""
+        charge = event["data"]["object"]
+        StripeWebhookHandler._set_transaction_status(charge.get("payment_intent"), "failed", db)
+        logger.warning(f"Charge failed: {charge['id']} - {charge.get('failure_message')}")
+
+    @staticmethod
+    def handle_customer_subscription_created(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle customer.subscription.created webhook"""
+        StripeWebhookHandler.handle_customer_subscription_updated(event, db, deferred)
+
+    @staticmethod
+    def handle_customer_subscription_updated(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle customer.subscription.updated webhook"""
+        subscription = event["data"]["object"]
+        StripeWebhookHandler._drop_subscription(subscription["id"], deferred)
+        tenant = StripeWebhookHandler._tenant(subscription.get("customer"), db, deferred)
+        if tenant is None:
+            return
+
+        status = StripeWebhookHandler.SUBSCRIPTION_STATUSES.get(subscription.get("status"))
+        if status is not None:
+            tenant.subscription_status = status
+        tenant.stripe_subscription_id = subscription["id"]
+        tenant.current_period_start = _timestamp(subscription.get("current_period_start"))
+        tenant.current_period_end = _timestamp(subscription.get("current_period_end"))
+        tenant.next_billing_date = tenant.current_period_end
+        tenant.auto_renew = not subscription.get("cancel_at_period_end", False)
+        db.add(tenant)
+
+    @staticmethod
+    def handle_customer_subscription_deleted(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle customer.subscription.deleted webhook"""
+        subscription = event["data"]["object"]
+        StripeWebhookHandler._drop_subscription(subscription["id"], deferred)
+        tenant = StripeWebhookHandler._tenant(subscription.get("customer"), db, deferred)
+        if tenant is None:
+            return
+
+        tenant.subscription_status = SubscriptionStatus.CANCELLED
+        tenant.auto_renew = False
+        db.add(tenant)
+        logger.warning(f"Subscription cancelled: {subscription['id']} (tenant {tenant.id})")
+
+    @staticmethod
+    def handle_invoice_payment_succeeded(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle invoice.payment_succeeded webhook"""
+        invoice = event["data"]["object"]
+        tenant = StripeWebhookHandler._tenant(invoice.get("customer"), db, deferred)
+        if tenant is None:
+            return
+
+        if tenant.subscription_status == SubscriptionStatus.PAST_DUE:
+            tenant.subscription_status = SubscriptionStatus.ACTIVE
+            db.add(tenant)
+
+        already_recorded = db.query(TransactionHistory.id).filter(
+            TransactionHistory.stripe_invoice_id == invoice["id"]
+        ).first()
+        if already_recorded is None and invoice.get("amount_paid"):
+            db.add(TransactionHistory(
+                tenant_id=tenant.id,
+                transaction_type=TransactionType.SUBSCRIPTION_CHARGE,
+                description=f"Invoice {invoice.get('number') or invoice['id']}",
+                amount=invoice["amount_paid"],
+                currency=(invoice.get("currency") or "usd").upper(),
+                status="succeeded",
+                stripe_transaction_id=invoice.get("payment_intent"),
+                stripe_invoice_id=invoice["id"],
+            ))
+
+    @staticmethod
+    def handle_invoice_payment_failed(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle invoice.payment_failed webhook"""
+        invoice = event["data"]["object"]
+        tenant = StripeWebhookHandler._tenant(invoice.get("customer"), db, deferred)
+        if tenant is None:
+            return
+
+        tenant.subscription_status = SubscriptionStatus.PAST_DUE
+        db.add(tenant)
+
+        tenant_id = tenant.id
+        deferred.append(lambda: AbuseSignalEngine.record(
+            "payment_failed", tenant_id, details={"invoice": invoice["id"]}
+        ))
+        logger.warning(f"Invoice payment failed: {invoice['id']} (tenant {tenant_id})")
+
+    @staticmethod
+    def handle_price_changed(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle price.* and product.* webhooks"""
+        deferred.append(lambda: StripeObjectCache.invalidate(StripeObjectCache.PRICE))
+
+    @staticmethod
+    def handle_promotion_code_changed(event: Dict, db: Session, deferred: Deferred) -> None:
+        """Handle promotion_code.* and coupon.* webhooks"""
+        deferred.append(lambda: StripeObjectCache.invalidate(StripeObjectCache.PROMOTION_CODE))
+
+
+StripeWebhookHandler.HANDLERS = {
+    "payment_intent.succeeded": StripeWebhookHandler.handle_payment_intent_succeeded,
+    "charge.failed": StripeWebhookHandler.handle_charge_failed,
+    "customer.subscription.created": StripeWebhookHandler.handle_customer_subscription_created,
+    "customer.subscription.updated": StripeWebhookHandler.handle_customer_subscription_updated,
+    "customer.subscription.deleted": StripeWebhookHandler.handle_customer_subscription_deleted,
+    "invoice.payment_succeeded": StripeWebhookHandler.handle_invoice_payment_succeeded,
+    "invoice.payment_failed": StripeWebhookHandler.handle_invoice_payment_failed,
+    "price.created": StripeWebhookHandler.handle_price_changed,
+    "price.updated": StripeWebhookHandler.handle_price_changed,
+    "price.deleted": StripeWebhookHandler.handle_price_changed,
+    "product.updated": StripeWebhookHandler.handle_price_changed,
+    "product.deleted": StripeWebhookHandler.handle_price_changed,
+    "promotion_code.created": StripeWebhookHandler.handle_promotion_code_changed,
+    "promotion_code.updated": StripeWebhookHandler.handle_promotion_code_changed,
+    "coupon.updated": StripeWebhookHandler.handle_promotion_code_changed,
+    "coupon.deleted": StripeWebhookHandler.handle_promotion_code_changed,
+}
+
+
+class StripeEventQueue:
+    """Durable stripe_events queue: ingest on the request path, apply in a worker."""
+
+    @staticmethod
+    def verify(payload: bytes, signature: str) -> Dict[str, Any]:
+        """
+        Check the Stripe-Signature header and parse the event.
+
+        Raises:
+            ValueError: If the signature or payload is invalid
+        """
+        try:
+            stripe.Webhook.construct_event(payload, signature, settings.STRIPE_WEBHOOK_SECRET)
+        except stripe.error.SignatureVerificationError as e:
+            raise ValueError(f"Invalid Stripe signature: {str(e)}")
+        # Plain dict for the JSONB column
+        return json.loads(payload)
+
+    @staticmethod
+    def ingest(event: Dict[str, Any], db: Session) -> bool:
+        """
+        Store a verified event unless it was already received.
+
+        Returns:
+            True if the event is new
+        """
+        obj = event.get("data", {}).get("object", {})
+        customer_id = obj.get("id") if obj.get("object") == "customer" else obj.get("customer")
+
+        inserted = db.execute(
+            insert(StripeEvent)
+            .values(
+                id=event["id"],
+                type=event["type"],
+                customer_id=customer_id if isinstance(customer_id, str) else None,
+                stripe_created=_timestamp(event.get("created")) or datetime.utcnow(),
+                payload=event,
+                status="pending",
+                attempts=0,
+                received_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=["id"])
+            .returning(StripeEvent.id)
+        ).first()
+        db.commit()
+
+        if inserted is None:
+            logger.info(f"Duplicate Stripe event {event['id']} ignored")
+        return inserted is not None
+
+    @staticmethod
+    def process_pending() -> int:
+        """
+        Apply pending events, customer by customer (the worker's periodic call).
+
+        Returns:
+            Number of events applied
+        """
+        db = SessionLocal()
+        try:
+            customers = db.execute(text("""
+                SELECT customer_id FROM stripe_events
+                WHERE status = 'pending'
+                GROUP BY customer_id
+                ORDER BY min(stripe_created)
+                LIMIT :limit
+            """), {"limit": settings.STRIPE_EVENT_BATCH_SIZE}).scalars().all()
+            db.rollback()
+
+            return sum(StripeEventQueue._process_customer(customer_id, db) for customer_id in customers)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _process_customer(customer_id: Optional[str], db: Session) -> int:
+        # Held until commit: another worker skips this customer meanwhile
+        locked = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:namespace, hashtext(:key))"),
+            {"namespace": _LOCK_NAMESPACE, "key": customer_id or ""},
+        ).scalar()
+        if not locked:
+            db.rollback()
+            return 0
+
+        events = db.execute(
+            select(StripeEvent)
+            .where(
+                StripeEvent.status == "pending",
+                StripeEvent.customer_id.is_not_distinct_from(customer_id),
+            )
+            .order_by(StripeEvent.stripe_created, StripeEvent.received_at, StripeEvent.id)
+            .limit(settings.STRIPE_EVENT_BATCH_SIZE)
+        ).scalars().all()
+
+        applied = 0
+        deferred: Deferred = []
+        for event in events:
+            event_deferred: Deferred = []
+            try:
+                with db.begin_nested():
+                    handled = StripeWebhookHandler.dispatch(event.payload, db, event_deferred)
+            except Exception as e:
+                event.attempts += 1
+                event.last_error = str(e)[:2000]
+                if event.attempts < settings.STRIPE_EVENT_MAX_ATTEMPTS:
+                    # Retry later; later events of this customer wait behind it
+                    logger.error(f"Stripe event {event.id} ({event.type}) failed, will retry: {str(e)}")
+                    break
+                event.status = "failed"
+                logger.error(f"Stripe event {event.id} ({event.type}) failed permanently: {str(e)}")
+                continue
+
+            event.status = "processed" if handled else "ignored"
+            event.processed_at = datetime.utcnow()
+            deferred.extend(event_deferred)
+            applied += 1
+
+        db.commit()
+
+        for action in deferred:
+            try:
+                action()
+            except Exception as e:
+                logger.error(f"Post-commit Stripe event action failed: {str(e)}")
+
+        return applied
@@ -6,14 +6,18 @@ Core business logic for SaaS operations.
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 import logging
 
 from app.database.models import (
-    Tenant, Domain, Inbox, SubscriptionTier, SubscriptionStatus, 
-    BillingCycle
+    Tenant, Domain, DomainStatus, Inbox, InboxStatus, SubscriptionTier, SubscriptionStatus, 
+    BillingCycle, SuspensionSource
 )
 from app.config import settings
+from app.services.metering_service import APICallMeter
+from app.services.relay_service import RelayService
+from app.utils.auth import TenantCache
+from app.utils.cache import ResponseCache, CacheTag
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +26,12 @@ class SubscriptionService:
     """Manages subscription, trial, and usage limits."""
     
     @staticmethod
-    def create_trial(tenant: Tenant, db: Session, tier: SubscriptionTier = SubscriptionTier.STARTER) -> Tenant:
+    def create_trial(
+        tenant: Tenant,
+        db: Session,
+        tier: SubscriptionTier = SubscriptionTier.STARTER,
+        invalidate_caches: bool = True
+    ) -> Tenant:
         """
         Create a 7-day trial for a new tenant.
         
@@ -30,6 +39,8 @@ class SubscriptionService:
             tenant: The tenant to initialize trial for
             db: Database session
             tier: Trial subscription tier (default: Starter)
+            invalidate_caches: Drop the tenant's cached data (blocking Redis
+                calls; pass False from the event loop and invalidate separately)
         
         Returns:
             Updated tenant with trial initialized
@@ -48,14 +59,20 @@ class SubscriptionService:
         db.commit()
         db.refresh(tenant)
         
+        if invalidate_caches:
+            SubscriptionService.invalidate_tenant_caches(tenant.id)
+        
         logger.info(f"Trial created for tenant {tenant.id}, expires at {trial_end}")
         return tenant
     
     @staticmethod
-    def check_trial_expired(tenant: Tenant, db: Session) -> bool:
+    def check_trial_expired(tenant: Tenant, db: Session, invalidate_caches: bool = True) -> bool:
         """
         Check if trial has expired and convert to pending payment if needed.
         
+        Args:
+            invalidate_caches: As for create_trial
+        
         Returns:
             True if trial expired
         """
@@ -67,11 +84,19 @@ class SubscriptionService:
             tenant.subscription_tier = SubscriptionTier.TRIAL
             db.add(tenant)
             db.commit()
+            if invalidate_caches:
+                SubscriptionService.invalidate_tenant_caches(tenant.id)
             logger.warning(f"Trial expired for tenant {tenant.id}")
             return True
         
         return False
     
+    @staticmethod
+    def invalidate_tenant_caches(tenant_id) -> None:
+        """Drop cached tenant responses and auth snapshots after a subscription change."""
+        ResponseCache.invalidate(tenant_id, CacheTag.TENANT)
+        TenantCache.invalidate(tenant_id)
+    
     @staticmethod
     def get_plan_limits(tier: SubscriptionTier) -> Dict[str, int]:
         """
@@ -121,7 +146,8 @@ class SubscriptionService:
         
         # Count existing domains
         domain_count = db.query(Domain).filter(
-            Domain.tenant_id == tenant.id
+            Domain.tenant_id == tenant.id,
+            Domain.status != DomainStatus.DELETED
         ).count()
         
         if domain_count >= domain_limit:
@@ -147,7 +173,8 @@ class SubscriptionService:
         
         # Count existing inboxes
         inbox_count = db.query(Inbox).filter(
-            Inbox.tenant_id == tenant.id
+            Inbox.tenant_id == tenant.id,
+            Inbox.status != InboxStatus.DELETED
         ).count()
         
         if inbox_count >= inbox_limit:
@@ -171,11 +198,13 @@ class SubscriptionService:
         limits = SubscriptionService.get_plan_limits(tenant.subscription_tier)
         
         domain_count = db.query(Domain).filter(
-            Domain.tenant_id == tenant.id
+            Domain.tenant_id == tenant.id,
+            Domain.status != DomainStatus.DELETED
         ).count()
         
         inbox_count = db.query(Inbox).filter(
-            Inbox.tenant_id == tenant.id
+            Inbox.tenant_id == tenant.id,
+            Inbox.status != InboxStatus.DELETED
         ).count()
         
         # Calculate total emails sent this month
@@ -184,6 +213,12 @@ class SubscriptionService:
         ).all()
         total_emails_sent = sum(inbox.emails_sent_this_month for inbox in inboxes)
         
+        # The live counter runs ahead of the column by up to one flush interval
+        api_calls = APICallMeter.current(
+            tenant.id,
+            default=APICallMeter.stored(tenant.api_calls_this_month, tenant.api_calls_period),
+        )
+        
         return {
             "domains": {
                 "used": domain_count,
@@ -197,9 +232,9 @@ class SubscriptionService:
             },
             "emails_sent_this_month": total_emails_sent,
             "api_calls": {
-                "used": tenant.api_calls_this_month,
+                "used": api_calls,
                 "limit": limits["api_calls"],
-                "percentage": (tenant.api_calls_this_month / limits["api_calls"] * 100) if limits["api_calls"] > 0 else 0
+                "percentage": (api_calls / limits["api_calls"] * 100) if limits["api_calls"] > 0 else 0
             },
             "trial_days_remaining": SubscriptionService.get_trial_days_remaining(tenant)
         }
@@ -256,6 +291,9 @@ class SubscriptionService:
         db.commit()
         db.refresh(tenant)
         
+        ResponseCache.invalidate(tenant.id, CacheTag.TENANT)
+        TenantCache.invalidate(tenant.id)
+        
         logger.info(
             f"Tenant {tenant.id} upgraded to {new_tier.value} "
             f"with {billing_cycle.value} billing"
@@ -274,6 +312,9 @@ class SubscriptionService:
         db.commit()
         db.refresh(tenant)
         
+        ResponseCache.invalidate(tenant.id, CacheTag.TENANT)
+        TenantCache.invalidate(tenant.id)
+        
         logger.info(f"Tenant {tenant.id} downgraded to {new_tier.value}")
         return tenant
     
@@ -306,7 +347,9 @@ class SubscriptionService:
             db.add(tenant)
             db.commit()
             db.refresh(tenant)
-        
+            ResponseCache.invalidate(tenant.id, CacheTag.TENANT)
+            TenantCache.invalidate(tenant.id)
+
         logger.info(
             f"Tenant {tenant.id} cancelled subscription "
             f"({'at period end' if cancel_at_period_end else 'immediately'})"
@@ -320,7 +363,8 @@ class SubscriptionService:
         
         Immediately:
         1. Set is_suspended flag
-        2. Update KumoMTA config to exclude this tenant
+        2. Suspend all the tenant's inboxes (one UPDATE) and remove their
+           mailboxes from KumoMTA (pipelined Redis batches)
         3. Send suspension email
         
         Args:
@@ -337,13 +381,16 @@ class SubscriptionService:
         tenant.subscription_status = SubscriptionStatus.SUSPENDED
         
         db.add(tenant)
-        db.commit()
+        # Commits the tenant flags together with the inbox update
+        RelayService.suspend_inboxes(db, "tenant", SuspensionSource.ACCOUNT, Inbox.tenant_id == tenant.id)
         db.refresh(tenant)
         
+        ResponseCache.invalidate(tenant.id, CacheTag.TENANT, CacheTag.INBOXES)
+        TenantCache.invalidate(tenant.id)
+        
         logger.warning(f"Tenant {tenant.id} SUSPENDED: {reason}")
         
         # TODO: Send suspension email
-        # TODO: Trigger KumoMTA config reload to exclude this tenant
         
         return tenant
     
@@ -356,11 +403,24 @@ class SubscriptionService:
         tenant.subscription_status = SubscriptionStatus.ACTIVE
         
         db.add(tenant)
-        db.commit()
+        # Inboxes on domains that are still suspended now wait for their domain
+        RelayService.transfer_suspensions(
+            db, SuspensionSource.ACCOUNT, SuspensionSource.DOMAIN,
+            Inbox.tenant_id == tenant.id,
+            Inbox.domain_id.in_(select(Domain.id).where(
+                Domain.tenant_id == tenant.id, Domain.status == DomainStatus.SUSPENDED
+            )),
+        )
+        RelayService.restore_inboxes(db, SuspensionSource.ACCOUNT, Inbox.tenant_id == tenant.id)
         db.refresh(tenant)
         
-        logger.info(f"Tenant {tenant.id} unsuspended")
+        ResponseCache.invalidate(tenant.id, CacheTag.TENANT, CacheTag.INBOXES)
+        TenantCache.invalidate(tenant.id)
         
-        # TODO: Trigger KumoMTA config reload to re-include this tenant
+        # Imported here: the abuse engine itself depends on this service
+        from app.services.abuse_service import AbuseSignalEngine
+        AbuseSignalEngine.release_trips("tenant", tenant.id)
+        
+        logger.info(f"Tenant {tenant.id} unsuspended")
         
         return tenant
@@ -0,0 +1,401 @@
+"""
+Request authentication: JWT verification and tenant resolution.
+
+Requests authenticate with a bearer JWT or an `X-API-Key` header.
+Decoded tokens, API keys and a small tenant snapshot (suspension flag,
+tier, limits) are cached per process, so an authenticated request
+normally costs no database round trip. Routes that need the full Tenant
+entity load it through their own request session. Tenant changes are
+pushed to every process over Redis pub/sub; the snapshot TTL bounds
+staleness if a message is missed.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import jwt
+from fastapi import HTTPException, status, Request, Depends
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.models import Tenant, SubscriptionTier, SubscriptionStatus
+from app.database.redis_client import get_redis, get_pubsub_redis
+from app.database.session import get_db, SessionLocal
+from app.services.api_key_service import APIKeyService, APIKeyUsageTracker
+from app.services.metering_service import APICallMeter
+from app.utils.security import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Small thread-safe LRU cache with per-entry expiry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+@dataclass(frozen=True)
+class TenantSnapshot:
+    """The tenant fields every authenticated request needs."""
+    id: uuid.UUID
+    is_suspended: bool
+    is_active: bool
+    subscription_tier: SubscriptionTier
+    subscription_status: SubscriptionStatus
+    limits: Dict[str, int]
+
+
+class TokenCache:
+    """Per-process cache of verified JWT payloads."""
+
+    _cache = TTLCache(max_size=10000)
+
+    @classmethod
+    def decode(cls, token: str) -> Dict[str, Any]:
+        """
+        Verify a JWT, reusing the payload of a previously verified token.
+
+        Entries never outlive the token's own `exp`.
+
+        Raises:
+            jwt.ExpiredSignatureError: If the token has expired
+            jwt.InvalidTokenError: If the token is invalid
+        """
+        payload = cls._cache.get(token)
+        if payload is not None:
+            return payload
+
+        payload = jwt.decode(
+            token,
+            settings.JWT_SECRET,
+            algorithms=[settings.JWT_ALGORITHM]
+        )
+
+        ttl = settings.AUTH_TOKEN_CACHE_TTL
+        if payload.get("exp"):
+            ttl = min(ttl, payload["exp"] - datetime.utcnow().timestamp())
+        cls._cache.set(token, payload, ttl)
+
+        return payload
+
+
+class TenantCache:
+    """Per-process cache of tenant snapshots with pushed invalidation."""
+
+    CHANNEL = "tenant:invalidate"
+    LISTEN_POLL_SECONDS = 5.0
+
+    _cache = TTLCache(max_size=50000)
+    _listener: Optional[threading.Thread] = None
+
+    @classmethod
+    def get_snapshot(cls, tenant_id: str, db: Optional[Session] = None) -> Optional[TenantSnapshot]:
+        """
+        Get a tenant snapshot, loading it on a cache miss.
+
+        Args:
+            tenant_id: Tenant ID from the token
+            db: Session to load with on a miss (a short-lived one is opened otherwise)
+
+        Returns:
+            Snapshot, or None if the tenant does not exist
+        """
+        snapshot = cls._cache.get(str(tenant_id))
+        if snapshot is not None:
+            return snapshot
+
+        session = db or SessionLocal()
+        try:
+            row = session.query(
+                Tenant.id,
+                Tenant.is_suspended,
+                Tenant.is_active,
+                Tenant.subscription_tier,
+                Tenant.subscription_status,
+            ).filter(Tenant.id == tenant_id).first()
+        finally:
+            if db is None:
+                session.close()
+
+        if row is None:
+            return None
+
+        from app.services.subscription_service import SubscriptionService
+
+        snapshot = TenantSnapshot(
+            id=row.id,
+            is_suspended=bool(row.is_suspended),
+            is_active=bool(row.is_active),
+            subscription_tier=row.subscription_tier,
+            subscription_status=row.subscription_status,
+            limits=SubscriptionService.get_plan_limits(row.subscription_tier),
+        )
+        cls._cache.set(str(tenant_id), snapshot, settings.AUTH_TENANT_CACHE_TTL)
+        return snapshot
+
+    @classmethod
+    def invalidate(cls, tenant_id: Any) -> None:
+        """Drop a tenant snapshot here and in every other process."""
+        tenant_id = str(tenant_id)
+        cls._cache.pop(tenant_id)
+        try:
+            get_redis().publish(cls.CHANNEL, tenant_id)
+        except Exception as e:
+            logger.error(f"Tenant cache invalidation publish failed for {tenant_id}: {str(e)}")
+
+    @classmethod
+    def start_listener(cls) -> None:
+        """Start the background thread applying invalidations from other processes."""
+        if cls._listener and cls._listener.is_alive():
+            return
+
+        cls._listener = threading.Thread(
+            target=cls._listen, name="tenant-cache-invalidation", daemon=True
+        )
+        cls._listener.start()
+
+    @classmethod
+    def _listen(cls) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_pubsub_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.CHANNEL)
+                # Anything may have changed while we were not subscribed
+                cls._cache.clear()
+                while True:
+                    # Returns None when the channel is quiet; only a lost connection raises
+                    message = pubsub.get_message(timeout=cls.LISTEN_POLL_SECONDS)
+                    if message and message.get("type") == "message":
+                        cls._cache.pop(message["data"])
+            except Exception as e:
+                logger.warning(f"Tenant cache invalidation listener disconnected: {str(e)}")
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+                time.sleep(1)
+
+
+def _bearer_token(request: Request) -> str:
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing or invalid authorization header"
+        )
+    return auth_header.split(" ")[1]
+
+
+def _tenant_id_from_jwt(request: Request) -> str:
+    """Verify the bearer token and return its tenant ID."""
+    try:
+        payload = TokenCache.decode(_bearer_token(request))
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token expired"
+        )
+    except jwt.InvalidTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    tenant_id = payload.get("tenant_id")
+    if not tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    return tenant_id
+
+
+def _tenant_id_from_api_key(request: Request, raw_key: str, db: Session) -> str:
+    """
+    Resolve an X-API-Key header and return its tenant ID.
+
+    Safe methods require the "read" scope, everything else "write".
+    Usage is counted in memory and flushed in batches.
+    """
+    try:
+        api_key = APIKeyService.resolve(raw_key, db)
+    except Exception as e:
+        logger.error(f"API key lookup error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Authentication error"
+        )
+
+    if api_key is None or not api_key.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key"
+        )
+
+    if api_key.expires_at and api_key.expires_at <= datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="API key expired"
+        )
+
+    required_scope = "read" if request.method in ("GET", "HEAD", "OPTIONS") else "write"
+    if not api_key.has_scope(required_scope):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"API key lacks '{required_scope}' scope"
+        )
+
+    APIKeyUsageTracker.record(api_key.id)
+    request.state.api_key = api_key
+
+    return str(api_key.tenant_id)
+
+
+def get_current_tenant_snapshot(
+    request: Request,
+    db: Session = Depends(get_db)
+) -> TenantSnapshot:
+    """
+    Dependency resolving the authenticated tenant as a cached snapshot.
+
+    Declared sync on purpose: FastAPI runs it in the threadpool, so the
+    Redis round trips (rate limit, metering) and any cache-miss query do
+    not block the event loop.
+
+    Accepts a bearer JWT or an `X-API-Key` header. Rejects suspended
+    tenants, applies rate limits and meters the call against the plan's
+    monthly API call cap. Costs no database query while the token, key
+    and snapshot are cached; on a miss it reuses the request's session.
+    """
+    raw_key = request.headers.get("X-API-Key")
+    if raw_key:
+        tenant_id = _tenant_id_from_api_key(request, raw_key, db)
+    else:
+        tenant_id = _tenant_id_from_jwt(request)
+
+    try:
+        snapshot = TenantCache.get_snapshot(tenant_id, db)
+    except Exception as e:
+        logger.error(f"Auth error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Authentication error"
+        )
+
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tenant not found"
+        )
+
+    # Check if suspended
+    if snapshot.is_suspended:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account suspended"
+        )
+
+    # Check rate limits (headers are added to the response by middleware)
+    rate_limit = RateLimiter.check_rate_limit(str(snapshot.id))
+    request.state.rate_limit = rate_limit
+    if not rate_limit.allowed:
+        logger.warning(f"Rate limit exceeded for tenant {snapshot.id}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=rate_limit.error,
+            headers=rate_limit.headers
+        )
+
+    # Meter the call; the counter lives in Redis, the database is updated in batches
+    api_calls = APICallMeter.record(snapshot.id)
+    if api_calls > snapshot.limits["api_calls"]:
+        logger.warning(f"Monthly API call limit reached for tenant {snapshot.id}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=(
+                f"Monthly API call limit ({snapshot.limits['api_calls']}) reached. "
+                f"Upgrade for more API calls."
+            )
+        )
+
+    return snapshot
+
+
+def get_current_tenant(
+    snapshot: TenantSnapshot = Depends(get_current_tenant_snapshot),
+    db: Session = Depends(get_db)
+) -> Tenant:
+    """
+    Dependency to get the full authenticated Tenant entity.
+
+    Loaded through the route's own session, so it is attached to the
+    session the route commits with. Prefer get_current_tenant_snapshot
+    when only the id, tier or limits are needed.
+    """
+    tenant = db.get(Tenant, snapshot.id)
+    if not tenant:
+        TenantCache.invalidate(snapshot.id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tenant not found"
+        )
+
+    return tenant
+
+
+async def get_current_admin(
+    snapshot: TenantSnapshot = Depends(get_current_tenant_snapshot)
+) -> TenantSnapshot:
+    """
+    Dependency restricting a route to platform operators.
+
+    Operators are the tenants listed in ADMIN_TENANT_IDS.
+    """
+    if str(snapshot.id) not in settings.admin_tenant_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+
+    return snapshot
@@ -0,0 +1,64 @@
+"""
+In-process background workers.
+"""
+
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """
+    Daemon thread calling `flush` every `interval` seconds.
+
+    Used by write-behind buffers: request handlers only touch memory, and
+    the flusher persists the aggregate in one batched statement. `stop`
+    runs a final flush so nothing buffered is lost on a clean shutdown.
+    """
+
+    def __init__(self, name: str, interval: float, flush: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.flush = flush
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_first = False
+
+    def start(self, run_first: bool = False) -> None:
+        """
+        Start the flush thread (no-op if already running).
+
+        With `run_first`, the thread calls `flush` once right away instead
+        of waiting a full interval, without delaying the caller.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._run_first = run_first
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Started background flusher {self.name} (every {self.interval}s)")
+
+    def stop(self, timeout: float = 10, final_flush: bool = True) -> None:
+        """Stop the thread and flush whatever is still buffered."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if final_flush:
+            self._safe_flush()
+
+    def _run(self) -> None:
+        if self._run_first:
+            self._safe_flush()
+        while not self._stop.wait(self.interval):
+            self._safe_flush()
+
+    def _safe_flush(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Background flusher {self.name} failed: {str(e)}")
@@ -0,0 +1,135 @@
+"""
+Response caching for read-heavy GET endpoints.
+
+Entries are keyed by tenant, path and query string, and carry an ETag so
+polling dashboards get cheap 304s. Invalidation is tag-based: every cached
+entry embeds the current version of its tags, and mutating service methods
+bump those versions, so stale entries are simply never read again and
+expire on their TTL.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Iterable, List
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from app.database.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class CacheTag:
+    """Tags describing which tenant data a cached response depends on."""
+    TENANT = "tenant"
+    DOMAINS = "domains"
+    INBOXES = "inboxes"
+    BILLING = "billing"
+
+
+class ResponseCache:
+    """Tenant-scoped response cache with ETag support."""
+
+    KEY_PREFIX = "cache:resp"
+    TAG_PREFIX = "cache:tag"
+
+    @staticmethod
+    def _tag_key(tenant_id: str, tag: str) -> str:
+        return f"{ResponseCache.TAG_PREFIX}:{tenant_id}:{tag}"
+
+    @staticmethod
+    def _entry_key(request: Request, tenant_id: str, versions: List[str]) -> str:
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        raw = f"{request.url.path}?{query}|{','.join(versions)}"
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return f"{ResponseCache.KEY_PREFIX}:{tenant_id}:{digest}"
+
+    @staticmethod
+    def _etag(body: str) -> str:
+        return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+    @staticmethod
+    def _build_response(request: Request, body: str, hit: bool) -> Response:
+        """Return 304 if the client already has this body, else the JSON body."""
+        etag = ResponseCache._etag(body)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+            "X-Cache": "HIT" if hit else "MISS",
+        }
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def get_or_build(
+        request: Request,
+        tenant_id: Any,
+        tags: Iterable[str],
+        builder: Callable[[], Any],
+        ttl: int = None,
+    ) -> Response:
+        """
+        Serve a cached response or build, store and serve a fresh one.
+
+        Args:
+            request: Incoming request (path, query and If-None-Match are used)
+            tenant_id: Tenant owning the data
+            tags: Cache tags the response depends on
+            builder: Callable producing the JSON-serializable payload
+            ttl: Entry TTL in seconds (default: REDIS_CACHE_TTL)
+
+        Returns:
+            JSON response with ETag header, or 304 Not Modified
+        """
+        tenant_id = str(tenant_id)
+        tags = sorted(tags)
+        ttl = ttl or settings.REDIS_CACHE_TTL
+
+        key = None
+        try:
+            client = get_redis()
+            versions = client.mget([ResponseCache._tag_key(tenant_id, t) for t in tags])
+            key = ResponseCache._entry_key(request, tenant_id, [v or "0" for v in versions])
+
+            cached = client.get(key)
+            if cached is not None:
+                return ResponseCache._build_response(request, cached, hit=True)
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {str(e)}")
+
+        body = json.dumps(jsonable_encoder(builder()), separators=(",", ":"))
+
+        if key:
+            try:
+                get_redis().set(key, body, ex=ttl)
+            except Exception as e:
+                logger.warning(f"Response cache write failed: {str(e)}")
+
+        return ResponseCache._build_response(request, body, hit=False)
+
+    @staticmethod
+    def invalidate(tenant_id: Any, *tags: str) -> None:
+        """
+        Invalidate all cached responses of a tenant that depend on any of the tags.
+
+        Bumps the tag versions; entries built against older versions are
+        never read again and expire on their TTL.
+        """
+        if not tags:
+            return
+
+        tenant_id = str(tenant_id)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(ResponseCache._tag_key(tenant_id, tag))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Response cache invalidation failed for tenant {tenant_id}: {str(e)}")
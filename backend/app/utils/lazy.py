@@ -0,0 +1,41 @@
+"""
+Deferred imports for heavy optional integrations.
+
+Stripe, pyarrow, bcrypt and requests together dominate the API's import
+time but are only needed by a few endpoints. Binding them as LazyModule
+keeps module-level usage (`stripe.Customer.create(...)`) unchanged while
+the real import happens on first attribute access, after the worker is
+already serving.
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Callable, Optional
+
+
+class LazyModule:
+    """Module proxy that imports `name` on first attribute access."""
+
+    def __init__(self, name: str, setup: Optional[Callable[[ModuleType], None]] = None):
+        self._name = name
+        self._setup = setup
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._setup:
+                        self._setup(module)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
@@ -0,0 +1,44 @@
+"""
+Prometheus metrics, exposed at /metrics.
+"""
+
+from prometheus_client import Counter, Histogram
+
+SUSPENSION_FANOUT_SECONDS = Histogram(
+    "inboxgrove_suspension_fanout_seconds",
+    "Time from suspension request until all affected mailboxes are cut off",
+    ["scope"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+MAILBOXES_CUT_OFF = Counter(
+    "inboxgrove_mailboxes_cut_off_total",
+    "Mailbox keys removed from the KumoMTA datasource by suspensions",
+    ["scope"],
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "inboxgrove_db_queries_per_request",
+    "SQL statements executed while handling a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+DB_TIME_PER_REQUEST = Histogram(
+    "inboxgrove_db_seconds_per_request",
+    "Time spent executing SQL while handling a request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+REPEATED_QUERIES = Counter(
+    "inboxgrove_repeated_queries_total",
+    "Statements repeated above QUERY_REPEAT_THRESHOLD within one request (likely N+1)",
+    ["route"],
+)
+
+AUDIT_EVENTS_DROPPED = Counter(
+    "inboxgrove_audit_events_dropped_total",
+    "Audit events lost because the queue was full, writes kept failing or the row was rejected",
+    ["reason"],
+)
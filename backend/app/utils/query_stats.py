@@ -0,0 +1,91 @@
+"""
+Per-request SQL query accounting.
+
+Cursor-execute hooks on every SQLAlchemy engine count the statements a
+request runs and the time spent in the database. The totals are returned
+in a Server-Timing header and recorded as metrics, and any statement
+repeated more than QUERY_REPEAT_THRESHOLD times within one request (the
+signature of an N+1 loop) is logged and counted.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.utils.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, REPEATED_QUERIES
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_PATTERN = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class QueryStats:
+    """Queries run on behalf of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+        # Threadpool work for the same request shares this object
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int):
+        """Statements executed more than `threshold` times, most frequent first."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count > threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.pop("query_started", None)
+    if stats is not None and started is not None:
+        stats.add(statement, time.perf_counter() - started)
+
+
+def start_request() -> QueryStats:
+    """Start counting queries for the current request."""
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+def finish_request(stats: QueryStats, route: str, response: Response) -> None:
+    """Attach the Server-Timing header, record metrics and flag N+1 patterns."""
+    response.headers.append("Server-Timing", stats.server_timing())
+    DB_QUERIES_PER_REQUEST.labels(route=route).observe(stats.count)
+    DB_TIME_PER_REQUEST.labels(route=route).observe(stats.duration)
+
+    for statement, count in stats.repeated(settings.QUERY_REPEAT_THRESHOLD):
+        REPEATED_QUERIES.labels(route=route).inc()
+        logger.warning(
+            f"Possible N+1 in {route}: statement ran {count} times: "
+            f"{' '.join(statement.split())[:200]}"
+        )
+
@@ -6,20 +6,22 @@ The "Kill Switch" for anti-abuse.
 import logging
 import hashlib
 import secrets
-from functools import lru_cache
-from typing import Optional, Tuple
-from datetime import datetime, timedelta
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 
-import bcrypt
-from fastapi import HTTPException, status, Request, Depends
 from sqlalchemy.orm import Session
-import jwt
 
 from app.config import settings
-from app.database.models import Tenant
+from app.database.redis_client import get_redis
+from app.services.audit_service import AuditLogWriter
+from app.utils.lazy import LazyModule
 
 logger = logging.getLogger(__name__)
 
+bcrypt = LazyModule("bcrypt")
+
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt."""
@@ -31,140 +33,162 @@ def verify_password(password: str, password_hash: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
 
 
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a rate limit check, including values for X-RateLimit-* headers."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: int  # Seconds until the binding window rolls over
+    error: Optional[str] = None
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset_after),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.reset_after)
+        return headers
+
+
 class RateLimiter:
-    """Rate limiting per tenant."""
+    """
+    Rate limiting per tenant, shared across workers through Redis.
+    
+    Uses an approximate sliding window per limit: the count of the current
+    fixed window plus the previous window's count weighted by how much of
+    it still overlaps the sliding window. Each check is one atomic Lua
+    call touching four counters, i.e. O(1) per request. If Redis is
+    unavailable, the same algorithm runs per process.
+    """
+    
+    WINDOWS = (("minute", 60), ("hour", 3600))
+    
+    # KEYS: minute current/previous, hour current/previous
+    # ARGV: minute limit, minute weight, hour limit, hour weight, minute TTL, hour TTL
+    LUA_SCRIPT = """
+    local function estimate(current, previous, weight)
+        local curr = tonumber(redis.call('GET', current) or '0')
+        local prev = tonumber(redis.call('GET', previous) or '0')
+        return curr + math.floor(prev * weight)
+    end
+    local minute = estimate(KEYS[1], KEYS[2], tonumber(ARGV[2]))
+    local hour = estimate(KEYS[3], KEYS[4], tonumber(ARGV[4]))
+    if minute >= tonumber(ARGV[1]) then
+        return {0, 1, minute, hour}
+    end
+    if hour >= tonumber(ARGV[3]) then
+        return {0, 2, minute, hour}
+    end
+    redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+    redis.call('INCR', KEYS[3])
+    redis.call('EXPIRE', KEYS[3], ARGV[6])
+    return {1, 0, minute + 1, hour + 1}
+    """
     
-    # In-memory store (use Redis in production)
-    _request_counts = {}
+    _script = None
+    
+    # In-process fallback: key -> (window index, current count, previous count)
+    _local_counts: Dict[str, Tuple[int, int, int]] = {}
+    _local_lock = threading.Lock()
+    _local_max_keys = 100000
     
     @classmethod
-    def check_rate_limit(cls, tenant_id: str) -> Tuple[bool, Optional[str]]:
+    def check_rate_limit(cls, tenant_id: str) -> RateLimitResult:
         """
-        Check if tenant has exceeded rate limits.
+        Count a request against the tenant's per-minute and per-hour limits.
         
         Returns:
-            Tuple of (allowed: bool, error_message: Optional[str])
+            RateLimitResult (a rejected request is not counted)
         """
-        if not settings.RATE_LIMIT_ENABLED:
-            return True, None
+        minute_limit = settings.RATE_LIMIT_REQUESTS_PER_MINUTE
+        hour_limit = settings.RATE_LIMIT_REQUESTS_PER_HOUR
         
-        now = datetime.utcnow()
-        key = f"tenant_{tenant_id}"
+        if not settings.RATE_LIMIT_ENABLED:
+            return RateLimitResult(True, minute_limit, minute_limit, 0)
         
-        if key not in cls._request_counts:
-            cls._request_counts[key] = []
+        now = time.time()
+        windows = []
+        for name, size in cls.WINDOWS:
+            index = int(now // size)
+            elapsed = now - index * size
+            windows.append((name, size, index, 1 - elapsed / size, int(size - elapsed) + 1))
         
-        # Clean old requests (older than 1 hour)
-        cls._request_counts[key] = [
-            ts for ts in cls._request_counts[key]
-            if now - ts < timedelta(hours=1)
-        ]
+        try:
+            allowed, blocked_by, minute_count, hour_count = cls._check_redis(tenant_id, windows)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, using local counters: {str(e)}")
+            allowed, blocked_by, minute_count, hour_count = cls._check_local(tenant_id, windows)
         
-        # Check minute limit
-        recent_minute = sum(
-            1 for ts in cls._request_counts[key]
-            if now - ts < timedelta(minutes=1)
-        )
+        remaining = max(0, min(minute_limit - minute_count, hour_limit - hour_count))
         
-        if recent_minute >= settings.RATE_LIMIT_REQUESTS_PER_MINUTE:
-            return False, "Rate limit exceeded (per minute)"
+        if blocked_by == 1:
+            return RateLimitResult(False, minute_limit, 0, windows[0][4], "Rate limit exceeded (per minute)")
+        if blocked_by == 2:
+            return RateLimitResult(False, hour_limit, 0, windows[1][4], "Rate limit exceeded (per hour)")
         
-        # Check hour limit
-        if len(cls._request_counts[key]) >= settings.RATE_LIMIT_REQUESTS_PER_HOUR:
-            return False, "Rate limit exceeded (per hour)"
+        return RateLimitResult(bool(allowed), minute_limit, remaining, windows[0][4])
+    
+    @classmethod
+    def _check_redis(cls, tenant_id: str, windows) -> Tuple[int, int, int, int]:
+        if cls._script is None:
+            cls._script = get_redis().register_script(cls.LUA_SCRIPT)
         
-        # Add this request
-        cls._request_counts[key].append(now)
+        # Hash tag keeps all of a tenant's counters in one cluster slot
+        keys = []
+        for name, size, index, weight, _ in windows:
+            keys.append(f"ratelimit:{{{tenant_id}}}:{name}:{index}")
+            keys.append(f"ratelimit:{{{tenant_id}}}:{name}:{index - 1}")
+        args = [
+            settings.RATE_LIMIT_REQUESTS_PER_MINUTE, windows[0][3],
+            settings.RATE_LIMIT_REQUESTS_PER_HOUR, windows[1][3],
+            windows[0][1] * 2, windows[1][1] * 2,
+        ]
         
-        return True, None
-
-
-async def get_current_tenant(
-    request: Request,
-    db: Session = Depends(lambda: None)
-) -> Tenant:
-    """
-    Dependency to get current authenticated tenant from JWT token.
+        allowed, blocked_by, minute_count, hour_count = cls._script(keys=keys, args=args)
+        return int(allowed), int(blocked_by), int(minute_count), int(hour_count)
     
-    Validates token and returns tenant object.
-    """
-    from app.database.session import SessionLocal
-    
-    if not db:
-        db = SessionLocal()
-    
-    try:
-        # Get token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Missing or invalid authorization header"
-            )
-        
-        token = auth_header.split(" ")[1]
-        
-        # Verify JWT
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+    @classmethod
+    def _check_local(cls, tenant_id: str, windows) -> Tuple[int, int, int, int]:
+        limits = (settings.RATE_LIMIT_REQUESTS_PER_MINUTE, settings.RATE_LIMIT_REQUESTS_PER_HOUR)
+        
+        with cls._local_lock:
+            if len(cls._local_counts) > cls._local_max_keys:
+                cls._prune_local(windows)
+            
+            states = []
+            estimates = []
+            for name, size, index, weight, _ in windows:
+                key = f"{tenant_id}:{name}"
+                window_index, current, previous = cls._local_counts.get(key, (index, 0, 0))
+                if window_index != index:
+                    # Roll forward; anything older than one window no longer overlaps
+                    previous = current if window_index == index - 1 else 0
+                    current = 0
+                states.append((key, index, current, previous))
+                estimates.append(current + int(previous * weight))
+            
+            for position, (estimate, limit) in enumerate(zip(estimates, limits), start=1):
+                if estimate >= limit:
+                    return 0, position, estimates[0], estimates[1]
+            
+            for key, index, current, previous in states:
+                cls._local_counts[key] = (index, current + 1, previous)
         
-        tenant_id = payload.get("tenant_id")
-        if not tenant_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        # Get tenant from database
-        tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
-        if not tenant:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Tenant not found"
-            )
-        
-        # Check if suspended
-        if tenant.is_suspended:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Account suspended"
-            )
-        
-        # Check rate limits
-        allowed, error = RateLimiter.check_rate_limit(str(tenant.id))
-        if not allowed:
-            logger.warning(f"Rate limit exceeded for tenant {tenant.id}")
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=error
-            )
-        
-        return tenant
+        return 1, 0, estimates[0] + 1, estimates[1] + 1
     
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token expired"
-        )
-    except jwt.JWTError as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Auth error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Authentication error"
-        )
-    finally:
-        if db:
-            db.close()
+    @classmethod
+    def _prune_local(cls, windows) -> None:
+        """Drop counters of tenants idle for more than a full window."""
+        current_index = {name: index for name, _, index, _, _ in windows}
+        cls._local_counts = {
+            key: state for key, state in cls._local_counts.items()
+            if state[0] >= current_index[key.rsplit(":", 1)[1]] - 1
+        }
 
 
 class SuspensionManager:
@@ -179,30 +203,52 @@ class SuspensionManager:
     5. Background tasks pause
     """
     
+    # Decayed signal counts at which an entity is suspended
+    ABUSE_THRESHOLDS = {
+        "spam_complaint": 10,   # Suspend after 10 complaints
+        "hard_bounce": 50,      # Minimum bounces before the bounce rate is judged
+        "blacklisted": 1,       # Immediate
+        "payment_failed": 3,    # After 3 failed charges
+        "terms_violation": 1,   # Immediate
+    }
+    
+    # Signals judged as a share of sending volume (signal / (signal + volume))
+    RATE_THRESHOLDS = {
+        "hard_bounce": 0.05,    # Sustained invalid-recipient sending
+    }
+    
     @staticmethod
-    def should_suspend(tenant: Tenant, reason_code: str) -> Tuple[bool, str]:
+    def should_suspend(
+        reason_code: str,
+        signal_count: float,
+        volume: Optional[float] = None
+    ) -> Tuple[bool, str]:
         """
-        Determine if tenant should be suspended based on abuse signals.
+        Determine if an entity should be suspended based on abuse signals.
+        
+        Counts come from AbuseSignalEngine's decaying counters, so this is
+        a constant-time comparison. For rate signals `volume` is the decayed
+        count of deliveries over the same half-life; the entity is suspended
+        once both the count and the rate thresholds are reached.
         
         Reasons:
         - "spam_complaint": Too many spam complaints from ISPs
+        - "hard_bounce": Too many hard bounces (list quality)
         - "blacklisted": Domain/IP blacklisted
         - "payment_failed": Payment failed 3x
-        - "manual": Admin flagged for review
         - "terms_violation": Violated terms of service
         """
-        abuse_signals = {
-            "spam_complaint": 10,  # Suspend after 10 complaints
-            "blacklisted": 1,       # Immediate
-            "payment_failed": 3,    # After 3 failed charges
-            "terms_violation": 1,   # Immediate
-        }
-        
-        if reason_code not in abuse_signals:
+        threshold = SuspensionManager.ABUSE_THRESHOLDS.get(reason_code)
+        if threshold is None:
             return False, f"Unknown reason: {reason_code}"
         
-        # Check if threshold exceeded
-        # In production, query abuse tracking table
+        if signal_count < threshold:
+            return False, reason_code
+        
+        max_rate = SuspensionManager.RATE_THRESHOLDS.get(reason_code)
+        if max_rate is not None:
+            rate = signal_count / (signal_count + (volume or 0))
+            return rate >= max_rate, reason_code
         
         return True, reason_code
     
@@ -213,13 +259,23 @@ class SuspensionManager:
         details: dict,
         db: Session
     ):
-        """Log abuse event for review."""
+        """
+        Log abuse event for review.
+        
+        Queued to the audit log (written in batches) for manual review
+        by admins.
+        """
         logger.warning(
             f"Abuse event for tenant {tenant_id}: {event_type} - {details}"
         )
         
-        # TODO: Save to audit log / abuse table
-        # This creates a record for manual review by admins
+        AuditLogWriter.record(
+            tenant_id=tenant_id,
+            action=f"abuse.{event_type}",
+            resource_type="tenant",
+            resource_id=tenant_id,
+            changes=details,
+        )
 
 
 def generate_api_key() -> str:
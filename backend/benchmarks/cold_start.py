@@ -0,0 +1,76 @@
+"""
+Cold-start benchmark: process launch to first successful /health.
+
+Starts the API with uvicorn in a fresh process, polls /health until it
+answers 200 and reports the elapsed time, repeated over several runs.
+This is the delay a new worker adds before it takes traffic when the
+service scales out or restarts.
+
+Run from the backend directory with the application's environment set
+and its database and Redis reachable:
+
+Usage:
+    python benchmarks/cold_start.py --runs 5 --port 8765
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+
+def measure(port: int, timeout: float) -> Optional[float]:
+    """Seconds until /health answers 200, or None on timeout."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    try:
+        with httpx.Client(timeout=1) as client:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    sys.exit(f"Server exited with code {process.returncode}")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+        return None
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def main(runs: int, port: int, timeout: float) -> None:
+    timings = []
+    for run in range(1, runs + 1):
+        elapsed = measure(port, timeout)
+        if elapsed is None:
+            print(f"run {run}: no healthy response within {timeout:.0f}s")
+            continue
+        timings.append(elapsed)
+        print(f"run {run}: {elapsed * 1000:.0f} ms")
+
+    if timings:
+        print(
+            f"\ncold start to /health: min {min(timings) * 1000:.0f} ms, "
+            f"median {statistics.median(timings) * 1000:.0f} ms, "
+            f"max {max(timings) * 1000:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts")
+    parser.add_argument("--port", type=int, default=8765, help="Port to bind")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait per run")
+    args = parser.parse_args()
+
+    main(args.runs, args.port, args.timeout)
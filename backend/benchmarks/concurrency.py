@@ -0,0 +1,92 @@
+"""
+Concurrency benchmark: throughput vs. in-flight requests.
+
+Runs a fixed number of requests against a running API at increasing
+concurrency levels and reports requests/second and latency percentiles.
+With a non-blocking request path, throughput should keep rising with
+concurrency until the worker's CPU or the database pool saturates; a
+blocked event loop shows up as flat throughput and latency growing
+linearly with concurrency.
+
+Usage:
+    python benchmarks/concurrency.py --url http://localhost:8000/api/v1/domains/ \\
+        --token "$ACCESS_TOKEN" --levels 1,4,16,64 --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+import httpx
+
+
+async def _run_level(
+    client: httpx.AsyncClient,
+    url: str,
+    concurrency: int,
+    total: int
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def main(url: str, token: Optional[str], levels: List[int], total: int) -> None:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30) as client:
+        # Warm up connections and caches
+        await _run_level(client, url, min(levels), min(total, 50))
+
+        print(f"{'concurrency':>11} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+        for level in levels:
+            result = await _run_level(client, url, level, total)
+            print(
+                f"{result['concurrency']:>11} {result['rps']:>10.1f} "
+                f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", required=True, help="Endpoint to request (GET)")
+    parser.add_argument("--token", help="Bearer token for authenticated endpoints")
+    parser.add_argument("--levels", default="1,4,16,64", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per level")
+    args = parser.parse_args()
+
+    asyncio.run(main(
+        args.url,
+        args.token,
+        [int(level) for level in args.levels.split(",")],
+        args.requests,
+    ))
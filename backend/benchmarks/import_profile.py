@@ -0,0 +1,85 @@
+"""
+Import-time profile of the API process.
+
+Imports the application in a fresh interpreter with `-X importtime` and
+reports where the time goes: total import time, the slowest top-level
+imports (cumulative) and the packages with the most self time. With
+--budget-ms the script exits non-zero when the total exceeds the budget,
+so it can gate CI.
+
+Run from the backend directory with the application's environment set
+(DATABASE_URL, SECRET_KEY, ...):
+
+Usage:
+    python benchmarks/import_profile.py --top 15 --budget-ms 1500
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(module: str) -> List[Tuple[int, int, int, str]]:
+    """(self_us, cumulative_us, depth, name) for every module imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            rows.append((
+                int(match.group(1)),
+                int(match.group(2)),
+                len(match.group(3)) // 2,
+                match.group(4),
+            ))
+    return rows
+
+
+def main(module: str, top: int, budget_ms: float) -> int:
+    rows = profile(module)
+    total_ms = sum(cumulative for _, cumulative, depth, _ in rows if depth == 0) / 1000
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"Total import time of {module}: {total_ms:.0f} ms ({len(rows)} modules)\n")
+
+    print(f"{'cumulative ms':>13}  top-level import")
+    for _, cumulative, _, name in sorted(
+        (row for row in rows if row[2] == 0), key=lambda row: -row[1]
+    )[:top]:
+        print(f"{cumulative / 1000:>13.1f}  {name}")
+
+    print(f"\n{'self ms':>13}  package")
+    for name, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"{self_us / 1000:>13.1f}  {name}")
+
+    if budget_ms and total_ms > budget_ms:
+        print(f"\nOver budget: {total_ms:.0f} ms > {budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--budget-ms", type=float, default=0, help="Fail above this total (0: no budget)")
+    args = parser.parse_args()
+
+    sys.exit(main(args.module, args.top, args.budget_ms))
@@ -0,0 +1,299 @@
+"""Baseline schema
+
+Creates the tables previously created by init_db() at startup, as they
+were defined then. The DDL is spelled out instead of taken from the
+models, so later model changes (which ship as their own revisions) do
+not change what this revision creates. Databases that were bootstrapped
+by init_db already have the tables; existing tables are skipped, so
+running this revision there is a no-op.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _tenants() -> None:
+    op.create_table(
+        "tenants",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("company_name", sa.String(255), nullable=False),
+        sa.Column("company_email", sa.String(255), nullable=False, unique=True),
+        sa.Column("company_website", sa.String(255), nullable=True),
+        sa.Column(
+            "subscription_tier",
+            sa.Enum("TRIAL", "STARTER", "GROWTH", "ENTERPRISE", name="subscriptiontier"),
+            nullable=True,
+        ),
+        sa.Column(
+            "subscription_status",
+            sa.Enum(
+                "TRIAL", "ACTIVE", "PAST_DUE", "PAUSED", "CANCELLED", "SUSPENDED",
+                name="subscriptionstatus",
+            ),
+            nullable=True,
+        ),
+        sa.Column("stripe_customer_id", sa.String(255), nullable=True, unique=True),
+        sa.Column("stripe_subscription_id", sa.String(255), nullable=True, unique=True),
+        sa.Column("trial_started_at", sa.DateTime(), nullable=True),
+        sa.Column("trial_ends_at", sa.DateTime(), nullable=True),
+        sa.Column("trial_inbox_limit", sa.Integer(), nullable=True),
+        sa.Column("trial_domain_limit", sa.Integer(), nullable=True),
+        sa.Column("trial_converted", sa.Boolean(), nullable=True),
+        sa.Column("billing_cycle", sa.Enum("MONTHLY", "YEARLY", name="billingcycle"), nullable=True),
+        sa.Column("subscription_started_at", sa.DateTime(), nullable=True),
+        sa.Column("current_period_start", sa.DateTime(), nullable=True),
+        sa.Column("current_period_end", sa.DateTime(), nullable=True),
+        sa.Column("next_billing_date", sa.DateTime(), nullable=True),
+        sa.Column("auto_renew", sa.Boolean(), nullable=True),
+        sa.Column("billing_address", sa.Text(), nullable=True),
+        sa.Column("billing_city", sa.String(100), nullable=True),
+        sa.Column("billing_state", sa.String(100), nullable=True),
+        sa.Column("billing_postal_code", sa.String(20), nullable=True),
+        sa.Column("billing_country", sa.String(2), nullable=True),
+        sa.Column("tax_id", sa.String(50), nullable=True),
+        sa.Column("is_suspended", sa.Boolean(), nullable=True),
+        sa.Column("suspension_reason", sa.Text(), nullable=True),
+        sa.Column("suspended_at", sa.DateTime(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("domains_count", sa.Integer(), nullable=True),
+        sa.Column("inboxes_count", sa.Integer(), nullable=True),
+        sa.Column("api_calls_this_month", sa.Integer(), nullable=True),
+        sa.Column("metadata", JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_tenants_email", "tenants", ["company_email"])
+    op.create_index("ix_tenants_stripe_customer_id", "tenants", ["stripe_customer_id"])
+    op.create_index("ix_tenants_is_suspended", "tenants", ["is_suspended"])
+    op.create_index("ix_tenants_is_active", "tenants", ["is_active"])
+
+
+def _users() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("first_name", sa.String(100), nullable=False),
+        sa.Column("last_name", sa.String(100), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("two_factor_enabled", sa.Boolean(), nullable=True),
+        sa.Column("two_factor_secret", sa.String(255), nullable=True),
+        sa.Column("last_login_at", sa.DateTime(), nullable=True),
+        sa.Column("last_activity_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("tenant_id", "email", name="uq_tenant_user_email"),
+    )
+    op.create_index("ix_users_email", "users", ["email"])
+    op.create_index("ix_users_tenant_id", "users", ["tenant_id"])
+
+
+def _domains() -> None:
+    op.create_table(
+        "domains",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("domain_name", sa.String(255), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum(
+                "PENDING_PURCHASE", "PENDING_DNS", "DNS_VERIFIED", "ACTIVE", "SUSPENDED", "EXPIRED",
+                name="domainstatus",
+            ),
+            nullable=True,
+        ),
+        sa.Column("is_system_purchased", sa.Boolean(), nullable=True),
+        sa.Column("registrar_provider", sa.String(50), nullable=True),
+        sa.Column("registrar_domain_id", sa.String(255), nullable=True),
+        sa.Column("registrar_auth_code", sa.String(255), nullable=True),
+        sa.Column("cloudflare_zone_id", sa.String(255), nullable=True),
+        sa.Column("cloudflare_name_servers", ARRAY(sa.String()), nullable=True),
+        sa.Column("dns_verified_at", sa.DateTime(), nullable=True),
+        sa.Column("dns_records", JSONB(), nullable=True),
+        sa.Column("purchase_price", sa.Numeric(10, 2), nullable=True),
+        sa.Column("purchase_date", sa.DateTime(), nullable=True),
+        sa.Column("renewal_date", sa.DateTime(), nullable=True),
+        sa.Column("expiry_date", sa.DateTime(), nullable=True),
+        sa.Column("is_auto_renew", sa.Boolean(), nullable=True),
+        sa.Column("kumo_authorized", sa.Boolean(), nullable=True),
+        sa.Column("kumo_authorized_at", sa.DateTime(), nullable=True),
+        sa.Column("metadata", JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("tenant_id", "domain_name", name="uq_tenant_domain"),
+    )
+    op.create_index("ix_domains_tenant_id", "domains", ["tenant_id"])
+    op.create_index("ix_domains_status", "domains", ["status"])
+
+
+def _inboxes() -> None:
+    op.create_table(
+        "inboxes",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("domain_id", UUID(as_uuid=True), sa.ForeignKey("domains.id"), nullable=False),
+        sa.Column("username", sa.String(100), nullable=False),
+        sa.Column("password", sa.String(255), nullable=False),
+        sa.Column("full_email", sa.String(255), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "ACTIVE", "SUSPENDED", "DELETED", name="inboxstatus"),
+            nullable=True,
+        ),
+        sa.Column("smtp_host", sa.String(255), nullable=True),
+        sa.Column("smtp_port", sa.Integer(), nullable=True),
+        sa.Column("warmup_stage", sa.Integer(), nullable=True),
+        sa.Column("warmup_started_at", sa.DateTime(), nullable=True),
+        sa.Column("warmup_completed_at", sa.DateTime(), nullable=True),
+        sa.Column("emails_sent_today", sa.Integer(), nullable=True),
+        sa.Column("emails_sent_this_month", sa.Integer(), nullable=True),
+        sa.Column("daily_limit", sa.Integer(), nullable=True),
+        sa.Column("monthly_limit", sa.Integer(), nullable=True),
+        sa.Column("health_score", sa.Float(), nullable=True),
+        sa.Column("last_health_check_at", sa.DateTime(), nullable=True),
+        sa.Column("is_blacklisted", sa.Boolean(), nullable=True),
+        sa.Column("blacklist_reason", sa.Text(), nullable=True),
+        sa.Column("blacklist_date", sa.DateTime(), nullable=True),
+        sa.Column("metadata", JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("domain_id", "username", name="uq_domain_username"),
+    )
+    op.create_index("ix_inboxes_tenant_id", "inboxes", ["tenant_id"])
+    op.create_index("ix_inboxes_domain_id", "inboxes", ["domain_id"])
+    op.create_index("ix_inboxes_status", "inboxes", ["status"])
+
+
+def _payment_methods() -> None:
+    op.create_table(
+        "payment_methods",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("stripe_payment_method_id", sa.String(255), nullable=False),
+        sa.Column("card_brand", sa.String(50), nullable=False),
+        sa.Column("card_last_four", sa.String(4), nullable=False),
+        sa.Column("card_exp_month", sa.Integer(), nullable=False),
+        sa.Column("card_exp_year", sa.Integer(), nullable=False),
+        sa.Column("is_default", sa.Boolean(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("tenant_id", "stripe_payment_method_id", name="uq_tenant_payment_method"),
+    )
+    op.create_index("ix_payment_methods_tenant_id", "payment_methods", ["tenant_id"])
+
+
+def _transaction_history() -> None:
+    op.create_table(
+        "transaction_history",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column(
+            "transaction_type",
+            sa.Enum(
+                "SUBSCRIPTION_CHARGE", "DOMAIN_PURCHASE", "OVERAGE_CHARGE", "REFUND",
+                "CREDIT_APPLICATION",
+                name="transactiontype",
+            ),
+            nullable=False,
+        ),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("currency", sa.String(3), nullable=True),
+        sa.Column("status", sa.String(50), nullable=True),
+        sa.Column("stripe_transaction_id", sa.String(255), nullable=True),
+        sa.Column("stripe_invoice_id", sa.String(255), nullable=True),
+        sa.Column("domain_id", UUID(as_uuid=True), sa.ForeignKey("domains.id"), nullable=True),
+        sa.Column("related_data", JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_transaction_tenant_id", "transaction_history", ["tenant_id"])
+    op.create_index("ix_transaction_type", "transaction_history", ["transaction_type"])
+    op.create_index("ix_transaction_date", "transaction_history", ["created_at"])
+    op.create_index("ix_transaction_stripe_id", "transaction_history", ["stripe_transaction_id"])
+    op.create_index(
+        "ix_transaction_history_stripe_transaction_id", "transaction_history", ["stripe_transaction_id"]
+    )
+
+
+def _api_keys() -> None:
+    op.create_table(
+        "api_keys",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("key_hash", sa.String(255), nullable=False),
+        sa.Column("scopes", ARRAY(sa.String()), nullable=True),
+        sa.Column("last_used_at", sa.DateTime(), nullable=True),
+        sa.Column("usage_count", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("key_hash", name="uq_api_key_hash"),
+    )
+    op.create_index("ix_api_keys_tenant_id", "api_keys", ["tenant_id"])
+    op.create_index("ix_api_keys_key_hash", "api_keys", ["key_hash"])
+
+
+def _audit_logs() -> None:
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("action", sa.String(100), nullable=False),
+        sa.Column("resource_type", sa.String(50), nullable=False),
+        sa.Column("resource_id", sa.String(255), nullable=True),
+        sa.Column("changes", JSONB(), nullable=True),
+        sa.Column("ip_address", sa.String(45), nullable=True),
+        sa.Column("user_agent", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_audit_logs_tenant_id", "audit_logs", ["tenant_id"])
+    op.create_index("ix_audit_logs_action", "audit_logs", ["action"])
+    op.create_index("ix_audit_logs_date", "audit_logs", ["created_at"])
+
+
+# In dependency order
+CREATE = {
+    "tenants": _tenants,
+    "users": _users,
+    "domains": _domains,
+    "inboxes": _inboxes,
+    "payment_methods": _payment_methods,
+    "transaction_history": _transaction_history,
+    "api_keys": _api_keys,
+    "audit_logs": _audit_logs,
+}
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, create in CREATE.items():
+        if name not in existing:
+            create()
+
+
+def downgrade() -> None:
+    for name in reversed(list(CREATE)):
+        op.drop_table(name)
+    for enum in (
+        "transactiontype", "inboxstatus", "domainstatus",
+        "billingcycle", "subscriptionstatus", "subscriptiontier",
+    ):
+        op.execute(f"DROP TYPE IF EXISTS {enum}")
@@ -0,0 +1,91 @@
+"""Hot-path composite indexes
+
+Adds the composite indexes the tenant-scoped listings and dashboards
+filter and sort on, and drops the single-column indexes they supersede.
+Every index is built CONCURRENTLY outside the migration transaction, so
+writes to the tables keep flowing while they build. Concurrent builds
+run outside a transaction, so IF [NOT] EXISTS lets an interrupted run be
+repeated; an invalid index left behind by an interrupted build is
+dropped and rebuilt.
+
+Partitioned tables cannot be indexed concurrently; their indexes are
+created with the table, so they are skipped here.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (name, table, definition)
+INDEXES = [
+    ("ix_inboxes_tenant_status_created", "inboxes", "(tenant_id, status, created_at, id)"),
+    ("ix_inboxes_tenant_created", "inboxes", "(tenant_id, created_at, id)"),
+    ("ix_inboxes_domain_created", "inboxes", "(domain_id, created_at, id)"),
+    (
+        "ix_inboxes_tenant_blacklisted_created",
+        "inboxes",
+        "(tenant_id, created_at, id) WHERE is_blacklisted",
+    ),
+    ("ix_transaction_tenant_created", "transaction_history", "(tenant_id, created_at)"),
+    ("ix_audit_logs_tenant_created", "audit_logs", "(tenant_id, created_at)"),
+    ("ix_tenants_created_id", "tenants", "(created_at, id)"),
+    ("ix_tenants_status_created", "tenants", "(subscription_status, created_at, id)"),
+    ("ix_tenants_trial_ends_at", "tenants", "(trial_ends_at)"),
+    ("ix_domains_domain_name", "domains", "(domain_name)"),
+]
+
+# Single-column indexes covered by a composite index's leading column
+SUPERSEDED = [
+    ("ix_inboxes_tenant_id", "inboxes", "(tenant_id)"),
+    ("ix_inboxes_domain_id", "inboxes", "(domain_id)"),
+    ("ix_transaction_tenant_id", "transaction_history", "(tenant_id)"),
+    ("ix_audit_logs_tenant_id", "audit_logs", "(tenant_id)"),
+]
+
+
+def _partitioned(table: str) -> bool:
+    return bool(op.get_bind().execute(
+        sa.text("SELECT relkind = 'p' FROM pg_class WHERE relname = :table"),
+        {"table": table},
+    ).scalar())
+
+
+def _drop_if_invalid(name: str) -> None:
+    invalid = op.get_bind().execute(sa.text("""
+        SELECT NOT indisvalid FROM pg_index
+        JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+        WHERE pg_class.relname = :name
+    """), {"name": name}).scalar()
+    if invalid:
+        op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, definition in INDEXES:
+            if not _partitioned(table):
+                _drop_if_invalid(name)
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" {definition}')
+
+        for name, table, _ in SUPERSEDED:
+            if not _partitioned(table):
+                op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, definition in SUPERSEDED:
+            if not _partitioned(table):
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" {definition}')
+
+        for name, table, _ in INDEXES:
+            if not _partitioned(table):
+                op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
@@ -0,0 +1,130 @@
+"""Partition transaction_history and audit_logs by month
+
+Converts tables created before range partitioning in place: the plain
+table is renamed aside, the partitioned table is created, monthly
+partitions covering the existing rows (plus the months PartitionManager
+keeps ahead) are created, and the rows are copied over. The partitioned
+DDL is spelled out as of this revision, so later model changes do not
+alter it.
+
+Both tables are locked while their rows are copied; run this in a
+maintenance window on large installations. Tables that are already
+partitioned only get their first partitions.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.database.partitions import PartitionManager
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Partitioned definitions; created_at joins the primary key as the partition key
+DDL = {
+    "transaction_history": [
+        """
+        CREATE TABLE transaction_history (
+            id UUID NOT NULL,
+            tenant_id UUID NOT NULL REFERENCES tenants (id),
+            transaction_type transactiontype NOT NULL,
+            description TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            currency VARCHAR(3),
+            status VARCHAR(50),
+            stripe_transaction_id VARCHAR(255),
+            stripe_invoice_id VARCHAR(255),
+            domain_id UUID REFERENCES domains (id),
+            related_data JSONB,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """,
+        "CREATE INDEX ix_transaction_tenant_created ON transaction_history (tenant_id, created_at)",
+        "CREATE INDEX ix_transaction_type ON transaction_history (transaction_type)",
+        "CREATE INDEX ix_transaction_date ON transaction_history (created_at)",
+        "CREATE INDEX ix_transaction_stripe_id ON transaction_history (stripe_transaction_id)",
+        "CREATE INDEX ix_transaction_history_stripe_transaction_id "
+        "ON transaction_history (stripe_transaction_id)",
+    ],
+    "audit_logs": [
+        """
+        CREATE TABLE audit_logs (
+            id UUID NOT NULL,
+            tenant_id UUID NOT NULL REFERENCES tenants (id),
+            action VARCHAR(100) NOT NULL,
+            resource_type VARCHAR(50) NOT NULL,
+            resource_id VARCHAR(255),
+            changes JSONB,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """,
+        "CREATE INDEX ix_audit_logs_tenant_created ON audit_logs (tenant_id, created_at)",
+        "CREATE INDEX ix_audit_logs_action ON audit_logs (action)",
+        "CREATE INDEX ix_audit_logs_date ON audit_logs (created_at)",
+    ],
+}
+
+
+def _convert(table_name: str) -> None:
+    bind = op.get_bind()
+    relkind = bind.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE relname = :table"), {"table": table_name}
+    ).scalar()
+    if relkind == "p":
+        # Already partitioned: only the partitions are missing
+        PartitionManager.create_range(bind, table_name, date.today().replace(day=1))
+        return
+    if relkind != "r":
+        return
+
+    legacy = f"{table_name}_legacy"
+    inspector = sa.inspect(bind)
+
+    # Index and primary key names are schema-wide; free them for the new table
+    for index in inspector.get_indexes(table_name):
+        op.drop_index(index["name"], table_name=table_name)
+    pk_name = inspector.get_pk_constraint(table_name)["name"]
+    op.execute(f'ALTER TABLE "{table_name}" RENAME CONSTRAINT "{pk_name}" TO "{legacy}_pkey"')
+    op.rename_table(table_name, legacy)
+
+    # created_at is now part of the primary key
+    op.execute(f"UPDATE \"{legacy}\" SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+
+    for statement in DDL[table_name]:
+        op.execute(statement)
+
+    oldest = bind.execute(sa.text(f'SELECT min(created_at) FROM "{legacy}"')).scalar()
+    this_month = date.today().replace(day=1)
+    PartitionManager.create_range(
+        bind, table_name, min(oldest.date(), this_month) if oldest else this_month
+    )
+
+    columns = ", ".join(
+        f'"{column["name"]}"' for column in sa.inspect(bind).get_columns(legacy)
+    )
+    op.execute(f'INSERT INTO "{table_name}" ({columns}) SELECT {columns} FROM "{legacy}"')
+    op.drop_table(legacy)
+
+
+def upgrade() -> None:
+    for table_name in DDL:
+        _convert(table_name)
+
+
+def downgrade() -> None:
+    raise NotImplementedError(
+        "Partitioned tables are not converted back; restore from backup instead"
+    )
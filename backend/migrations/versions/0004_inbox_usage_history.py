@@ -0,0 +1,40 @@
+"""Inbox usage history
+
+Closed-period send counts written by the day/month counter reset.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inbox_usage_history",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("inbox_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("period", sa.String(10), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("emails_sent", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("inbox_id", "period", "period_start", name="uq_inbox_usage_period"),
+    )
+    op.create_index(
+        "ix_inbox_usage_tenant_period",
+        "inbox_usage_history",
+        ["tenant_id", "period", "period_start"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("inbox_usage_history")
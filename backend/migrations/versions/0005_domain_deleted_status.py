@@ -0,0 +1,26 @@
+"""Domain DELETED status
+
+Domains marked DELETED are waiting for the background purge.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # New enum values cannot be used in the transaction that adds them
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE domainstatus ADD VALUE 'DELETED'")
+
+
+def downgrade() -> None:
+    # Postgres cannot drop enum values; an unused value is harmless
+    pass
@@ -0,0 +1,48 @@
+"""Usage
+
+Per-tenant, per-billing-period usage and inbox overage.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "usage",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", UUID(as_uuid=True), sa.ForeignKey("tenants.id"), nullable=False),
+        sa.Column("billing_period_start", sa.DateTime(), nullable=False),
+        sa.Column("billing_period_end", sa.DateTime(), nullable=False),
+        sa.Column("inboxes_created", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("domains_added", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("emails_sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("api_calls", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("inbox_overage", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("overage_charge", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("reported_overage", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("reported_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("tenant_id", "billing_period_start", name="uq_usage_tenant_period"),
+    )
+    op.create_index(
+        "ix_usage_unreported",
+        "usage",
+        ["updated_at"],
+        postgresql_where=sa.text("inbox_overage <> reported_overage"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("usage")
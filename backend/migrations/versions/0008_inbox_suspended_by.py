@@ -0,0 +1,40 @@
+"""Inbox suspension source
+
+Records who suspended an inbox so that resuming, unsuspending a tenant and
+reactivating a domain each only undo their own suspensions.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("inboxes", sa.Column("suspended_by", sa.String(20), nullable=True))
+
+    # Existing suspensions: blacklisted ones were platform (or indistinguishable
+    # bulk) suspensions, the rest follow their domain or tenant
+    op.execute("""
+        UPDATE inboxes SET suspended_by = CASE
+            WHEN inboxes.is_blacklisted THEN 'platform'
+            WHEN domains.status = 'SUSPENDED' THEN 'domain'
+            WHEN tenants.is_suspended THEN 'account'
+            ELSE 'platform'
+        END
+        FROM domains, tenants
+        WHERE inboxes.status = 'SUSPENDED'
+          AND domains.id = inboxes.domain_id
+          AND tenants.id = inboxes.tenant_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column("inboxes", "suspended_by")
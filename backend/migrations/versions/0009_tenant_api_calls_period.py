@@ -0,0 +1,27 @@
+"""Month of Tenant.api_calls_this_month
+
+Records which UTC month the stored API call count belongs to, so the first
+flush of a new month starts the count over instead of adding to an
+all-time total.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing counts are all-time totals; NULL marks them as no month's count
+    op.add_column("tenants", sa.Column("api_calls_period", sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("tenants", "api_calls_period")
@@ -0,0 +1,46 @@
+"""Stored inbox health aggregates per tenant
+
+The admin tenant listing reads these instead of aggregating every listed
+tenant's inboxes per page; the admin stats worker keeps them current.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("tenants", sa.Column("active_inboxes_count", sa.Integer(), nullable=True, server_default="0"))
+    op.add_column("tenants", sa.Column("blacklisted_inboxes_count", sa.Integer(), nullable=True, server_default="0"))
+    op.add_column("tenants", sa.Column("avg_health_score", sa.Float(), nullable=True))
+
+    op.execute("""
+        UPDATE tenants SET
+            active_inboxes_count = stats.active,
+            blacklisted_inboxes_count = stats.blacklisted,
+            avg_health_score = stats.avg_health
+        FROM (
+            SELECT tenant_id,
+                   count(*) FILTER (WHERE status = 'ACTIVE') AS active,
+                   count(*) FILTER (WHERE is_blacklisted) AS blacklisted,
+                   avg(health_score) AS avg_health
+            FROM inboxes
+            WHERE status != 'DELETED'
+            GROUP BY tenant_id
+        ) AS stats
+        WHERE tenants.id = stats.tenant_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column("tenants", "avg_health_score")
+    op.drop_column("tenants", "blacklisted_inboxes_count")
+    op.drop_column("tenants", "active_inboxes_count")
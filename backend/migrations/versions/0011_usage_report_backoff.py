@@ -0,0 +1,27 @@
+"""Usage report backoff
+
+Tracks failed Stripe usage reports so a period that keeps failing is
+retried with backoff instead of holding the head of the reporter's batch.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("usage", sa.Column("report_attempts", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("usage", sa.Column("next_report_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("usage", "next_report_at")
+    op.drop_column("usage", "report_attempts")
@@ -0,0 +1,48 @@
+"""Inbox listing filter indexes
+
+Backs the warmup stage and health score filters of the inbox listing.
+Built CONCURRENTLY outside the migration transaction, like 0002, so writes
+to inboxes keep flowing; IF NOT EXISTS lets an interrupted run be repeated
+and an invalid index left behind by it is dropped and rebuilt.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+# (name, definition)
+INDEXES = [
+    ("ix_inboxes_tenant_warmup_created", "(tenant_id, warmup_stage, created_at, id)"),
+    ("ix_inboxes_tenant_health_created", "(tenant_id, health_score, created_at, id)"),
+]
+
+
+def _drop_if_invalid(name: str) -> None:
+    invalid = op.get_bind().execute(sa.text("""
+        SELECT NOT indisvalid FROM pg_index
+        JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+        WHERE pg_class.relname = :name
+    """), {"name": name}).scalar()
+    if invalid:
+        op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            _drop_if_invalid(name)
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON inboxes {definition}')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
@@ -0,0 +1,30 @@
+"""
+Query budget assertions for endpoint tests.
+
+Reads the per-request query count that app.utils.query_stats reports in
+the Server-Timing header.
+"""
+
+
+def assert_query_budget(response, max_queries: int) -> int:
+    """
+    Fail unless a response was served with at most `max_queries` queries.
+
+    Raises AssertionError explicitly so the check also runs under `python -O`.
+
+    Returns:
+        Number of queries the request ran
+    """
+    from app.utils.query_stats import SERVER_TIMING_PATTERN
+
+    match = SERVER_TIMING_PATTERN.search(response.headers.get("Server-Timing", ""))
+    if not match:
+        raise AssertionError("Response has no db Server-Timing entry")
+
+    count = int(match.group(2))
+    if count > max_queries:
+        raise AssertionError(
+            f"{response.request.method} {response.request.url.path} ran {count} queries "
+            f"(budget {max_queries})"
+        )
+    return count
@@ -0,0 +1,79 @@
+"""
+Abuse thresholds and the decaying counters that feed them.
+
+The counters are exercised through the in-process fallback used while
+Redis is unreachable, with a fake clock.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import abuse_service
+from app.services.abuse_service import AbuseSignalEngine
+from app.utils.security import SuspensionManager
+
+HALF_LIFE = 3600
+
+
+@pytest.mark.parametrize("reason, count, expected", [
+    ("spam_complaint", 9.9, False),
+    ("spam_complaint", 10, True),
+    ("blacklisted", 1, True),
+    ("payment_failed", 2, False),
+])
+def test_count_thresholds(reason, count, expected):
+    assert SuspensionManager.should_suspend(reason, count) == (expected, reason)
+
+
+def test_unknown_reason_never_suspends():
+    suspend, message = SuspensionManager.should_suspend("unknown", 1000)
+    assert not suspend
+    assert message == "Unknown reason: unknown"
+
+
+@pytest.mark.parametrize("bounces, volume, expected", [
+    # Below the minimum count the rate is not judged
+    (49, 0, False),
+    # 60 / 2060 is under 5%
+    (60, 2000, False),
+    # 60 / 560 is over 5%
+    (60, 500, True),
+    # 50 / 1000 is exactly 5%
+    (50, 950, True),
+    # No volume known: every signal counts
+    (50, None, True),
+])
+def test_hard_bounce_rate_threshold(bounces, volume, expected):
+    assert SuspensionManager.should_suspend("hard_bounce", bounces, volume) == (expected, "hard_bounce")
+
+
+@pytest.fixture
+def clock(monkeypatch, unreachable_redis):
+    """Local counters on a fake clock; advance with clock.now += seconds."""
+    fake = SimpleNamespace(now=1_700_000_000.0)
+    monkeypatch.setattr(abuse_service, "get_redis", unreachable_redis)
+    monkeypatch.setattr(abuse_service, "time", SimpleNamespace(time=lambda: fake.now))
+    monkeypatch.setattr(AbuseSignalEngine, "_local", {})
+    return fake
+
+
+def test_increment_accumulates_weights(clock):
+    assert AbuseSignalEngine._increment(["a", "b"], HALF_LIFE, [1.0, 3.0]) == [1.0, 3.0]
+    assert AbuseSignalEngine._increment(["a", "b"], HALF_LIFE, [1.0, 1.0]) == [2.0, 4.0]
+
+
+def test_increment_decays_by_half_life(clock):
+    AbuseSignalEngine._increment(["a"], HALF_LIFE, [4.0])
+    clock.now += HALF_LIFE
+    assert AbuseSignalEngine._increment(["a"], HALF_LIFE, [1.0]) == [pytest.approx(3.0)]
+    clock.now += 2 * HALF_LIFE
+    assert AbuseSignalEngine._increment(["a"], HALF_LIFE, [0.0]) == [pytest.approx(0.75)]
+
+
+def test_current_decays_without_updating(clock):
+    AbuseSignalEngine._increment(["a"], HALF_LIFE, [8.0])
+    clock.now += 3 * HALF_LIFE
+    assert AbuseSignalEngine._current(["a", "missing"], HALF_LIFE) == [pytest.approx(1.0), 0.0]
+    # Reading did not move the decay reference point
+    assert AbuseSignalEngine._current(["a"], HALF_LIFE) == [pytest.approx(1.0)]
@@ -0,0 +1,97 @@
+"""
+Batch handling of the audit log writer.
+
+Inserts are replaced by a fake that rejects marked events, so the
+bisection and retry decisions are checked without a database.
+"""
+
+import logging
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.config import settings
+from app.services.audit_service import AuditLogWriter
+
+
+def event(index: int, action: str = "inbox.created"):
+    return {"tenant_id": "tenant-1", "action": action, "resource_id": str(index)}
+
+
+@pytest.fixture
+def inserts(monkeypatch):
+    """Fake _insert: rejects batches containing a "bad" event, or fails every call when down."""
+    state = {"written": [], "calls": 0, "down": False}
+
+    def insert(events):
+        state["calls"] += 1
+        if state["down"]:
+            return OperationalError("INSERT", {}, Exception("connection refused"))
+        if any(e["action"] == "bad" for e in events):
+            return IntegrityError("INSERT", {}, Exception("violates foreign key constraint"))
+        state["written"].extend(events)
+        return None
+
+    monkeypatch.setattr(AuditLogWriter, "_insert", staticmethod(insert))
+    monkeypatch.setattr(AuditLogWriter, "_dropped", 0)
+    return state
+
+
+def test_trim_drops_oldest_events(monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_QUEUE_SIZE", 3)
+    monkeypatch.setattr(AuditLogWriter, "_dropped", 0)
+    batch = [event(i) for i in range(5)]
+    assert AuditLogWriter._trim(batch) == batch[2:]
+    assert AuditLogWriter._dropped == 2
+
+
+def test_trim_keeps_batch_within_bound(monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_QUEUE_SIZE", 5)
+    batch = [event(i) for i in range(5)]
+    assert AuditLogWriter._trim(batch) is batch
+
+
+def test_good_batch_is_written_in_one_insert(inserts):
+    batch = [event(i) for i in range(8)]
+    assert AuditLogWriter._flush(batch) == []
+    assert inserts["written"] == batch
+    assert inserts["calls"] == 1
+
+
+def test_rejected_event_is_dead_lettered_and_the_rest_written(inserts, caplog):
+    batch = [event(i) for i in range(8)]
+    batch[5] = event(5, action="bad")
+
+    with caplog.at_level(logging.ERROR, logger="app.services.audit_service.dead_letter"):
+        assert AuditLogWriter._flush(batch) == []
+
+    assert inserts["written"] == batch[:5] + batch[6:]
+    assert AuditLogWriter._dropped == 1
+    dead = [r for r in caplog.records if r.name == "app.services.audit_service.dead_letter"]
+    assert len(dead) == 1
+    assert '"action": "bad"' in dead[0].getMessage()
+
+
+def test_unreachable_database_keeps_the_batch(inserts):
+    inserts["down"] = True
+    batch = [event(i) for i in range(8)]
+    assert AuditLogWriter._flush(batch) == batch
+    assert inserts["calls"] == 1
+    assert AuditLogWriter._dropped == 0
+
+
+def test_outage_during_bisection_keeps_unwritten_events(inserts, monkeypatch):
+    batch = [event(i) for i in range(8)]
+    batch[1] = event(1, action="bad")
+    real_insert = AuditLogWriter._insert
+
+    def insert(events):
+        # The database goes away after the first split
+        if inserts["calls"] >= 2:
+            inserts["down"] = True
+        return real_insert(events)
+
+    monkeypatch.setattr(AuditLogWriter, "_insert", staticmethod(insert))
+    remaining = AuditLogWriter._flush(batch)
+    assert inserts["written"] == []
+    assert remaining == batch
@@ -0,0 +1,27 @@
+"""Column selection for bulk exports."""
+
+import pytest
+
+from app.services.export_service import ExportService
+
+
+def test_all_columns_by_default_without_excluded():
+    columns = ExportService.resolve_columns("inboxes", None)
+    assert columns == ExportService.available_columns("inboxes")
+    assert "id" in columns
+    assert "password" not in columns
+
+
+def test_selection_is_kept_in_requested_order():
+    assert ExportService.resolve_columns("inboxes", ["full_email", "id"]) == ["full_email", "id"]
+
+
+def test_unknown_dataset_is_rejected():
+    with pytest.raises(ValueError, match="Unknown dataset: mailboxes"):
+        ExportService.resolve_columns("mailboxes", None)
+
+
+@pytest.mark.parametrize("columns", [["id", "nope"], ["password"]])
+def test_unknown_or_excluded_columns_are_rejected(columns):
+    with pytest.raises(ValueError, match="Unknown columns for inboxes"):
+        ExportService.resolve_columns("inboxes", columns)
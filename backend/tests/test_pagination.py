@@ -0,0 +1,42 @@
+"""Keyset cursor encoding and rejection of malformed cursors."""
+
+import base64
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456)
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", [None, ""])
+def test_missing_cursor_is_first_page(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def _encode(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    _encode("not json"),
+    _encode('["2026-03-01T12:30:15"]'),
+    _encode('["yesterday", "5b0c1f9e-8f8a-4c39-9a8e-2f1f4c1b7a10"]'),
+    _encode('["2026-03-01T12:30:15", "not-a-uuid"]'),
+    _encode('{"created_at": "2026-03-01T12:30:15"}'),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid cursor"
@@ -0,0 +1,37 @@
+"""
+Query budgets of routes that used to run a query per row (N+1).
+
+A budget is the number of SQL statements the route may run per request;
+for listings it must not grow with the number of rows returned.
+"""
+
+from tests.query_budget import assert_query_budget
+
+# Domains, then inbox counts grouped by domain
+DOMAIN_LIST_BUDGET = 2
+
+# The domain, then one inbox aggregate
+DOMAIN_HEALTH_BUDGET = 2
+
+
+def test_domain_list_query_count_does_not_grow_with_domains(client, add_domain):
+    add_domain(inboxes=1)
+    response = client.get("/api/v1/domains/")
+    assert response.status_code == 200
+    single = assert_query_budget(response, DOMAIN_LIST_BUDGET)
+
+    for _ in range(9):
+        add_domain(inboxes=3)
+    response = client.get("/api/v1/domains/")
+    assert response.status_code == 200
+    assert len(response.json()) == 10
+    assert sorted(d["inboxes_count"] for d in response.json()) == [1] + [3] * 9
+    assert assert_query_budget(response, DOMAIN_LIST_BUDGET) == single
+
+
+def test_domain_health_query_budget(client, add_domain):
+    domain = add_domain(inboxes=5)
+    response = client.get(f"/api/v1/domains/{domain.id}")
+    assert response.status_code == 200
+    assert response.json()["inboxes_count"] == 5
+    assert_query_budget(response, DOMAIN_HEALTH_BUDGET)
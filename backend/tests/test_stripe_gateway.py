@@ -0,0 +1,80 @@
+"""Rate-limit retries of StripeGateway.request, on a fake clock."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.integrations import stripe_gateway
+from app.integrations.stripe_gateway import StripeGateway
+
+
+class RateLimitError(Exception):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake clock recording the backoff sleeps; jitter is disabled."""
+    fake = SimpleNamespace(now=0.0, sleeps=[])
+
+    def sleep(seconds):
+        fake.sleeps.append(seconds)
+        fake.now += seconds
+
+    monkeypatch.setattr(stripe_gateway, "stripe", SimpleNamespace(
+        error=SimpleNamespace(RateLimitError=RateLimitError)
+    ))
+    monkeypatch.setattr(stripe_gateway, "time", SimpleNamespace(monotonic=lambda: fake.now, sleep=sleep))
+    monkeypatch.setattr(stripe_gateway, "random", SimpleNamespace(random=lambda: 0.0))
+    monkeypatch.setattr(settings, "STRIPE_CALL_TIMEOUT_SECONDS", 30.0)
+    monkeypatch.setattr(settings, "STRIPE_RATE_LIMIT_RETRIES", 3)
+    return fake
+
+
+def rate_limited(failures: int):
+    """SDK method stand-in failing `failures` times before succeeding."""
+    calls = []
+
+    def method(*args, **params):
+        calls.append((args, params))
+        if len(calls) <= failures:
+            raise RateLimitError("429")
+        return "ok"
+
+    method.calls = calls
+    return method
+
+
+def test_retries_with_backoff_and_reuses_idempotency_key(clock):
+    method = rate_limited(2)
+    assert StripeGateway.request(method, "cus_1", idempotency_key="key-1", amount=100) == "ok"
+    assert clock.sleeps == [0.5, 1.0]
+    assert method.calls == [(("cus_1",), {"amount": 100, "idempotency_key": "key-1"})] * 3
+
+
+def test_gives_up_after_configured_retries(clock):
+    method = rate_limited(10)
+    with pytest.raises(RateLimitError):
+        StripeGateway.request(method)
+    assert len(method.calls) == 4
+    assert clock.sleeps == [0.5, 1.0, 2.0]
+
+
+def test_does_not_sleep_past_the_deadline(clock, monkeypatch):
+    monkeypatch.setattr(settings, "STRIPE_CALL_TIMEOUT_SECONDS", 1.0)
+    method = rate_limited(10)
+    with pytest.raises(RateLimitError):
+        StripeGateway.request(method)
+    # The second backoff (1s) would end after the 1s deadline
+    assert len(method.calls) == 2
+    assert clock.sleeps == [0.5]
+
+
+def test_other_errors_are_not_retried(clock):
+    def method():
+        raise ValueError("card declined")
+
+    with pytest.raises(ValueError):
+        StripeGateway.request(method)
+    assert clock.sleeps == []